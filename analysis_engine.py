@@ -1,10 +1,33 @@
 import os
 import sys
+import time
+import asyncio
+import argparse
+import threading
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import psycopg2
 from psycopg2 import sql
 from dotenv import load_dotenv
+import db
+from metrics import RunMetrics
+from profiling import RunProfiler
+import calibration
+import elo
+import goal_model
+import basketball_sim
+import staking
+import snapshot
+import analytics_store
+import live
+import work_queue
+import rollups
+import odds_providers
+import fixture_index
+import odds_anomaly
+import checkpoint
+import justifications
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,21 +35,28 @@ load_dotenv()
 # Configuration
 API_KEY = os.environ.get("API_KEY")
 DATABASE_URL = os.environ.get("DATABASE_URL")
+REPORT_DIR = os.environ.get("REPORT_DIR", "reports")
+SIMULATIONS = int(os.environ.get("SIMULATIONS", basketball_sim.DEFAULT_SIMULATIONS))
+SIM_SEED = int(os.environ.get("SIM_SEED", basketball_sim.DEFAULT_SEED))
+
+# API base URLs, overridable to point the engine at a local mock (see mock_api.py)
+FOOTBALL_API_URL = os.environ.get("FOOTBALL_API_URL", "https://v3.football.api-sports.io").rstrip('/')
+BASKETBALL_API_URL = os.environ.get("BASKETBALL_API_URL", "https://v1.basketball.api-sports.io").rstrip('/')
 
 SPORTS_CONFIG = {
     'Football': {
-        'fixtures_url': "https://v3.football.api-sports.io/fixtures",
-        'odds_url': "https://v3.football.api-sports.io/odds",
-        'stats_url': "https://v3.football.api-sports.io/teams/statistics",
+        'fixtures_url': f"{FOOTBALL_API_URL}/fixtures",
+        'odds_url': f"{FOOTBALL_API_URL}/odds",
+        'stats_url': f"{FOOTBALL_API_URL}/teams/statistics",
         'league_id': None, # All leagues
         'headers': {
             'x-apisports-key': API_KEY
         }
     },
     'Basketball': {
-        'fixtures_url': "https://v1.basketball.api-sports.io/games",
-        'odds_url': "https://v1.basketball.api-sports.io/odds",
-        'stats_url': "https://v1.basketball.api-sports.io/statistics",
+        'fixtures_url': f"{BASKETBALL_API_URL}/games",
+        'odds_url': f"{BASKETBALL_API_URL}/odds",
+        'stats_url': f"{BASKETBALL_API_URL}/statistics",
         'league_id': 12, # NBA League ID
         'headers': {
             'x-apisports-key': API_KEY
@@ -34,9 +64,81 @@ SPORTS_CONFIG = {
     }
 }
 
+# Games analyzed per sport and run (odds API quota budget of each sport worker)
+MAX_GAMES_PER_SPORT = 25
+
+# Metrics of the current run, written as a report at the end
+METRICS = RunMetrics()
+
+# Loaded at startup: calibrated parameters per (sport, league_id), stored
+# records per (sport, team_id) and team ratings, see load_model_state
+MODEL_PARAMS = {}
+TEAM_RECORDS = {}
+RATINGS = elo.RatingStore()
+GOAL_RATINGS = goal_model.GoalRatings()
+PROFILES = basketball_sim.TeamProfiles()
+
+# Every odd fetched during the run, appended to the analytics store at the end
+ODDS_LOG = []
+
+# Odds sources besides API-Sports, and their odds matched to our fixtures:
+# (sport, fixture_id) -> {bookmaker: markets}
+PROVIDERS = odds_providers.configured_providers()
+EXTERNAL_ODDS = {}
+
+# Rolling statistics of every price seen, and the signals of each fixture's latest snapshot
+DETECTOR = odds_anomaly.OddsMovementDetector()
+ODDS_SIGNALS = {}
+
+# Games, odds and bets of the current batch run, saved as they come in so an
+# interrupted run can be resumed without spending quota twice (started in main)
+CHECKPOINT = checkpoint.RunCheckpoint()
+# Fixtures whose odds request failed; they are never checkpointed as done
+ODDS_FAILED = set()
+
+# Minimum edge (model probability - implied probability) for a value bet
+VALUE_THRESHOLD = 0.05
+
+# Football markets priced from the goal model's score matrix, besides Match Winner
+GOAL_MARKETS = ['Goals Over/Under', 'Both Teams Score', 'Asian Handicap']
+
+# Bet names of the winner market per sport, in order of preference
+MONEYLINE_MARKETS = {
+    'Football': ['Match Winner'],
+    'Basketball': ['Home/Away', 'Match Winner'],
+}
+
+# Basketball markets priced from the simulated scores
+BASKETBALL_MARKETS = ['Home/Away', 'Asian Handicap', 'Over/Under']
+
+# Fixture statuses that mean the final score is known
+FINISHED_STATUSES = {'FT', 'AET', 'PEN', 'AOT'}
+
+# Seconds an idle queue worker waits before checking for expired leases again
+QUEUE_POLL_SECONDS = 5
+
+# Functions timed individually by --profile
+PROFILED_FUNCTIONS = ['get_games_for_date', 'get_real_odds', 'analyze_game', 'save_to_db']
+
+def api_get(sport, endpoint, config, params):
+    """GET an API-Sports endpoint, recording its latency and the remaining quota."""
+    start = time.perf_counter()
+    status = None
+    try:
+        response = requests.get(config[f'{endpoint}_url'], headers=config['headers'], params=params)
+        status = response.status_code
+    finally:
+        METRICS.observe_http(sport, endpoint, time.perf_counter() - start, status)
+
+    remaining = response.headers.get('x-ratelimit-requests-remaining')
+    if remaining is not None and remaining.isdigit():
+        METRICS.set_quota(sport, int(remaining))
+    return response
+
 # --- Real Statistical Analysis ---
-def calculate_team_strength(team_stats):
+def calculate_team_strength(team_stats, params=None):
     """Calculate team strength based on recent form and goals."""
+    params = params or calibration.DEFAULT_PARAMS
     if not team_stats:
         return 0.5
     
@@ -57,19 +159,22 @@ def calculate_team_strength(team_stats):
     # Goal difference per game
     goal_diff = (goals_for - goals_against) / total_games
     
-    # Normalize goal diff to 0-1 scale (assuming -3 to +3 range)
-    goal_diff_normalized = (goal_diff + 3) / 6
+    # Normalize goal diff to 0-1 scale (-range to +range, 3 goals by default)
+    goal_range = params['goal_diff_range']
+    goal_diff_normalized = (goal_diff + goal_range) / (2 * goal_range)
     goal_diff_normalized = max(0, min(1, goal_diff_normalized))
     
     # Weighted combination
-    strength = (win_rate * 0.6) + (goal_diff_normalized * 0.4)
+    strength = (win_rate * params['win_weight']) + (goal_diff_normalized * params['goal_diff_weight'])
     
     return strength
 
-def calculate_match_probability(home_strength, away_strength, is_home=True):
+def calculate_match_probability(home_strength, away_strength, is_home=True, params=None):
     """Calculate win probability using Elo-like system."""
+    params = params or calibration.DEFAULT_PARAMS
+
     # Home advantage factor
-    home_advantage = 0.1 if is_home else -0.1
+    home_advantage = params['home_advantage'] if is_home else -params['home_advantage']
     
     # Adjusted strengths
     home_adj = home_strength + home_advantage
@@ -79,13 +184,13 @@ def calculate_match_probability(home_strength, away_strength, is_home=True):
     strength_diff = home_adj - away_adj
     
     # Home win probability
-    home_win_prob = 1 / (1 + 10 ** (-strength_diff * 4))
+    home_win_prob = 1 / (1 + 10 ** (-strength_diff * params['logistic_scale']))
     
     # Away win probability
     away_win_prob = 1 - home_win_prob
     
     # Draw probability (simplified)
-    draw_prob = 0.25 * (1 - abs(strength_diff))
+    draw_prob = params['draw_factor'] * max(0, 1 - abs(strength_diff))
     
     # Normalize
     total = home_win_prob + away_win_prob + draw_prob
@@ -99,88 +204,138 @@ def calculate_match_probability(home_strength, away_strength, is_home=True):
         'away_win': away_win_prob
     }
 
+def bookmaker_markets(bm):
+    """All markets of one bookmaker as {bet name: {selection: odd}}."""
+    markets = {}
+    for bet in bm.get('bets', []):
+        markets[bet['name']] = {v['value']: float(v['odd']) for v in bet.get('values', [])}
+    return markets
+
 def get_real_odds(fixture_id, config, sport='Football'):
-    """Fetch real odds from API-Sports."""
+    """Fetch real odds from API-Sports, merged with the other configured providers.
+
+    Returns (winner market odds, bookmaker name, every market of that bookmaker) or None.
+    """
+    ODDS_FAILED.discard((sport, fixture_id))
     try:
         if sport == 'Football':
             params = {"fixture": fixture_id}
         else: # Basketball
             params = {"game": fixture_id}
             
-        response = requests.get(config['odds_url'], headers=config['headers'], params=params)
+        response = api_get(sport, 'odds', config, params)
         response.raise_for_status()
         data = response.json().get('response', [])
+        external = EXTERNAL_ODDS.get((sport, fixture_id), {})
         
-        if not data:
+        if not data and not external:
             return None
         
-        # Search specifically for Bet365 per user request
+        if analytics_store.enabled():
+            ODDS_LOG.extend(analytics_store.odds_rows(sport, fixture_id, data, METRICS.run_id))
+        
+        def winner_market(markets):
+            for bet_name in MONEYLINE_MARKETS[sport]:
+                if bet_name in markets:
+                    return markets[bet_name]
+            return None
+        
+        # One normalized feed: API-Sports bookmakers first, other providers fill in
+        # bookmakers and markets API-Sports does not have
+        books = {}
+        fallbacks = []
         for bookmaker_data in data:
-            bookmakers = bookmaker_data.get('bookmakers', [])
-            for bm in bookmakers:
-                if bm['name'].lower() == 'bet365':
-                    bets = bm.get('bets', [])
-                    for bet in bets:
-                        if bet['name'] == 'Match Winner':
-                            values = bet.get('values', [])
-                            odds_dict = {}
-                            for v in values:
-                                odds_dict[v['value']] = float(v['odd'])
-                            return odds_dict, bm['name']
+            for i, bm in enumerate(bookmaker_data.get('bookmakers', [])):
+                books.setdefault(bm['name'], bookmaker_markets(bm))
+                if i == 0:
+                    fallbacks.append(bm['name'])
+        names = {name.lower(): name for name in books}
+        for name, markets in external.items():
+            name = names.setdefault(name.lower(), name)
+            merged = books.setdefault(name, {})
+            for bet_name, selections in markets.items():
+                merged.setdefault(bet_name, selections)
+            if name not in fallbacks:
+                fallbacks.append(name)
+        
+        record_odds_signals(sport, fixture_id, books)
+        
+        # Search specifically for Bet365 per user request
+        for name, markets in books.items():
+            if name.lower() == 'bet365' and winner_market(markets):
+                return winner_market(markets), name, markets
         
         # Fallback to the first available bookmaker if Bet365 not found
-        for bookmaker_data in data:
-            bookmakers = bookmaker_data.get('bookmakers', [])
-            if bookmakers:
-                bm = bookmakers[0]
-                bets = bm.get('bets', [])
-                for bet in bets:
-                    if bet['name'] == 'Match Winner':
-                        values = bet.get('values', [])
-                        odds_dict = {}
-                        for v in values:
-                            odds_dict[v['value']] = float(v['odd'])
-                        return odds_dict, bm['name']
+        for name in fallbacks:
+            if winner_market(books[name]):
+                return winner_market(books[name]), name, books[name]
         
         return None
     except Exception as e:
         print(f"Error fetching odds for {sport} id {fixture_id}: {e}")
+        ODDS_FAILED.add((sport, fixture_id))
         return None
 
-def generate_justification(sport, home, away, prediction, prob, stats_summary):
-    """Generate justification based on real statistics."""
-    reasons = []
-    
-    if 'home_form' in stats_summary:
-        reasons.append(f"{home} tem {stats_summary['home_form']}% de aproveitamento em casa")
-    
-    if 'away_form' in stats_summary:
-        reasons.append(f"{away} tem {stats_summary['away_form']}% fora de casa")
-    
-    if 'goal_diff' in stats_summary:
-        if stats_summary['goal_diff'] > 0:
-            reasons.append(f"Saldo de gols favorável: +{stats_summary['goal_diff']:.1f}")
-        else:
-            reasons.append(f"Saldo de gols: {stats_summary['goal_diff']:.1f}")
-    
-    if not reasons:
-        reasons.append("Análise baseada em estatísticas recentes")
-    
-    justification = ". ".join(reasons[:2])
-    return f"{justification}. Probabilidade calculada: {prob:.1%}"
+def fixture_odds(fixture_id, config, sport):
+    """get_real_odds, reusing the odds checkpointed by an interrupted run."""
+    saved = CHECKPOINT.get('odds', sport, fixture_id)
+    if saved is not None:
+        METRICS.increment('checkpoint_odds_reused')
+        return tuple(saved['odds']) if saved['odds'] else None
+
+    odds_res = get_real_odds(fixture_id, config, sport)
+    if (sport, fixture_id) not in ODDS_FAILED:
+        CHECKPOINT.put('odds', sport, fixture_id, {'odds': odds_res})
+    return odds_res
+
+def record_odds_signals(sport, fixture_id, books):
+    """Feeds a snapshot to the movement detector and keeps its steam/outlier signals."""
+    signals = DETECTOR.observe(sport, fixture_id, books)
+    ODDS_SIGNALS[(sport, fixture_id)] = signals
+    for signal in signals:
+        METRICS.increment(f"odds_signals_{signal['kind']}")
+    return signals
+
+def has_odds_signals(sport, fixture_id):
+    """True when the fixture's latest odds show a sharp move or an outlier price."""
+    return bool(ODDS_SIGNALS.get((sport, fixture_id)))
+
+def tag_odds_signals(sport, bets):
+    """Attaches to each bet the signals raised on its own market and selection.
+
+    Bets stay priced at their own bookmaker's odds; flagged ones are listed first.
+    """
+    for bet in bets:
+        signals = [
+            s for s in ODDS_SIGNALS.get((sport, bet.get('fixture_id')), [])
+            if s['market'] == bet.get('market') and s['selection'] == bet.get('selection')
+        ]
+        if signals:
+            bet['odds_signals'] = signals
+    return sorted(bets, key=lambda bet: 'odds_signals' not in bet)
+
+def index_external_odds(sport, games):
+    """Matches the other providers' events to these games and keeps their odds for get_real_odds."""
+    if not PROVIDERS or not games:
+        return
+    index = fixture_index.FixtureIndex().add_games(sport, games)
+    odds, unmatched = odds_providers.resolve_events(PROVIDERS, sport, index)
+    for fixture_id, books in odds.items():
+        EXTERNAL_ODDS[(sport, fixture_id)] = books
+    METRICS.increment('provider_fixtures_matched', len(odds))
+    METRICS.increment('provider_events_unmatched', unmatched)
 
 # --- Main Logic ---
 
 def get_games_for_date(sport, config, target_date):
     """Fetches games for a specific day and sport."""
-    headers = config['headers']
     params = {"date": target_date}
     if config.get('league_id'):
         params['league'] = config['league_id']
     
     print(f"[{sport}] Fetching games for {target_date}...")
     try:
-        response = requests.get(config['fixtures_url'], headers=headers, params=params)
+        response = api_get(sport, 'fixtures', config, params)
         response.raise_for_status()
         data = response.json().get('response', [])
         
@@ -194,34 +349,167 @@ def get_games_for_date(sport, config, target_date):
         print(f"[{sport}] Error fetching data for {target_date}: {e}")
         return []
 
-def analyze_game(sport, game, config):
-    """Analyzes a single game based on real statistics and odds."""
+def game_details(sport, game):
+    """(fixture id, home team, away team, league, HH:mm) of an API-Sports game."""
+    if sport == 'Football':
+        fixture_id = game['fixture']['id']
+        match_time = game['fixture']['date'][11:16] # HH:mm
+    else: # Basketball
+        fixture_id = game.get('id')
+        match_time = game.get('date', '')[11:16] # HH:mm
+    return fixture_id, game['teams']['home']['name'], game['teams']['away']['name'], game['league']['name'], match_time
+
+def analyze_basketball_slate(games, config, odds=None):
+    """Prices every game of a basketball slate from one batched score simulation.
+
+    `odds` maps fixture ids to get_real_odds results already fetched; other games
+    have their odds fetched here.
+    """
+    odds = odds or {}
+    sport = 'Basketball'
+    pending = []
+    results = []
+    
+    for game in games:
+        try:
+            fixture_id, home_team, away_team, league, match_time = game_details(sport, game)
+            if not fixture_id:
+                METRICS.fixture_skipped(sport, 'no_fixture_id')
+                continue
+            
+            odds_res = odds.get(fixture_id) or fixture_odds(fixture_id, config, sport)
+            if not odds_res:
+                METRICS.fixture_skipped(sport, 'no_odds')
+                continue
+            
+            matchup = PROFILES.matchup(game['teams']['home'].get('id'), game['teams']['away'].get('id'))
+            if matchup is None:
+                # Too few stored games to simulate: price the moneyline only
+                results.extend(price_basketball_moneyline(game, fixture_id, odds_res[2]))
+                continue
+            
+            pending.append((fixture_id, home_team, away_team, league, match_time, matchup, odds_res[2]))
+        except Exception as e:
+            print(f"Error analyzing game: {e}")
+            METRICS.fixture_skipped(sport, 'error')
+    
+    analysis_start = time.perf_counter()
+    simulations = basketball_sim.simulate_slate([p[5] for p in pending], SIMULATIONS, SIM_SEED)
+    
+    for (fixture_id, home_team, away_team, league, match_time, _, markets), sim in zip(pending, simulations):
+        match_name = f"{home_team} vs {away_team}"
+        for bet_name in BASKETBALL_MARKETS:
+            for selection, odd in markets.get(bet_name, {}).items():
+                our_prob = sim.selection_probability(bet_name, selection, odd)
+                if our_prob is None:
+                    continue
+                value = our_prob - 1 / odd
+                
+                if value > VALUE_THRESHOLD:
+                    prediction = basketball_sim.selection_label(bet_name, selection, home_team, away_team)
+                    reasons = {'expected_points': (sim.home_points, sim.away_points)}
+                    
+                    results.append({
+                        'match_name': match_name,
+                        'match_time': match_time,
+                        'league': league,
+                        'sport': sport,
+                        'main_prediction': prediction,
+                        'secondary_prediction': f"Value: +{value:.1%}",
+                        'confidence_level': int(our_prob * 100),
+                        'justification_codes': justifications.encode(reasons, our_prob),
+                        'odds_value': odd,
+                        'status': 'pending',
+                        'fixture_id': fixture_id,
+                        'model_probability': our_prob,
+                        'market': bet_name,
+                        'selection': selection
+                    })
+        METRICS.fixture_processed(sport)
+    
+    METRICS.add_time('analysis', time.perf_counter() - analysis_start)
+    return tag_odds_signals(sport, results)
+
+def price_basketball_moneyline(game, fixture_id, markets):
+    """Moneyline bets of a game the simulation has no profiles for.
+
+    Uses the Elo ratings when both teams are rated, else the stored team records
+    through the strength model, with the draw share removed.
+    """
+    sport = 'Basketball'
+    _, home_team, away_team, league, match_time = game_details(sport, game)
+    home_id = game['teams']['home'].get('id')
+    away_id = game['teams']['away'].get('id')
+
+    if RATINGS.rated(sport, home_id) and RATINGS.rated(sport, away_id):
+        model = 'elo'
+        probs = elo.match_probability(sport, RATINGS.get(sport, home_id)[0], RATINGS.get(sport, away_id)[0])
+        reasons = {}
+    else:
+        model = 'strength'
+        params = calibration.params_for(MODEL_PARAMS, sport, game['league'].get('id'))
+        home_strength = calculate_team_strength(TEAM_RECORDS.get((sport, home_id)), params)
+        away_strength = calculate_team_strength(TEAM_RECORDS.get((sport, away_id)), params)
+        probs = calculate_match_probability(home_strength, away_strength, params=params)
+        reasons = {'home_form': int(home_strength * 100), 'away_form': int(away_strength * 100)}
+    print(f"[{sport}] No simulation profile for {home_team} vs {away_team}, pricing the moneyline with the {model} model.")
+    METRICS.increment(f'basketball_fallback_{model}')
+
+    two_way = probs['home_win'] + probs['away_win']
+    results = []
+    for bet_name in MONEYLINE_MARKETS[sport]:
+        for selection, odd in markets.get(bet_name, {}).items():
+            if selection not in ('Home', 'Away'):
+                continue
+            our_prob = probs['home_win' if selection == 'Home' else 'away_win'] / two_way
+            value = our_prob - 1 / odd
+            if value > VALUE_THRESHOLD:
+                results.append({
+                    'match_name': f"{home_team} vs {away_team}",
+                    'match_time': match_time,
+                    'league': league,
+                    'sport': sport,
+                    'main_prediction': basketball_sim.selection_label(bet_name, selection, home_team, away_team),
+                    'secondary_prediction': f"Value: +{value:.1%}",
+                    'confidence_level': int(our_prob * 100),
+                    'justification_codes': justifications.encode(reasons, our_prob),
+                    'odds_value': odd,
+                    'status': 'pending',
+                    'fixture_id': fixture_id,
+                    'model_probability': our_prob,
+                    'market': bet_name,
+                    'selection': selection
+                })
+        # One moneyline market per game, as get_real_odds picks its winner market
+        if markets.get(bet_name):
+            break
+    METRICS.fixture_processed(sport)
+    return results
+
+def analyze_game(sport, game, config, odds_res=None):
+    """Analyzes a single game based on real statistics and odds (fetched unless given)."""
+    if sport == 'Basketball':
+        fixture_id = game_details(sport, game)[0]
+        return analyze_basketball_slate([game], config, {fixture_id: odds_res} if odds_res else None)
+    
     results = []
     
     try:
-        if sport == 'Football':
-            fixture_id = game['fixture']['id']
-            home_team = game['teams']['home']['name']
-            away_team = game['teams']['away']['name']
-            league = game['league']['name']
-            match_time = game['fixture']['date'][11:16] # HH:mm
-        else: # Basketball
-            fixture_id = game.get('id')
-            home_team = game['teams']['home']['name']
-            away_team = game['teams']['away']['name']
-            league = game['league']['name']
-            match_time = game.get('date', '')[11:16] # HH:mm
+        fixture_id, home_team, away_team, league, match_time = game_details(sport, game)
         
         if not fixture_id:
+            METRICS.fixture_skipped(sport, 'no_fixture_id')
             return []
             
         # Get real odds (specifically looking for Bet365)
-        odds_res = get_real_odds(fixture_id, config, sport)
+        odds_res = odds_res or fixture_odds(fixture_id, config, sport)
         
         if not odds_res:
+            METRICS.fixture_skipped(sport, 'no_odds')
             return []  # Skip if no odds available
             
-        real_odds, bookmaker = odds_res
+        real_odds, bookmaker, markets = odds_res
+        analysis_start = time.perf_counter()
         
         # Filter: Only accept Bet365 if possible (User request)
         if bookmaker.lower() != 'bet365':
@@ -229,9 +517,9 @@ def analyze_game(sport, game, config):
             # The user wants games that appear on Bet365.
             pass
         
-        # Extract team stats from fixture data (simplified - using goals)
+        # Prefer the teams' stored records; fall back to the fixture data (simplified - using goals)
         goals_data = game.get('goals', {}) or {}
-        home_stats = {
+        home_stats = TEAM_RECORDS.get((sport, game['teams']['home'].get('id'))) or {
             'wins': game['teams']['home'].get('winner', False) and 1 or 0,
             'goals_for': goals_data.get('home') or 0,
             'goals_against': goals_data.get('away') or 0,
@@ -239,7 +527,7 @@ def analyze_game(sport, game, config):
             'losses': 0
         }
         
-        away_stats = {
+        away_stats = TEAM_RECORDS.get((sport, game['teams']['away'].get('id'))) or {
             'wins': game['teams']['away'].get('winner', False) and 1 or 0,
             'goals_for': goals_data.get('away') or 0,
             'goals_against': goals_data.get('home') or 0,
@@ -247,12 +535,25 @@ def analyze_game(sport, game, config):
             'losses': 0
         }
         
+        params = calibration.params_for(MODEL_PARAMS, sport, game['league'].get('id'))
+
         # Calculate strengths
-        home_strength = calculate_team_strength(home_stats)
-        away_strength = calculate_team_strength(away_stats)
+        home_strength = calculate_team_strength(home_stats, params)
+        away_strength = calculate_team_strength(away_stats, params)
         
-        # Calculate probabilities
-        probs = calculate_match_probability(home_strength, away_strength)
+        # Calculate probabilities: the goal model's score matrix for rated football
+        # teams, else two rating lookups when both teams are rated
+        home_id = game['teams']['home'].get('id')
+        away_id = game['teams']['away'].get('id')
+        rates = GOAL_RATINGS.rates(sport, home_id, away_id) if sport == 'Football' else None
+        matrix = None
+        if rates:
+            matrix = goal_model.score_matrix(*rates)
+            probs = goal_model.match_odds(matrix)
+        elif RATINGS.rated(sport, home_id) and RATINGS.rated(sport, away_id):
+            probs = elo.match_probability(sport, RATINGS.get(sport, home_id)[0], RATINGS.get(sport, away_id)[0])
+        else:
+            probs = calculate_match_probability(home_strength, away_strength, params=params)
         
         # Analyze each market
         match_name = f"{home_team} vs {away_team}"
@@ -264,13 +565,12 @@ def analyze_game(sport, game, config):
             our_prob = probs['home_win']
             value = our_prob - implied_prob
             
-            if value > 0.05:  # 5% edge minimum for professional standard
+            if value > VALUE_THRESHOLD:  # 5% edge minimum for professional standard
                 confidence = int(our_prob * 100)
-                stats_summary = {
+                reasons = {
                     'home_form': int(home_strength * 100),
                     'goal_diff': home_stats['goals_for'] - home_stats['goals_against']
                 }
-                justification = generate_justification(sport, home_team, away_team, f"Win {home_team}", our_prob, stats_summary)
                 
                 results.append({
                     'match_name': match_name,
@@ -280,9 +580,13 @@ def analyze_game(sport, game, config):
                     'main_prediction': f"Win {home_team}",
                     'secondary_prediction': f"Value: +{value:.1%}",
                     'confidence_level': confidence,
-                    'ai_justification': justification,
+                    'justification_codes': justifications.encode(reasons, our_prob),
                     'odds_value': home_odd,
-                    'status': 'pending'
+                    'status': 'pending',
+                    'fixture_id': fixture_id,
+                    'model_probability': our_prob,
+                    'market': 'Match Winner',
+                    'selection': 'Home'
                 })
         
         # Away Win
@@ -292,13 +596,12 @@ def analyze_game(sport, game, config):
             our_prob = probs['away_win']
             value = our_prob - implied_prob
             
-            if value > 0.05:  # 5% edge minimum
+            if value > VALUE_THRESHOLD:  # 5% edge minimum
                 confidence = int(our_prob * 100)
-                stats_summary = {
+                reasons = {
                     'away_form': int(away_strength * 100),
                     'goal_diff': away_stats['goals_for'] - away_stats['goals_against']
                 }
-                justification = generate_justification(sport, home_team, away_team, f"Win {away_team}", our_prob, stats_summary)
                 
                 results.append({
                     'match_name': match_name,
@@ -308,101 +611,537 @@ def analyze_game(sport, game, config):
                     'main_prediction': f"Win {away_team}",
                     'secondary_prediction': f"Value: +{value:.1%}",
                     'confidence_level': confidence,
-                    'ai_justification': justification,
+                    'justification_codes': justifications.encode(reasons, our_prob),
                     'odds_value': away_odd,
-                    'status': 'pending'
+                    'status': 'pending',
+                    'fixture_id': fixture_id,
+                    'model_probability': our_prob,
+                    'market': 'Match Winner',
+                    'selection': 'Away'
                 })
         
+        # Goal markets, all priced from the same cached score matrix
+        if matrix is not None:
+            for bet_name in GOAL_MARKETS:
+                for selection, odd in markets.get(bet_name, {}).items():
+                    our_prob = goal_model.selection_probability(matrix, bet_name, selection, odd)
+                    if our_prob is None:
+                        continue
+                    value = our_prob - 1 / odd
+                    
+                    if value > VALUE_THRESHOLD:
+                        prediction = goal_model.selection_label(bet_name, selection, home_team, away_team)
+                        reasons = {'expected_goals': rates[:2]}
+                        
+                        results.append({
+                            'match_name': match_name,
+                            'match_time': match_time,
+                            'league': league,
+                            'sport': sport,
+                            'main_prediction': prediction,
+                            'secondary_prediction': f"Value: +{value:.1%}",
+                            'confidence_level': int(our_prob * 100),
+                            'justification_codes': justifications.encode(reasons, our_prob),
+                            'odds_value': odd,
+                            'status': 'pending',
+                            'fixture_id': fixture_id,
+                            'model_probability': our_prob,
+                            'market': bet_name,
+                            'selection': selection
+                        })
+        
     except Exception as e:
         print(f"Error analyzing game: {e}")
+        METRICS.fixture_skipped(sport, 'error')
         return []
     
-    return results
+    METRICS.add_time('analysis', time.perf_counter() - analysis_start)
+    METRICS.fixture_processed(sport)
+    return tag_odds_signals(sport, results)
+
+def save_to_db(results, strict=False):
+    """Saves analysis results to Postgres; returns False if the save failed.
 
-def save_to_db(results):
-    """Saves analysis results to Postgres."""
+    With `strict`, a failed save raises after logging instead.
+    """
     if not results:
-        return
+        return True
 
-    conn = None
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        
-        insert_query = """
-        INSERT INTO bets_analysis 
-        (match_name, match_time, league, sport, main_prediction, secondary_prediction, confidence_level, ai_justification, odds_value, status)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        check_query = "SELECT id FROM bets_analysis WHERE match_name = %s AND main_prediction = %s AND created_at::date = CURRENT_DATE"
-        
-        saved_count = 0
-        for bet in results:
-            cur.execute(check_query, (bet['match_name'], bet['main_prediction']))
-            if cur.fetchone():
-                continue
-
-            cur.execute(insert_query, (
-                bet['match_name'],
-                bet.get('match_time', ''),
-                bet['league'],
-                bet['sport'],
-                bet['main_prediction'],
-                bet['secondary_prediction'],
-                bet['confidence_level'],
-                bet['ai_justification'],
-                bet['odds_value'],
-                bet['status']
-            ))
-            saved_count += 1
-            
-        conn.commit()
-        cur.close()
+        saved_count = db.save_bets(results)
         print(f"Saved {saved_count} new value bets.")
-        
+        return True
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Database error: {error}")
-    finally:
-        if conn is not None:
-            conn.close()
+        if strict:
+            raise
+        return False
+
+def parse_result(sport, game):
+    """Final score row of a finished game for match_results, or None if not finished."""
+    if sport == 'Football':
+        fixture = game['fixture']
+        fixture_id = fixture['id']
+        status = fixture.get('status', {}).get('short')
+        match_date = fixture.get('date')
+        # Markets settle on 90 minutes; 'goals' includes extra time for AET/PEN
+        score = (game.get('score') or {}).get('fulltime') or {}
+        if status == 'FT' and score.get('home') is None:
+            score = game.get('goals') or {}
+        home_score = score.get('home')
+        away_score = score.get('away')
+    else: # Basketball
+        fixture_id = game.get('id')
+        status = (game.get('status') or {}).get('short')
+        match_date = game.get('date')
+        scores = game.get('scores') or {}
+        home_score = (scores.get('home') or {}).get('total')
+        away_score = (scores.get('away') or {}).get('total')
+
+    if status not in FINISHED_STATUSES or home_score is None or away_score is None:
+        return None
+
+    return (
+        sport, fixture_id, game['league'].get('id'), game['league']['name'], match_date,
+        game['teams']['home']['id'], game['teams']['home']['name'],
+        game['teams']['away']['id'], game['teams']['away']['name'],
+        home_score, away_score
+    )
+
+def save_results(rows):
+    """Stores finished games in match_results, ignoring ones already stored."""
+    if not rows:
+        return
+
+    try:
+        db.save_results(rows)
+        print(f"Stored {len(rows)} finished games.")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Database error: {error}")
+
+def backfill_results(days, sports_config=SPORTS_CONFIG):
+    """Fetches the last `days` days of games, stores the finished ones and rates them."""
+    today = datetime.datetime.now()
+    dates = [(today - datetime.timedelta(days=n)).strftime("%Y-%m-%d") for n in range(1, days + 1)]
+
+    rows = []
+    for sport, config in sports_config.items():
+        for game in fetch_sport_games(sport, config, dates):
+            row = parse_result(sport, game)
+            if row:
+                rows.append(row)
+    save_results(rows)
+    elo.update()
+    settle_bets()
+    if analytics_store.enabled():
+        settled = analytics_store.append_results(rows)
+        print(f"Analytics store: {len(rows)} results, {settled} bets settled.")
+
+def settle_bets():
+    """Settles stored bets against stored results, updating the history rollups."""
+    try:
+        settled = rollups.settle_bets()
+        print(f"Settled {settled} bets.")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Settlement error: {error}")
+
+def load_model_state():
+    """Loads calibrated parameters and every team's stored record for this run."""
+    try:
+        with db.connection() as conn:
+            MODEL_PARAMS.update(calibration.load_model_params(conn))
+            RATINGS.load(conn)
+            GOAL_RATINGS.load(conn)
+            PROFILES.load(conn)
+
+            cur = conn.cursor()
+            TEAM_RECORDS.update(db.team_records(cur, calibration.MIN_PRIOR_GAMES))
+            cur.close()
+        print(f"Loaded {len(MODEL_PARAMS)} parameter sets, {len(TEAM_RECORDS)} team records, "
+              f"{len(RATINGS.ratings)} team ratings, {len(GOAL_RATINGS.teams)} goal ratings "
+              f"and {len(PROFILES.teams)} basketball profiles.")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Could not load model state, using defaults: {error}")
+
+def fetch_sport_games(sport, config, dates):
+    """Fetches the games of several days for one sport concurrently, keeping date order."""
+    with ThreadPoolExecutor(max_workers=len(dates)) as pool:
+        games_per_date = list(pool.map(lambda d: games_for_date(sport, config, d), dates))
+
+    games = []
+    for day_games in games_per_date:
+        games.extend(day_games)
+    return games
+
+def games_for_date(sport, config, target_date):
+    """get_games_for_date, reusing the list checkpointed by an interrupted run."""
+    saved = CHECKPOINT.get('games', sport, target_date)
+    if saved is not None:
+        print(f"[{sport}] Resuming with {len(saved)} checkpointed games for {target_date}.")
+        return saved
+
+    games = get_games_for_date(sport, config, target_date)
+    if games:
+        CHECKPOINT.put('games', sport, target_date, games)
+    return games
+
+def run_sport(sport, config, dates, budget=MAX_GAMES_PER_SPORT):
+    """Fetches and analyzes the games of one sport within its own quota budget."""
+    all_possible_games = fetch_sport_games(sport, config, dates)
+
+    if len(all_possible_games) > budget:
+        METRICS.fixture_skipped(sport, 'budget', len(all_possible_games) - budget)
+
+    bets = analyze_games(sport, config, all_possible_games[:budget])
+    print(f"[{sport}] {len(bets)} value bets found.")
+    return bets
+
+def analyze_games(sport, config, games):
+    """Value bets of a list of games of one sport; checkpointed fixtures are not analyzed again."""
+    bets = []
+    pending = []
+    for game in games:
+        saved = CHECKPOINT.get('bets', sport, game_details(sport, game)[0])
+        if saved is None:
+            pending.append(game)
+        else:
+            bets.extend(saved)
+    if len(pending) < len(games):
+        METRICS.increment('checkpoint_fixtures_resumed', len(games) - len(pending))
+        print(f"[{sport}] {len(games) - len(pending)} fixtures resumed from the checkpoint.")
+
+    index_external_odds(sport, pending)
+    if sport == 'Basketball':
+        # The whole slate is simulated in one batch
+        slate_bets = analyze_basketball_slate(pending, config)
+        checkpoint_bets(sport, pending, slate_bets)
+        return bets + slate_bets
+
+    for game in pending:
+        game_bets = analyze_game(sport, game, config)
+        checkpoint_bets(sport, [game], game_bets)
+        bets.extend(game_bets)
+    return bets
+
+def checkpoint_bets(sport, games, bets):
+    """Checkpoints each game's bets (possibly none); games whose odds failed stay open."""
+    if not CHECKPOINT.active():
+        return
+    by_fixture = {}
+    for bet in bets:
+        by_fixture.setdefault(bet['fixture_id'], []).append(bet)
+    for game in games:
+        fixture_id = game_details(sport, game)[0]
+        if fixture_id and (sport, fixture_id) not in ODDS_FAILED:
+            CHECKPOINT.put('bets', sport, fixture_id, by_fixture.get(fixture_id, []))
+
+def collect_bets(sports_config=SPORTS_CONFIG):
+    """Runs every sport in its own worker and merges their bets in config order."""
+    # Get games for today and tomorrow to have enough data (avoid late night empty list)
+    now = datetime.datetime.now()
+    dates = [
+        now.strftime("%Y-%m-%d"),
+        (now + datetime.timedelta(days=1)).strftime("%Y-%m-%d"),
+    ]
+
+    with ThreadPoolExecutor(max_workers=len(sports_config)) as pool:
+        futures = [
+            pool.submit(run_sport, sport, config, dates)
+            for sport, config in sports_config.items()
+        ]
+        all_bets = []
+        for future in futures:
+            all_bets.extend(future.result())
+
+    return all_bets
+
+def queue_run_id(run_id=None):
+    """Run id shared by the enqueuer and the workers of one sharded run, and by a run and its resumptions."""
+    return run_id or os.environ.get("QUEUE_RUN_ID") or os.environ.get("GITHUB_RUN_ID") or datetime.date.today().isoformat()
+
+def enqueue_run(run_id, sports_config=SPORTS_CONFIG, resume=False):
+    """Queues every fixture of today and tomorrow, without the per-run game budget.
+
+    Resuming also gives the run's failed items their attempts back and lets it be
+    finalized again.
+    """
+    now = datetime.datetime.now()
+    dates = [now.strftime("%Y-%m-%d"), (now + datetime.timedelta(days=1)).strftime("%Y-%m-%d")]
+
+    with ThreadPoolExecutor(max_workers=len(sports_config)) as pool:
+        games_per_sport = list(pool.map(lambda sport: fetch_sport_games(sport, sports_config[sport], dates), sports_config))
+
+    items = []
+    for sport, games in zip(sports_config, games_per_sport):
+        items.extend(work_queue.fixture_items(sport, games))
+
+    # CLEANUP: workers only add today's bets, so old ones go before they start
+    settle_bets()
+    removed = db.delete_old_bets()
+    print(f"Cleanup: Removed {removed} old bets from the database.")
+
+    queued = work_queue.enqueue(run_id, items)
+    print(f"Run {run_id}: queued {queued} new work items ({len(items)} in total).")
+    if resume:
+        reopened = work_queue.reopen(run_id)
+        print(f"Run {run_id}: {reopened} failed work items queued again.")
+    return queued
+
+def run_worker(run_id, sports_config=SPORTS_CONFIG):
+    """Claims and processes work items of a run until none is left; the last worker finalizes."""
+    worker = work_queue.worker_name()
+    processed = 0
+    print(f"Worker {worker} joining run {run_id}.")
+
+    while True:
+        item = work_queue.claim(run_id, worker)
+        if item is None:
+            # Nothing claimable: done, unless another worker's lease may still expire
+            if work_queue.outstanding(run_id) == 0:
+                break
+            time.sleep(QUEUE_POLL_SECONDS)
+            continue
+
+        item_id, sport, games = item
+        try:
+            with work_queue.keep_leased(item_id, worker):
+                bets = analyze_games(sport, sports_config[sport], games)
+                # An item is only done once its bets are stored; a failed save goes back to the queue
+                save_to_db(bets, strict=True)
+            # Like checkpoint_bets, fixtures whose odds request failed stay open for a retry
+            fixture_ids = [game_details(sport, game)[0] for game in games]
+            no_odds = [fixture_id for fixture_id in fixture_ids if (sport, fixture_id) in ODDS_FAILED]
+            if no_odds:
+                raise RuntimeError(f"odds request failed for fixtures {no_odds}")
+            if not work_queue.complete(item_id, worker):
+                print(f"Worker {worker}: lease on item {item_id} expired, another worker took it over.")
+            processed += 1
+            METRICS.increment('queue_items_processed')
+            METRICS.increment('value_bets', len(bets))
+        except Exception as e:
+            print(f"Worker {worker}: item {item_id} failed: {e}")
+            work_queue.fail(item_id, worker, e)
+            METRICS.increment('queue_items_failed')
+
+    print(f"Worker {worker} processed {processed} items; run progress: {work_queue.progress(run_id)}")
+    if work_queue.claim_finalize(run_id):
+        finalize_run(run_id)
+
+def finalize_run(run_id):
+    """Stakes the day's bets as one portfolio once every shard is in, and writes the snapshot."""
+    with METRICS.stage('staking'):
+        bets = db.todays_bets()
+        stakes = staking.stake_bets(bets)
+        portfolio = staking.simulate_bankroll(bets, stakes)
+        if bets:
+            db.update_stakes(bets)
+    if portfolio:
+        METRICS.set_value('portfolio', portfolio)
+        METRICS.set_value('risk_of_ruin', portfolio['risk_of_ruin'])
+        print(f"Portfolio: {portfolio['stake_per_round']:.1%} staked, "
+              f"max drawdown p95 {portfolio['max_drawdown_p95']:.1%}, risk of ruin {portfolio['risk_of_ruin']:.2%}")
+
+    with METRICS.stage('snapshot'):
+        snapshot_path = snapshot.write_snapshot(bets, run_id)
+    if snapshot_path:
+        print(f"Snapshot written to {snapshot_path}.")
+    print(f"Run {run_id} finalized with {len(bets)} bets today.")
+
+def start_checkpoint(run_id, resume):
+    """Starts checkpointing the run; without a usable database the run goes on without it."""
+    try:
+        loaded = CHECKPOINT.start(run_id, resume)
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Checkpoints disabled: {error}")
+        return
+    if resume:
+        print(f"Run {run_id}: resuming from {loaded} checkpoints.")
+
+def run_daemon(window_hours, quota_per_hour, duration=None):
+    """Watches the fixtures kicking off soon and writes value bets as soon as they appear."""
+    live_bets = []
+    # Polls publish from several threads; each stakes against what is stored when it saves
+    publish_lock = threading.Lock()
+
+    def publish(bets):
+        with publish_lock:
+            # The daily exposure cap counts every stored stake of today, this daemon's
+            # and earlier runs', so failed or duplicate saves never use up the budget
+            exposure = sum(bet['stake_fraction'] or 0 for bet in db.todays_bets())
+            staking.stake_bets(bets, max_exposure=max(0.0, staking.MAX_DAILY_EXPOSURE - exposure))
+
+            for bet in bets:
+                signals = ", ".join(f"{s['kind']} {s['bookmaker']} {s['size']:+.1%}" for s in bet.get('odds_signals', []))
+                print(f"[live] {bet['match_name']}: {bet['main_prediction']} @ {bet['odds_value']} "
+                      f"(stake {bet['stake_fraction']:.2%}){' [' + signals + ']' if signals else ''}")
+            if not save_to_db(bets):
+                return False
+        # The snapshot mirrors the DB, so it only gets bets that were stored
+        snapshot.write_snapshot(bets, METRICS.run_id)
+        live_bets.extend(bets)
+        return True
+
+    def flush():
+        if not analytics_store.enabled():
+            return
+        bets, odds = live_bets[:], ODDS_LOG[:]
+        del live_bets[:len(bets)]
+        del ODDS_LOG[:len(odds)]
+        try:
+            analytics_store.append_run(METRICS.run_id, bets, odds)
+        except Exception as e:
+            print(f"Analytics store error: {e}")
+
+    def fetch_games(sport, config, dates):
+        games = fetch_sport_games(sport, config, dates)
+        index_external_odds(sport, games)
+        return games
+
+    monitor = live.LiveMonitor(
+        SPORTS_CONFIG, fetch_games, get_real_odds, analyze_game, publish, flush, has_odds_signals,
+        window_hours=window_hours, quota_per_hour=quota_per_hour, metrics=METRICS,
+    )
+    print(f"[live] Watching kickoffs in the next {window_hours}h with {quota_per_hour} requests/hour per sport.")
+    try:
+        asyncio.run(monitor.run(duration))
+    except KeyboardInterrupt:
+        print("[live] Stopped.")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Daily value-bet analysis engine.")
+    parser.add_argument("--profile", action="store_true",
+                        help="capture cProfile stats and per-function timings next to the run report")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="also sample memory allocations with tracemalloc (implies --profile)")
+    parser.add_argument("--backfill", type=int, metavar="DAYS",
+                        help="store the finished games of the last DAYS days in match_results and exit")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="split the run into fixture work items in the database queue and exit")
+    parser.add_argument("--worker", action="store_true",
+                        help="process queued work items until the run is drained")
+    parser.add_argument("--run-id",
+                        help="run to enqueue, work on or resume (default: $QUEUE_RUN_ID, $GITHUB_RUN_ID or today)")
+    parser.add_argument("--resume", action="store_true",
+                        help="reuse the games, odds and bets checkpointed by an interrupted run with the same id "
+                             "(workers always do); with --enqueue, also queue its failed work items again")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running, polling the odds of games close to kickoff")
+    parser.add_argument("--window-hours", type=float, default=live.DEFAULT_WINDOW_HOURS,
+                        help="daemon: track games kicking off within this many hours")
+    parser.add_argument("--quota-per-hour", type=int, default=live.DEFAULT_QUOTA_PER_HOUR,
+                        help="daemon: API requests allowed per sport and hour")
+    parser.add_argument("--duration", type=float, metavar="SECONDS",
+                        help="daemon: stop after this many seconds (default: run until interrupted)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
 
-if __name__ == "__main__":
     if not API_KEY or not DATABASE_URL:
         print("Error: Config missing.")
         sys.exit(1)
 
-    all_bets = []
-    
-    for sport, config in SPORTS_CONFIG.items():
-        # Get games for today and tomorrow to have enough data (avoid late night empty list)
-        today_str = datetime.datetime.now().strftime("%Y-%m-%d")
-        tomorrow_str = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        games_today = get_games_for_date(sport, config, today_str)
-        games_tomorrow = get_games_for_date(sport, config, tomorrow_str)
-        
-        all_possible_games = games_today + games_tomorrow
-        
-        # 25 games per sport as requested (50 total)
-        for game in all_possible_games[:25]:
-            bets = analyze_game(sport, game, config)
-            all_bets.extend(bets)
-    
-    if all_bets:
-        # CLEANUP: Delete previous days' bets to keep only today's fresh data
+    if args.backfill:
+        backfill_results(args.backfill)
+        return
+
+    db.add_timing_hook(lambda label, seconds: METRICS.add_time(f"db:{label}", seconds))
+    run_id = queue_run_id(args.run_id)
+    if not args.daemon:
+        # Workers share the run's checkpoints, so they never start it afresh
+        start_checkpoint(run_id, args.resume or args.worker)
+
+    if args.enqueue:
         try:
-            conn = psycopg2.connect(DATABASE_URL)
-            cur = conn.cursor()
-            cur.execute("DELETE FROM bets_analysis WHERE created_at::date < CURRENT_DATE")
-            conn.commit()
-            print("Cleanup: Removed old bets from the database.")
-            cur.close()
-            conn.close()
-        except Exception as e:
-            print(f"Cleanup error: {e}")
+            enqueue_run(run_id, resume=args.resume)
+        finally:
+            db.close_pool()
+        return
 
-        print(f"Total value bets found: {len(all_bets)}")
-        save_to_db(all_bets)
-    else:
-        print("No value bets found today.")
+    load_model_state()
+
+    if args.worker:
+        try:
+            with METRICS.stage('worker'):
+                run_worker(run_id)
+        finally:
+            db.close_pool()
+            json_path, prom_path = METRICS.write(REPORT_DIR)
+            print(f"Run report written to {json_path} and {prom_path}.")
+        return
+
+    if args.daemon:
+        try:
+            run_daemon(args.window_hours, args.quota_per_hour, args.duration)
+        finally:
+            db.close_pool()
+            json_path, prom_path = METRICS.write(REPORT_DIR)
+            print(f"Run report written to {json_path} and {prom_path}.")
+        return
+
+    profiler = None
+    if args.profile or args.profile_memory:
+        profiler = RunProfiler(METRICS.run_id, REPORT_DIR, memory=args.profile_memory)
+        profiler.instrument(globals(), PROFILED_FUNCTIONS)
+        profiler.start()
+
+    try:
+        # Sports and dates are fetched concurrently; writes happen once, below
+        with METRICS.stage('collect'):
+            all_bets = collect_bets()
+        METRICS.set_value('value_bets', len(all_bets))
+
+        # Fractional-Kelly stakes and the risk profile of the day's portfolio
+        with METRICS.stage('staking'):
+            stakes = staking.stake_bets(all_bets)
+            portfolio = staking.simulate_bankroll(all_bets, stakes)
+        if portfolio:
+            METRICS.set_value('portfolio', portfolio)
+            METRICS.set_value('risk_of_ruin', portfolio['risk_of_ruin'])
+            print(f"Portfolio: {portfolio['stake_per_round']:.1%} staked, "
+                  f"max drawdown p95 {portfolio['max_drawdown_p95']:.1%}, risk of ruin {portfolio['risk_of_ruin']:.2%}")
+        METRICS.set_value('score_matrix_cache_hits', goal_model.cache_info().hits)
+        METRICS.set_value('score_matrix_cache_misses', goal_model.cache_info().misses)
+
+        if all_bets:
+            with METRICS.stage('db_write'):
+                # CLEANUP: Delete previous days' bets to keep only today's fresh data,
+                # settling first so none leaves before it is counted in the history
+                settle_bets()
+                try:
+                    removed = db.delete_old_bets()
+                    print(f"Cleanup: Removed {removed} old bets from the database.")
+                except Exception as e:
+                    print(f"Cleanup error: {e}")
+
+                print(f"Total value bets found: {len(all_bets)}")
+                saved = save_to_db(all_bets)
+
+            # Columnar copy of the day's bets for the dashboard, only if it matches the DB
+            if saved:
+                with METRICS.stage('snapshot'):
+                    snapshot_path = snapshot.write_snapshot(all_bets, METRICS.run_id)
+                if snapshot_path:
+                    print(f"Snapshot written to {snapshot_path}.")
+            else:
+                print("Snapshot skipped: the bets were not saved.")
+        else:
+            print("No value bets found today.")
+
+        if analytics_store.enabled():
+            with METRICS.stage('analytics'):
+                try:
+                    count = analytics_store.append_run(METRICS.run_id, all_bets, ODDS_LOG)
+                    print(f"Analytics store: {count} bets and {len(ODDS_LOG)} odds appended.")
+                except Exception as e:
+                    print(f"Analytics store error: {e}")
+    finally:
+        db.close_pool()
+        if profiler is not None:
+            for path in profiler.stop():
+                print(f"Profile written to {path}.")
+        json_path, prom_path = METRICS.write(REPORT_DIR)
+        print(f"Run report written to {json_path} and {prom_path}.")
+
+if __name__ == "__main__":
+    main()
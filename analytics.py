@@ -0,0 +1,92 @@
+import argparse
+
+import analytics_store
+
+# Each pick counted once (first run that found it), joined with its settlement
+SETTLED_BETS = """
+    WITH placed AS (
+        SELECT * FROM bets
+        WHERE market IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY sport, fixture_id, market, selection ORDER BY created_at
+        ) = 1
+    )
+    SELECT p.*, s.unit_return, s.unit_return > 1 AS won
+    FROM placed p
+    JOIN settlements s
+      ON s.run_id = p.run_id AND s.sport = p.sport AND s.fixture_id = p.fixture_id
+     AND s.market = p.market AND s.selection = p.selection
+    WHERE (? IS NULL OR p.created_at >= CAST(? AS DATE))
+      AND (? IS NULL OR p.created_at < CAST(? AS DATE) + INTERVAL 1 DAY)
+      AND (? IS NULL OR p.sport = ?)
+"""
+
+def _settled(start=None, end=None, sport=None):
+    return SETTLED_BETS, [start, start, end, end, sport, sport]
+
+def roi_by_league(con, start=None, end=None, sport=None):
+    """Bets, hit rate, flat ROI and Kelly-staked ROI per sport and league."""
+    query, params = _settled(start, end, sport)
+    return con.execute(f"""
+        SELECT sport, league,
+               COUNT(*) AS bets,
+               AVG(won::INTEGER) AS hit_rate,
+               AVG(unit_return - 1) AS roi,
+               SUM(stake_fraction * (unit_return - 1)) / NULLIF(SUM(stake_fraction), 0) AS staked_roi,
+               AVG(edge) AS avg_edge
+        FROM ({query})
+        GROUP BY sport, league
+        ORDER BY bets DESC
+    """, params).df()
+
+def calibration_curve(con, bins=10, start=None, end=None, sport=None):
+    """Predicted vs observed win rate per probability bin (binary markets only)."""
+    query, params = _settled(start, end, sport)
+    return con.execute(f"""
+        SELECT LEAST(FLOOR(model_probability * ?), ? - 1) / ? AS bin_start,
+               COUNT(*) AS bets,
+               AVG(model_probability) AS predicted,
+               AVG(won::INTEGER) AS observed
+        FROM ({query})
+        WHERE model_probability IS NOT NULL AND unit_return IN (0, odds_value)
+        GROUP BY bin_start
+        ORDER BY bin_start
+    """, [bins, bins, bins] + params).df()
+
+def edge_buckets(con, width=0.025, start=None, end=None, sport=None):
+    """ROI by bucket of model edge at bet time."""
+    query, params = _settled(start, end, sport)
+    return con.execute(f"""
+        SELECT FLOOR(edge / ?) * ? AS edge_from,
+               COUNT(*) AS bets,
+               AVG(won::INTEGER) AS hit_rate,
+               AVG(unit_return - 1) AS roi
+        FROM ({query})
+        WHERE edge IS NOT NULL
+        GROUP BY edge_from
+        ORDER BY edge_from
+    """, [width, width] + params).df()
+
+QUERIES = {
+    'roi': roi_by_league,
+    'calibration': calibration_curve,
+    'edges': edge_buckets,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historical aggregations over the analytics store.")
+    parser.add_argument("query", choices=list(QUERIES))
+    parser.add_argument("--db", default=analytics_store.ANALYTICS_DB, help="DuckDB file (default: $ANALYTICS_DB)")
+    parser.add_argument("--start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", help="last day, YYYY-MM-DD")
+    parser.add_argument("--sport", choices=["Football", "Basketball"])
+    args = parser.parse_args()
+
+    if not analytics_store.enabled(args.db):
+        print("Error: analytics store not configured (install duckdb and set ANALYTICS_DB).")
+    else:
+        con = analytics_store.connect(args.db, read_only=True)
+        try:
+            print(QUERIES[args.query](con, start=args.start, end=args.end, sport=args.sport).to_string(index=False))
+        finally:
+            con.close()
@@ -0,0 +1,170 @@
+import os
+import datetime
+
+try:
+    import duckdb
+except ImportError:  # The analytics store is optional
+    duckdb = None
+
+from settlement import unit_return
+
+# Path of the DuckDB file; the store is disabled when unset
+ANALYTICS_DB = os.environ.get("ANALYTICS_DB")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS bets (
+        run_id VARCHAR,
+        created_at TIMESTAMP,
+        sport VARCHAR,
+        fixture_id BIGINT,
+        league VARCHAR,
+        match_name VARCHAR,
+        match_time VARCHAR,
+        market VARCHAR,
+        selection VARCHAR,
+        main_prediction VARCHAR,
+        model_probability DOUBLE,
+        odds_value DOUBLE,
+        edge DOUBLE,
+        confidence_level INTEGER,
+        stake_fraction DOUBLE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS odds (
+        run_id VARCHAR,
+        fetched_at TIMESTAMP,
+        sport VARCHAR,
+        fixture_id BIGINT,
+        bookmaker VARCHAR,
+        market VARCHAR,
+        selection VARCHAR,
+        odd DOUBLE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS results (
+        sport VARCHAR,
+        fixture_id BIGINT,
+        league_id INTEGER,
+        league VARCHAR,
+        match_date TIMESTAMP,
+        home_team VARCHAR,
+        away_team VARCHAR,
+        home_score INTEGER,
+        away_score INTEGER,
+        PRIMARY KEY (sport, fixture_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS settlements (
+        run_id VARCHAR,
+        sport VARCHAR,
+        fixture_id BIGINT,
+        market VARCHAR,
+        selection VARCHAR,
+        unit_return DOUBLE,
+        settled_at TIMESTAMP
+    )
+    """,
+]
+
+def enabled(path=None):
+    return duckdb is not None and bool(path or ANALYTICS_DB)
+
+def connect(path=None, read_only=False):
+    """Opens the store and makes sure its tables exist."""
+    con = duckdb.connect(path or ANALYTICS_DB, read_only=read_only)
+    if not read_only:
+        for statement in SCHEMA:
+            con.execute(statement)
+    return con
+
+def odds_rows(sport, fixture_id, data, run_id, fetched_at=None):
+    """Flattens an API-Sports odds response into rows of the odds table."""
+    fetched_at = fetched_at or datetime.datetime.now()
+    rows = []
+    for bookmaker_data in data:
+        for bm in bookmaker_data.get('bookmakers', []):
+            for bet in bm.get('bets', []):
+                for v in bet.get('values', []):
+                    try:
+                        odd = float(v['odd'])
+                    except (TypeError, ValueError):
+                        continue
+                    rows.append((run_id, fetched_at, sport, fixture_id, bm['name'], bet['name'], str(v['value']), odd))
+    return rows
+
+def append_run(run_id, bets, odds, path=None):
+    """Appends a run's bets and fetched odds; returns the number of bets written."""
+    if not enabled(path):
+        return 0
+
+    created_at = datetime.datetime.now()
+    bet_rows = [
+        (
+            run_id, created_at, bet['sport'], bet.get('fixture_id'), bet['league'], bet['match_name'],
+            bet.get('match_time'), bet.get('market'), bet.get('selection'), bet['main_prediction'],
+            bet.get('model_probability'), bet['odds_value'],
+            bet['model_probability'] - 1 / bet['odds_value'] if bet.get('model_probability') is not None else None,
+            bet['confidence_level'], bet.get('stake_fraction'),
+        )
+        for bet in bets
+    ]
+
+    con = connect(path)
+    try:
+        con.execute("BEGIN")
+        if bet_rows:
+            con.executemany("INSERT INTO bets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", bet_rows)
+        if odds:
+            con.executemany("INSERT INTO odds VALUES (?, ?, ?, ?, ?, ?, ?, ?)", odds)
+        con.execute("COMMIT")
+    finally:
+        con.close()
+    return len(bet_rows)
+
+def append_results(rows, path=None):
+    """Upserts finished games (match_results rows) and settles the bets they decide."""
+    if not enabled(path) or not rows:
+        return 0
+
+    con = connect(path)
+    try:
+        con.execute("BEGIN")
+        con.executemany("""
+            INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (sport, fixture_id, league_id, league, match_date, home_team, away_team, home_score, away_score)
+            for (sport, fixture_id, league_id, league, match_date, _, home_team, _, away_team, home_score, away_score) in rows
+        ])
+        settled = settle_pending(con)
+        con.execute("COMMIT")
+    finally:
+        con.close()
+    return settled
+
+def settle_pending(con):
+    """Settles every stored bet whose result has arrived and which is not settled yet."""
+    pending = con.execute("""
+        SELECT b.run_id, b.sport, b.fixture_id, b.market, b.selection, b.odds_value, r.home_score, r.away_score
+        FROM bets b
+        JOIN results r ON r.sport = b.sport AND r.fixture_id = b.fixture_id
+        WHERE b.market IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM settlements s
+              WHERE s.run_id = b.run_id AND s.sport = b.sport AND s.fixture_id = b.fixture_id
+                AND s.market = b.market AND s.selection = b.selection
+          )
+    """).fetchall()
+
+    settled_at = datetime.datetime.now()
+    rows = []
+    for run_id, sport, fixture_id, market, selection, odd, home_score, away_score in pending:
+        value = unit_return(market, selection, odd, home_score, away_score)
+        if value is not None:
+            rows.append((run_id, sport, fixture_id, market, selection, value, settled_at))
+    if rows:
+        con.executemany("INSERT INTO settlements VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
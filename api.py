@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import base64
+import select
+import hashlib
+import datetime
+import threading
+import collections
+from decimal import Decimal
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import psycopg2
+import psycopg2.pool
+import db
+import justifications
+
+DATABASE_URL = db.DATABASE_URL
+API_HOST = os.environ.get("API_HOST", "0.0.0.0")
+API_PORT = int(os.environ.get("API_PORT", "8080"))
+# Seconds a cached response stays valid when no invalidation arrives
+CACHE_TTL = float(os.environ.get("API_CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = 512
+
+# Channel the engine notifies after writing a run's bets
+NOTIFY_CHANNEL = "bets_updated"
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Edge of a pick over the bookmaker's implied probability
+EDGE_SQL = "(model_probability - 1.0 / NULLIF(odds_value, 0))"
+
+BET_COLUMNS = [
+    'id', 'match_name', 'match_time', 'league', 'sport', 'main_prediction', 'secondary_prediction',
+    'confidence_level', 'odds_value', 'model_probability', 'edge', 'stake_fraction', 'ai_justification',
+    'justification_codes', 'status', 'created_at',
+]
+
+class BadRequest(Exception):
+    pass
+
+# --- Response cache ---
+
+class ResponseCache:
+    """Serialized responses keyed on the normalized query, with a TTL and explicit invalidation.
+
+    Invalidation bumps a generation counter, so a response computed from a query that
+    started before the invalidation is never stored.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None, self.generation
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], self.generation
+
+    def put(self, key, value, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses, 'generation': self.generation}
+
+CACHE = ResponseCache()
+
+def listen_for_runs(cache, database_url=DATABASE_URL, retry_seconds=5):
+    """Clears the cache whenever the engine notifies NOTIFY_CHANNEL; reconnects on errors."""
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(database_url)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            cur = conn.cursor()
+            cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # Anything written while we were disconnected is unknown, so start clean
+            cache.invalidate()
+            print(f"Listening on '{NOTIFY_CHANNEL}' for new runs.")
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    cache.invalidate()
+                    print("New run written: response cache cleared.")
+        except Exception as e:
+            print(f"Listener error: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+        time.sleep(retry_seconds)
+
+# --- Queries ---
+
+def _parse_date(value, name):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a date in YYYY-MM-DD format")
+
+def _parse_number(value, name, cast):
+    try:
+        return cast(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a number")
+
+def encode_cursor(row):
+    raw = json.dumps([row['confidence_level'], row['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        confidence, bet_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(confidence), int(bet_id)
+    except (ValueError, TypeError):
+        raise BadRequest("invalid 'cursor'")
+
+def parse_filters(params):
+    """Validates the query string into a normalized filter dict (also the cache key)."""
+    def one(name):
+        values = params.get(name)
+        return values[-1] if values else None
+
+    filters = {}
+    if one('sport'):
+        filters['sport'] = one('sport')
+    if one('league'):
+        filters['league'] = one('league')
+    if one('min_confidence'):
+        filters['min_confidence'] = _parse_number(one('min_confidence'), 'min_confidence', int)
+    if one('min_edge'):
+        filters['min_edge'] = _parse_number(one('min_edge'), 'min_edge', float)
+
+    if one('date'):
+        filters['start'] = filters['end'] = _parse_date(one('date'), 'date').isoformat()
+    else:
+        if one('start'):
+            filters['start'] = _parse_date(one('start'), 'start').isoformat()
+        if one('end'):
+            filters['end'] = _parse_date(one('end'), 'end').isoformat()
+    if 'start' not in filters and 'end' not in filters:
+        filters['start'] = filters['end'] = datetime.date.today().isoformat()
+
+    language = one('lang') or justifications.DEFAULT_LANGUAGE
+    if language not in justifications.TEMPLATES:
+        raise BadRequest(f"'lang' must be one of {', '.join(justifications.TEMPLATES)}")
+    filters['lang'] = language
+
+    limit = _parse_number(one('limit'), 'limit', int) if one('limit') else DEFAULT_LIMIT
+    filters['limit'] = max(1, min(limit, MAX_LIMIT))
+    if one('cursor'):
+        filters['cursor'] = decode_cursor(one('cursor'))
+    return filters
+
+def build_query(filters):
+    """SQL for one page, newest-confidence first, with a (confidence_level, id) keyset."""
+    where, args = [], []
+    if 'sport' in filters:
+        where.append("sport = %s")
+        args.append(filters['sport'])
+    if 'league' in filters:
+        where.append("league = %s")
+        args.append(filters['league'])
+    if 'min_confidence' in filters:
+        where.append("confidence_level >= %s")
+        args.append(filters['min_confidence'])
+    if 'min_edge' in filters:
+        where.append(f"{EDGE_SQL} >= %s")
+        args.append(filters['min_edge'])
+    if 'start' in filters:
+        where.append("created_at >= %s::date")
+        args.append(filters['start'])
+    if 'end' in filters:
+        where.append("created_at < %s::date + 1")
+        args.append(filters['end'])
+    if 'cursor' in filters:
+        where.append("(confidence_level, id) < (%s, %s)")
+        args.extend(filters['cursor'])
+
+    columns = ", ".join(EDGE_SQL + " AS edge" if col == 'edge' else col for col in BET_COLUMNS)
+    query = f"SELECT {columns} FROM bets_analysis"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    # One extra row tells whether there is a next page
+    query += " ORDER BY confidence_level DESC, id DESC LIMIT %s"
+    args.append(filters['limit'] + 1)
+    return query, args
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+def fetch_page(filters):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(*build_query(filters))
+        rows = [dict(zip(BET_COLUMNS, map(_json_value, row))) for row in cur.fetchall()]
+        cur.close()
+
+    page = justifications.render_rows(rows[:filters['limit']], filters['lang'])
+    next_cursor = encode_cursor(page[-1]) if len(rows) > filters['limit'] else None
+    return {'bets': page, 'count': len(page), 'next_cursor': next_cursor}
+
+def cached_response(filters):
+    """(body, etag) for a page, served from the cache when possible."""
+    key = json.dumps(filters, sort_keys=True)
+    cached, generation = CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    body = json.dumps(fetch_page(filters), ensure_ascii=False).encode('utf-8')
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    CACHE.put(key, (body, etag), generation)
+    return body, etag
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or ('W/' + etag) in candidates
+
+# --- HTTP ---
+
+class BetsHandler(BaseHTTPRequestHandler):
+    server_version = "BetsAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            return self.send_json(200, {'status': 'ok', 'cache': CACHE.stats()})
+        if url.path != '/bets':
+            return self.send_json(404, {'error': 'not found'})
+
+        try:
+            filters = parse_filters(parse_qs(url.query))
+            body, etag = cached_response(filters)
+        except BadRequest as e:
+            return self.send_json(400, {'error': str(e)})
+        except psycopg2.pool.PoolError as e:
+            # Every pooled connection stayed busy: tell the client to come back
+            print(f"Busy serving {self.path}: {e}")
+            return self.send_json(503, {'error': 'busy, retry shortly'}, {'Retry-After': '1'})
+        except Exception as e:
+            print(f"Error serving {self.path}: {e}")
+            return self.send_json(500, {'error': 'internal error'})
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f"max-age={int(CACHE_TTL)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(host=API_HOST, port=API_PORT):
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL not found.")
+        return
+
+    threading.Thread(target=listen_for_runs, args=(CACHE,), daemon=True).start()
+    server = ThreadingHTTPServer((host, port), BetsHandler)
+    print(f"Serving bets API on http://{host}:{port}/bets")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,177 @@
+import numpy as np
+
+import goal_model
+
+# League-average possessions per game (NBA); scoring levels come from the stored results
+LEAGUE_PACE = 99.0
+# Relative efficiency boost of the home side (about 3 points of margin)
+HOME_EDGE = 0.013
+
+# Game-to-game noise: possessions shared by both teams, points per team
+PACE_SD = 4.0
+POINTS_SD = 9.5
+# Possessions of a 5-minute overtime relative to a 48-minute game
+OVERTIME_SHARE = 5 / 48
+
+# Recent games used to build a team profile
+PROFILE_GAMES = 20
+MIN_PROFILE_GAMES = 5
+
+DEFAULT_SIMULATIONS = 100000
+DEFAULT_SEED = 2024
+
+# Margin and total distributions are stored as bincounts over these ranges
+MAX_MARGIN = 100
+MAX_TOTAL = 400
+
+class TeamProfiles:
+    """Pace and offensive/defensive efficiency per team, built from recent stored results."""
+
+    def __init__(self):
+        self.teams = {}  # team_id -> (pace, offence, defence)
+        self.league_efficiency = None
+
+    def load(self, conn, sport='Basketball'):
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT team_id, AVG(points_for), AVG(points_against), COUNT(*)
+            FROM (
+                SELECT team_id, points_for, points_against,
+                       ROW_NUMBER() OVER (PARTITION BY team_id ORDER BY match_date DESC) AS recent
+                FROM (
+                    SELECT home_id AS team_id, home_score AS points_for, away_score AS points_against, match_date
+                    FROM match_results WHERE sport = %s
+                    UNION ALL
+                    SELECT away_id, away_score, home_score, match_date
+                    FROM match_results WHERE sport = %s
+                ) sides
+            ) ranked
+            WHERE recent <= %s
+            GROUP BY team_id
+            HAVING COUNT(*) >= %s
+        """, (sport, sport, PROFILE_GAMES, MIN_PROFILE_GAMES))
+        rows = cur.fetchall()
+        cur.close()
+
+        if not rows:
+            return 0
+        league_points = np.mean([(float(r[1]) + float(r[2])) / 2 for r in rows])
+        self.league_efficiency = 100 * league_points / LEAGUE_PACE
+
+        # Without possession counts, a high-scoring team's excess points are split
+        # evenly (in log terms) between pace and efficiency
+        for team_id, points_for, points_against, _ in rows:
+            points_for, points_against = float(points_for), float(points_against)
+            pace = LEAGUE_PACE * np.sqrt(((points_for + points_against) / 2) / league_points)
+            self.teams[team_id] = (pace, 100 * points_for / pace, 100 * points_against / pace)
+        return len(self.teams)
+
+    def matchup(self, home_id, away_id):
+        """(expected possessions, home efficiency, away efficiency), or None if a team has no profile."""
+        home = self.teams.get(home_id)
+        away = self.teams.get(away_id)
+        if home is None or away is None:
+            return None
+        pace = home[0] * away[0] / LEAGUE_PACE
+        home_eff = home[1] * away[2] / self.league_efficiency * (1 + HOME_EDGE)
+        away_eff = away[1] * home[2] / self.league_efficiency * (1 - HOME_EDGE)
+        return pace, home_eff, away_eff
+
+def simulate_slate(matchups, n_sims=DEFAULT_SIMULATIONS, seed=DEFAULT_SEED):
+    """Simulates final scores of every game of a slate at once.
+
+    `matchups` is a list of (pace, home efficiency, away efficiency). All games are
+    sampled together as (games, n_sims) float32 arrays from one seeded generator, and
+    ties go to overtime until decided. Returns one SlateResult per game.
+    """
+    if not matchups:
+        return []
+
+    rng = np.random.default_rng(seed)
+    inputs = np.asarray(matchups, dtype=np.float32)
+    pace, home_eff, away_eff = inputs[:, 0:1], inputs[:, 1:2], inputs[:, 2:3]
+    shape = (len(matchups), n_sims)
+
+    possessions = pace + PACE_SD * rng.standard_normal(shape, dtype=np.float32)
+    home = np.rint(possessions * home_eff / 100 + POINTS_SD * rng.standard_normal(shape, dtype=np.float32))
+    away = np.rint(possessions * away_eff / 100 + POINTS_SD * rng.standard_normal(shape, dtype=np.float32))
+
+    # Overtime: a few possessions each, with noise scaled to the period length
+    tied = home == away
+    while tied.any():
+        rows = np.nonzero(tied)[0]
+        ot_pace = pace[rows, 0] * OVERTIME_SHARE
+        ot_sd = POINTS_SD * np.sqrt(OVERTIME_SHARE)
+        home[tied] += np.rint(ot_pace * home_eff[rows, 0] / 100 + ot_sd * rng.standard_normal(len(rows), dtype=np.float32))
+        away[tied] += np.rint(ot_pace * away_eff[rows, 0] / 100 + ot_sd * rng.standard_normal(len(rows), dtype=np.float32))
+        tied = home == away
+
+    margin = np.clip(home - away, -MAX_MARGIN, MAX_MARGIN).astype(np.int64) + MAX_MARGIN
+    total = np.clip(home + away, 0, MAX_TOTAL).astype(np.int64)
+    return [
+        SlateResult(
+            np.bincount(margin[i], minlength=2 * MAX_MARGIN + 1) / n_sims,
+            np.bincount(total[i], minlength=MAX_TOTAL + 1) / n_sims,
+            float(home[i].mean()),
+            float(away[i].mean()),
+        )
+        for i in range(len(matchups))
+    ]
+
+class SlateResult:
+    """Simulated margin and total distributions of one game."""
+
+    _MARGINS = np.arange(-MAX_MARGIN, MAX_MARGIN + 1)
+    _TOTALS = np.arange(MAX_TOTAL + 1)
+
+    def __init__(self, margin_dist, total_dist, home_points, away_points):
+        self.margin_dist = margin_dist
+        self.total_dist = total_dist
+        self.home_points = home_points
+        self.away_points = away_points
+
+    def moneyline(self):
+        home = float(self.margin_dist[self._MARGINS > 0].sum())
+        return {'home_win': home, 'away_win': 1 - home}
+
+    def selection_probability(self, bet_name, value, odd):
+        """Model probability of a bookmaker selection, or None for unsupported markets.
+
+        Lines that can push are converted to the equivalent binary probability, as in
+        goal_model.selection_probability.
+        """
+        try:
+            if bet_name in ('Home/Away', 'Match Winner'):
+                probs = self.moneyline()
+                return {'Home': probs['home_win'], 'Away': probs['away_win']}.get(value)
+
+            side, line = value.split()
+            line = float(line)
+            if bet_name == 'Asian Handicap':
+                if side not in ('Home', 'Away'):
+                    return None
+                values = self._MARGINS if side == 'Home' else -self._MARGINS
+                ev = goal_model.expected_return(self.margin_dist, values, line, odd)
+            elif bet_name == 'Over/Under':
+                if side == 'Over':
+                    ev = goal_model.expected_return(self.total_dist, self._TOTALS, -line, odd)
+                elif side == 'Under':
+                    ev = goal_model.expected_return(self.total_dist, -self._TOTALS, line, odd)
+                else:
+                    return None
+            else:
+                return None
+            return (ev + 1) / odd
+        except ValueError:
+            return None
+
+def selection_label(bet_name, value, home_team, away_team):
+    """Prediction text stored in bets_analysis for a selection."""
+    if bet_name in ('Home/Away', 'Match Winner'):
+        return f"Win {home_team if value == 'Home' else away_team}"
+    if bet_name == 'Asian Handicap':
+        side, line = value.split()
+        return f"Spread {home_team if side == 'Home' else away_team} {line}"
+    if bet_name == 'Over/Under':
+        return f"{value} Points"
+    return f"{bet_name}: {value}"
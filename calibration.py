@@ -0,0 +1,299 @@
+import os
+import time
+import argparse
+import numpy as np
+import psycopg2
+from psycopg2.extras import Json
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# Constants of calculate_team_strength / calculate_match_probability before calibration
+DEFAULT_PARAMS = {
+    'win_weight': 0.6,
+    'goal_diff_weight': 0.4,
+    'goal_diff_range': 3.0,
+    'home_advantage': 0.1,
+    'logistic_scale': 4.0,
+    'draw_factor': 0.25,
+}
+PARAM_NAMES = list(DEFAULT_PARAMS)
+
+# Parameters are clipped to these lower bounds after every step
+LOWER_BOUNDS = np.array([0.0, 0.0, 0.1, -1.0, 0.1, 1e-4])
+
+# A team needs this many stored results before its record is used as a feature
+MIN_PRIOR_GAMES = 3
+# Leagues with fewer usable matches only get the sport-level fit
+MIN_MATCHES = 200
+
+EPS = 1e-9
+LN10 = np.log(10.0)
+
+# --- Data ---
+
+def load_results(cur, sport):
+    """Loads the stored results of one sport in chronological order as NumPy arrays."""
+    cur.execute("""
+        SELECT league_id, home_id, away_id, home_score, away_score
+        FROM match_results
+        WHERE sport = %s AND home_score IS NOT NULL AND away_score IS NOT NULL
+        ORDER BY match_date, fixture_id
+    """, (sport,))
+    rows = cur.fetchall()
+    if not rows:
+        return None
+
+    data = np.array(rows, dtype=float)
+    return {
+        'league_id': np.nan_to_num(data[:, 0], nan=-1).astype(np.int64),
+        'home_id': data[:, 1].astype(np.int64),
+        'away_id': data[:, 2].astype(np.int64),
+        'home_score': data[:, 3],
+        'away_score': data[:, 4],
+    }
+
+def _prior_sums(team, values):
+    """Per-row sum of `values` over the same team's earlier rows (rows are chronological)."""
+    order = np.lexsort((np.arange(len(team)), team))
+    sorted_team = team[order]
+    sorted_values = values[order]
+
+    exclusive = np.cumsum(sorted_values) - sorted_values
+    is_start = np.ones(len(team), dtype=bool)
+    is_start[1:] = sorted_team[1:] != sorted_team[:-1]
+    start_idx = np.maximum.accumulate(np.where(is_start, np.arange(len(team)), 0))
+    exclusive -= exclusive[start_idx]
+
+    out = np.empty_like(exclusive)
+    out[order] = exclusive
+    return out
+
+def build_features(results):
+    """Pre-match win rate and goal difference per game for both sides, plus the outcome.
+
+    Uses the same record calculate_team_strength sees in the engine: every stored
+    result of the team before the match.
+    """
+    n = len(results['home_id'])
+    team = np.concatenate([results['home_id'], results['away_id']])
+    goals_for = np.concatenate([results['home_score'], results['away_score']])
+    goals_against = np.concatenate([results['away_score'], results['home_score']])
+
+    wins = _prior_sums(team, (goals_for > goals_against).astype(float))
+    games = _prior_sums(team, np.ones(2 * n))
+    goal_diff = _prior_sums(team, goals_for - goals_against)
+
+    safe_games = np.maximum(games, 1)
+    win_rate = wins / safe_games
+    goal_diff = goal_diff / safe_games
+
+    outcome = np.where(results['home_score'] > results['away_score'], 0,
+                       np.where(results['home_score'] == results['away_score'], 1, 2))
+    usable = (games[:n] >= MIN_PRIOR_GAMES) & (games[n:] >= MIN_PRIOR_GAMES)
+
+    return {
+        'home_win_rate': win_rate[:n][usable],
+        'away_win_rate': win_rate[n:][usable],
+        'home_goal_diff': goal_diff[:n][usable],
+        'away_goal_diff': goal_diff[n:][usable],
+        'outcome': outcome[usable],
+        'league_id': results['league_id'][usable],
+    }
+
+def subset(features, mask):
+    return {key: values[mask] for key, values in features.items()}
+
+# --- Model ---
+
+def params_to_array(params):
+    return np.array([params[name] for name in PARAM_NAMES], dtype=float)
+
+def array_to_params(theta):
+    return {name: round(float(value), 6) for name, value in zip(PARAM_NAMES, theta)}
+
+def _goal_term(goal_diff, goal_range):
+    """Normalized goal difference and its derivative with respect to the range."""
+    x = (goal_diff + goal_range) / (2 * goal_range)
+    inside = (x > 0) & (x < 1)
+    dx_drange = np.where(inside, -goal_diff / (2 * goal_range ** 2), 0.0)
+    return np.clip(x, 0, 1), dx_drange
+
+def log_likelihood(theta, features, prior=None, l2=0.0):
+    """Mean log-likelihood of the outcomes and its gradient, vectorized over all matches.
+
+    Mirrors calculate_team_strength and calculate_match_probability exactly, so the
+    fitted values can be dropped into the engine unchanged.
+    """
+    win_w, gd_w, gd_range, home_adv, scale, draw_f = theta
+
+    xh, dxh = _goal_term(features['home_goal_diff'], gd_range)
+    xa, dxa = _goal_term(features['away_goal_diff'], gd_range)
+    home_s = win_w * features['home_win_rate'] + gd_w * xh
+    away_s = win_w * features['away_win_rate'] + gd_w * xa
+
+    d = home_s + home_adv - away_s
+    sigma = 1 / (1 + 10 ** (-d * scale))
+    closeness = 1 - np.abs(d)
+    clamped = closeness <= EPS
+    closeness = np.maximum(closeness, EPS)
+    draw = draw_f * closeness
+    total = 1 + draw
+
+    y = features['outcome']
+    is_home, is_draw, is_away = y == 0, y == 1, y == 2
+    prob = np.where(is_home, sigma, np.where(is_draw, draw, 1 - sigma)) / total
+    ll = np.log(np.maximum(prob, EPS))
+
+    # d(draw)/dd, zero where the draw term is clamped
+    ddraw_dd = np.where(clamped, 0.0, -draw_f * np.sign(d))
+    g_d = (np.where(is_home, scale * LN10 * (1 - sigma), 0.0)
+           + np.where(is_away, -scale * LN10 * sigma, 0.0)
+           + np.where(is_draw, ddraw_dd / draw, 0.0)
+           - ddraw_dd / total)
+    g_scale = np.where(is_home, d * LN10 * (1 - sigma), np.where(is_away, -d * LN10 * sigma, 0.0))
+    g_draw_f = np.where(is_draw, 1 / draw_f, 0.0) - closeness / total
+
+    grad = np.array([
+        np.mean(g_d * (features['home_win_rate'] - features['away_win_rate'])),
+        np.mean(g_d * (xh - xa)),
+        np.mean(g_d * gd_w * (dxh - dxa)),
+        np.mean(g_d),
+        np.mean(g_scale),
+        np.mean(g_draw_f),
+    ])
+    value = np.mean(ll)
+
+    if prior is not None and l2 > 0:
+        value -= l2 * np.sum((theta - prior) ** 2)
+        grad -= 2 * l2 * (theta - prior)
+
+    return value, grad
+
+def fit(features, init=None, prior=None, l2=1e-3, iterations=3000, lr=0.01, tol=1e-7):
+    """Maximum (penalized) likelihood fit with Adam on the vectorized gradient."""
+    theta = params_to_array(init or DEFAULT_PARAMS)
+    prior = theta.copy() if prior is None else params_to_array(prior)
+    m = np.zeros_like(theta)
+    v = np.zeros_like(theta)
+    beta1, beta2 = 0.9, 0.999
+
+    previous = -np.inf
+    for step in range(1, iterations + 1):
+        value, grad = log_likelihood(theta, features, prior, l2)
+        if abs(value - previous) < tol:
+            break
+        previous = value
+
+        # Gradient ascent
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad ** 2
+        m_hat = m / (1 - beta1 ** step)
+        v_hat = v / (1 - beta2 ** step)
+        theta = np.maximum(theta + lr * m_hat / (np.sqrt(v_hat) + 1e-8), LOWER_BOUNDS)
+
+    log_loss = -log_likelihood(theta, features)[0]
+    return array_to_params(theta), log_loss, step
+
+# --- Persistence ---
+
+def save_params(cur, sport, league_id, params, n_matches, log_loss, baseline_log_loss):
+    """Stores a new version of the parameters for (sport, league); returns the version."""
+    cur.execute("""
+        SELECT COALESCE(MAX(version), 0) + 1 FROM model_parameters
+        WHERE model = 'strength' AND sport = %s AND league_id IS NOT DISTINCT FROM %s
+    """, (sport, league_id))
+    version = cur.fetchone()[0]
+    cur.execute("""
+        INSERT INTO model_parameters (sport, league_id, version, params, n_matches, log_loss, baseline_log_loss)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, (sport, league_id, version, Json(params), n_matches, log_loss, baseline_log_loss))
+    return version
+
+def load_model_params(conn):
+    """Latest parameter version per (sport, league_id); league_id None is the sport-level fit."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT DISTINCT ON (sport, league_id) sport, league_id, params
+        FROM model_parameters
+        WHERE model = 'strength'
+        ORDER BY sport, league_id, version DESC
+    """)
+    table = {}
+    for sport, league_id, params in cur.fetchall():
+        table[(sport, league_id)] = {**DEFAULT_PARAMS, **params}
+    cur.close()
+    return table
+
+def params_for(table, sport, league_id=None):
+    """League parameters, else the sport-level fit, else the defaults."""
+    return table.get((sport, league_id)) or table.get((sport, None)) or DEFAULT_PARAMS
+
+# --- Command ---
+
+def calibrate(sports, min_matches=MIN_MATCHES, dry_run=False):
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL not found.")
+        return
+
+    conn = None
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        for sport in sports:
+            results = load_results(cur, sport)
+            if results is None:
+                print(f"[{sport}] No stored results, skipping.")
+                continue
+
+            features = build_features(results)
+            n = len(features['outcome'])
+            if n < min_matches:
+                print(f"[{sport}] Only {n} usable matches (need {min_matches}), skipping.")
+                continue
+
+            start = time.perf_counter()
+            baseline = -log_likelihood(params_to_array(DEFAULT_PARAMS), features)[0]
+            sport_params, log_loss, steps = fit(features)
+            print(f"[{sport}] {n} matches, log loss {baseline:.4f} -> {log_loss:.4f} "
+                  f"({steps} steps, {time.perf_counter() - start:.2f}s)")
+            fits = [(None, sport_params, n, log_loss, baseline)]
+
+            # League fits start from, and are shrunk towards, the sport-level fit
+            leagues, counts = np.unique(features['league_id'], return_counts=True)
+            for league_id, count in zip(leagues, counts):
+                if league_id < 0 or count < min_matches:
+                    continue
+                league_features = subset(features, features['league_id'] == league_id)
+                league_baseline = -log_likelihood(params_to_array(sport_params), league_features)[0]
+                params, league_loss, _ = fit(league_features, init=sport_params, prior=sport_params, l2=1e-2)
+                print(f"[{sport}] league {league_id}: {count} matches, log loss {league_baseline:.4f} -> {league_loss:.4f}")
+                fits.append((int(league_id), params, int(count), league_loss, league_baseline))
+
+            if dry_run:
+                continue
+            for league_id, params, count, loss, base in fits:
+                version = save_params(cur, sport, league_id, params, count, float(loss), float(base))
+                label = league_id if league_id is not None else "all"
+                print(f"[{sport}] Saved parameters v{version} for league {label}.")
+            conn.commit()
+
+        cur.close()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Calibration error: {error}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the model parameters from stored match results.")
+    parser.add_argument("--sport", action="append", choices=["Football", "Basketball"],
+                        help="sport to calibrate (repeatable, default: all)")
+    parser.add_argument("--min-matches", type=int, default=MIN_MATCHES)
+    parser.add_argument("--dry-run", action="store_true", help="fit and report without saving")
+    args = parser.parse_args()
+
+    calibrate(args.sport or ["Football", "Basketball"], args.min_matches, args.dry_run)
@@ -0,0 +1,78 @@
+import json
+import threading
+
+from psycopg2.extras import Json
+
+import db
+
+# Checkpoints older than this are removed when a run starts
+RETENTION_DAYS = 3
+
+def dumps(payload):
+    # Model probabilities can be numpy scalars
+    return json.dumps(payload, default=float)
+
+class RunCheckpoint:
+    """Per-fixture progress of one engine run, kept in run_checkpoints under its run id.
+
+    Entries are (kind, sport, key) -> JSON payload: 'games' lists per date, 'odds' per
+    fixture and 'bets' per fixture once it is fully analyzed. A resumed run loads the
+    entries of its run id once and reuses them instead of calling the API again.
+    """
+
+    def __init__(self):
+        self.run_id = None
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def start(self, run_id, resume=False):
+        """Loads the run's entries when resuming, otherwise starts it from scratch.
+
+        Until started, nothing is checkpointed (backfills and the daemon never start it).
+        """
+        run_id = str(run_id)
+        with db.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "DELETE FROM run_checkpoints WHERE created_at < NOW() - %s * INTERVAL '1 day'",
+                (RETENTION_DAYS,),
+            )
+            if resume:
+                cur.execute(
+                    "SELECT kind, sport, item_key, payload FROM run_checkpoints WHERE run_id = %s",
+                    (run_id,),
+                )
+                for kind, sport, key, payload in cur.fetchall():
+                    self.entries[(kind, sport, key)] = payload
+            else:
+                cur.execute("DELETE FROM run_checkpoints WHERE run_id = %s", (run_id,))
+            cur.close()
+        self.run_id = run_id
+        return len(self.entries)
+
+    def active(self):
+        return self.run_id is not None
+
+    def get(self, kind, sport, key):
+        """Checkpointed payload, or None."""
+        with self.lock:
+            return self.entries.get((kind, sport, str(key)))
+
+    def put(self, kind, sport, key, payload):
+        """Stores a payload right away, so it survives the run dying on the next fixture."""
+        if self.run_id is None:
+            return
+        with self.lock:
+            self.entries[(kind, sport, str(key))] = payload
+        try:
+            with db.connection() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    INSERT INTO run_checkpoints (run_id, kind, sport, item_key, payload)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (run_id, kind, sport, item_key)
+                    DO UPDATE SET payload = EXCLUDED.payload, created_at = NOW()
+                """, (self.run_id, kind, sport, str(key), Json(payload, dumps=dumps)))
+                cur.close()
+        except Exception as e:
+            print(f"Checkpoint error ({kind} {sport} {key}): {e}")
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
 import os
+import datetime
 from dotenv import load_dotenv
+import snapshot
+import db
+import justifications
 
 # Load environment variables
 load_dotenv()
@@ -12,34 +15,28 @@ st.set_page_config(page_title="Betting AI Dashboard", page_icon="⚽", layout="w
 
 # Data Fetching
 @st.cache_data(ttl=600) # Cache data for 10 min
+def get_sql_data():
+    return pd.DataFrame(db.todays_bets(), columns=snapshot.SNAPSHOT_COLUMNS)
+
+@st.cache_data(max_entries=2)
+def get_snapshot_data(mtime, day):
+    # Keyed on the file's mtime and the date, so a new run or midnight invalidates it
+    return snapshot.load_today()
+
 def get_data():
-    url = os.environ.get("DATABASE_URL")
-    conn = psycopg2.connect(url)
-    
-    query = """
-    SELECT 
-        match_name, 
-        match_time,
-        league, 
-        sport, 
-        main_prediction, 
-        secondary_prediction, 
-        confidence_level, 
-        odds_value, 
-        ai_justification,
-        created_at
-    FROM bets_analysis
-    WHERE created_at::date = CURRENT_DATE
-    ORDER BY confidence_level DESC
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
+    """Today's bets from the engine's memory-mapped snapshot, or from Postgres without one."""
+    path = snapshot.latest_path()
+    if snapshot.available() and os.path.exists(path):
+        df = get_snapshot_data(os.path.getmtime(path), datetime.date.today().isoformat())
+        if df is not None:
+            return df
+    return get_sql_data()
 
 # Sidebar Filters
 st.sidebar.header("Filtros")
 sport_filter = st.sidebar.multiselect("Esporte", ["Football", "Basketball"], default=["Football", "Basketball"])
 min_confidence = st.sidebar.slider("Confiança Mínima (%)", 0, 100, 70)
+language = st.sidebar.selectbox("Idioma das justificativas", list(justifications.TEMPLATES))
 
 # Main Content
 st.title("🤖 Betting AI - Oportunidades do Dia")
@@ -76,8 +73,12 @@ try:
                 c1.markdown(f"**Liga:** {row['league']}")
                 c1.markdown(f"**Odd:** {row['odds_value']}")
                 c1.markdown(f"**Aposta Secundária:** {row['secondary_prediction']}")
+                if pd.notna(row['stake_fraction']):
+                    c1.markdown(f"**Stake (Kelly):** {row['stake_fraction']:.2%} da banca")
                 
-                c2.info(f"**Justificativa AI:** {row['ai_justification']}")
+                # Rendered here from the stored reason codes; older bets have the text stored
+                justification = justifications.render(row['sport'], row['match_name'], row['justification_codes'], language)
+                c2.info(f"**Justificativa AI:** {justification or row['ai_justification']}")
 
 except Exception as e:
     st.error(f"Erro ao carregar dados: {e}")
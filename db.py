@@ -0,0 +1,272 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.pool
+import psycopg2.extensions
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+# Days a bet stays in bets_analysis after its day while still waiting for its result
+UNSETTLED_RETENTION_DAYS = 7
+# Connections kept open per process; the engine's threads and the API share them
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+# Seconds a caller waits for a free pooled connection before giving up
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+_pool = None
+_pool_lock = threading.Lock()
+# psycopg2's pool raises instead of waiting when it is exhausted, so checkouts queue here
+_pool_slots = threading.BoundedSemaphore(POOL_SIZE)
+_timing_hooks = []
+
+# --- Statement timing ---
+
+def add_timing_hook(hook):
+    """Registers hook(label, seconds), called after every statement run through the pool."""
+    _timing_hooks.append(hook)
+
+def remove_timing_hook(hook):
+    if hook in _timing_hooks:
+        _timing_hooks.remove(hook)
+
+def statement_label(query):
+    """Prepared statement name for EXECUTEs, otherwise the SQL verb."""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    words = query.split(None, 2)
+    if not words:
+        return 'EMPTY'
+    if words[0].upper() == 'EXECUTE' and len(words) > 1:
+        return words[1].split('(')[0]
+    return words[0].upper()
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that reports the duration of each statement to the timing hooks."""
+
+    def execute(self, query, vars=None):
+        if not _timing_hooks:
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._report(query, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        if not _timing_hooks:
+            return super().executemany(query, vars_list)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._report(query, time.perf_counter() - start)
+
+    def _report(self, query, seconds):
+        label = statement_label(query)
+        for hook in list(_timing_hooks):
+            hook(label, seconds)
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements are already prepared in its session."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = TimedCursor
+        self.prepared = set()
+
+# --- Pool ---
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if not DATABASE_URL:
+                raise RuntimeError("DATABASE_URL not found.")
+            _pool = psycopg2.pool.ThreadedConnectionPool(
+                1, POOL_SIZE, DATABASE_URL, connection_factory=PooledConnection
+            )
+        return _pool
+
+@contextmanager
+def connection():
+    """Borrows a pooled connection; commits on success, rolls back on error.
+
+    Waits up to POOL_TIMEOUT seconds for a free connection, then raises PoolError.
+    """
+    if not _pool_slots.acquire(timeout=POOL_TIMEOUT):
+        raise psycopg2.pool.PoolError(f"no pooled connection free after {POOL_TIMEOUT:g}s")
+    try:
+        pool = get_pool()
+        conn = pool.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception as error:
+            # A dropped server connection can't be reused; everything else just rolls back
+            broken = conn.closed or isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not broken:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=broken or bool(conn.closed))
+    finally:
+        _pool_slots.release()
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+# --- Prepared statements ---
+
+BET_COLUMNS = [
+    'match_name', 'match_time', 'league', 'sport', 'main_prediction', 'secondary_prediction',
+    'confidence_level', 'justification_codes', 'odds_value', 'status', 'model_probability', 'stake_fraction',
+    'fixture_id', 'market', 'selection',
+]
+
+# Staking reads fixture_id, market and selection back, so stored bets group like in-process ones
+TODAY_COLUMNS = [
+    'id', 'match_name', 'match_time', 'league', 'sport', 'main_prediction', 'secondary_prediction',
+    'confidence_level', 'odds_value', 'model_probability', 'stake_fraction', 'ai_justification',
+    'justification_codes', 'fixture_id', 'market', 'selection', 'created_at',
+]
+
+PREPARED = {
+    'bet_exists_today': """
+        SELECT 1 FROM bets_analysis
+        WHERE match_name = $1 AND main_prediction = $2 AND created_at::date = CURRENT_DATE
+    """,
+    'insert_bet': f"""
+        INSERT INTO bets_analysis ({', '.join(BET_COLUMNS)})
+        VALUES ({', '.join(f'${i}' for i in range(1, len(BET_COLUMNS) + 1))})
+    """,
+    'todays_bets': f"""
+        SELECT {', '.join(TODAY_COLUMNS)}
+        FROM bets_analysis
+        WHERE created_at::date = CURRENT_DATE
+        ORDER BY confidence_level DESC, sport, id
+    """,
+}
+
+def execute_prepared(cur, name, args=()):
+    """Runs a statement from PREPARED, preparing it once per pooled session."""
+    conn = cur.connection
+    prepared = getattr(conn, 'prepared', None)
+    if prepared is None or name not in prepared:
+        cur.execute(f"PREPARE {name} AS {PREPARED[name]}")
+        if prepared is not None:
+            prepared.add(name)
+    if args:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(args))})", args)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+# --- Queries ---
+
+def column_exists(cur, table, column):
+    cur.execute(
+        "SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+        (table, column),
+    )
+    return cur.fetchone() is not None
+
+def todays_bets(limit=None):
+    """Today's bets as dicts, highest confidence first."""
+    with connection() as conn:
+        cur = conn.cursor()
+        execute_prepared(cur, 'todays_bets')
+        rows = cur.fetchmany(limit) if limit else cur.fetchall()
+        cur.close()
+    return [dict(zip(TODAY_COLUMNS, row)) for row in rows]
+
+def delete_old_bets(retention_days=UNSETTLED_RETENTION_DAYS):
+    """Removes previous days' bets once settled, or once past retention; returns how many were deleted."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        DELETE FROM bets_analysis
+        WHERE created_at::date < CURRENT_DATE
+          AND (status <> 'pending' OR created_at::date < CURRENT_DATE - %s)
+        """, (retention_days,))
+        count = cur.rowcount
+        cur.close()
+    return count
+
+def save_bets(bets):
+    """Inserts bets not already stored today (same match and prediction); returns the count saved."""
+    saved_count = 0
+    with connection() as conn:
+        cur = conn.cursor()
+        for bet in bets:
+            execute_prepared(cur, 'bet_exists_today', (bet['match_name'], bet['main_prediction']))
+            if cur.fetchone():
+                continue
+            row = dict(bet, match_time=bet.get('match_time', ''))
+            execute_prepared(cur, 'insert_bet', tuple(row.get(col) for col in BET_COLUMNS))
+            saved_count += 1
+        # Tells API servers to drop cached responses; delivered on commit
+        cur.execute("NOTIFY bets_updated")
+        cur.close()
+    return saved_count
+
+def update_stakes(bets):
+    """Writes bet['stake_fraction'] back to stored bets, matched on their id."""
+    with connection() as conn:
+        cur = conn.cursor()
+        execute_values(cur, """
+        UPDATE bets_analysis AS b SET stake_fraction = v.stake
+        FROM (VALUES %s) AS v (id, stake)
+        WHERE b.id = v.id
+        """, [(bet['id'], bet['stake_fraction']) for bet in bets])
+        # Stakes are part of what the API serves
+        cur.execute("NOTIFY bets_updated")
+        cur.close()
+
+def save_results(rows):
+    """Stores finished games in match_results, ignoring ones already stored."""
+    with connection() as conn:
+        cur = conn.cursor()
+        execute_values(cur, """
+        INSERT INTO match_results
+        (sport, fixture_id, league_id, league, match_date, home_id, home_team, away_id, away_team, home_score, away_score)
+        VALUES %s
+        ON CONFLICT (sport, fixture_id) DO NOTHING
+        """, rows)
+        cur.close()
+
+def team_records(cur, min_games):
+    """Win/draw/loss and goal totals per (sport, team_id) over stored results."""
+    cur.execute("""
+    SELECT sport, team_id,
+           SUM(CASE WHEN goals_for > goals_against THEN 1 ELSE 0 END),
+           SUM(CASE WHEN goals_for = goals_against THEN 1 ELSE 0 END),
+           SUM(CASE WHEN goals_for < goals_against THEN 1 ELSE 0 END),
+           SUM(goals_for), SUM(goals_against)
+    FROM (
+        SELECT sport, home_id AS team_id, home_score AS goals_for, away_score AS goals_against FROM match_results
+        UNION ALL
+        SELECT sport, away_id, away_score, home_score FROM match_results
+    ) sides
+    GROUP BY sport, team_id
+    HAVING COUNT(*) >= %s
+    """, (min_games,))
+    return {
+        (sport, team_id): {
+            'wins': int(wins),
+            'draws': int(draws),
+            'losses': int(losses),
+            'goals_for': int(goals_for),
+            'goals_against': int(goals_against),
+        }
+        for sport, team_id, wins, draws, losses, goals_for, goals_against in cur.fetchall()
+    }
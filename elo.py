@@ -0,0 +1,279 @@
+import os
+import math
+import time
+import argparse
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+INITIAL_RATING = 1500.0
+
+# K factor, home advantage (rating points) and draw curve per sport
+ELO_CONFIG = {
+    'Football': {'k': 20.0, 'home_advantage': 65.0, 'draw_max': 0.30, 'draw_width': 350.0},
+    'Basketball': {'k': 20.0, 'home_advantage': 70.0, 'draw_max': 0.0, 'draw_width': 1.0},
+}
+
+# Teams with fewer rated games are not trusted for scoring
+MIN_RATED_GAMES = 5
+
+def expected_score(home_rating, away_rating, home_advantage):
+    """Expected score of the home side (win = 1, draw = 0.5)."""
+    return 1 / (1 + 10 ** (-(home_rating + home_advantage - away_rating) / 400))
+
+def margin_multiplier(sport, margin, rating_diff):
+    """Scales K by the margin of victory (eloratings.net for football, 538 for basketball)."""
+    margin = abs(margin)
+    if margin == 0:
+        return 1.0
+    if sport == 'Football':
+        if margin == 1:
+            return 1.0
+        if margin == 2:
+            return 1.5
+        return (11 + margin) / 8
+    # Dampened for favourites so big wins by strong teams don't inflate ratings
+    return ((margin + 3) ** 0.8) / (7.5 + 0.006 * max(rating_diff, 0))
+
+def match_probability(sport, home_rating, away_rating):
+    """Home win / draw / away win from two ratings, consistent with the expected score."""
+    config = ELO_CONFIG[sport]
+    diff = home_rating + config['home_advantage'] - away_rating
+    expected = 1 / (1 + 10 ** (-diff / 400))
+
+    # Draws are likeliest between even sides; the expected score is home + draw / 2
+    draw = config['draw_max'] * math.exp(-(diff / config['draw_width']) ** 2)
+    draw = min(draw, 1.8 * min(expected, 1 - expected))
+
+    return {
+        'home_win': expected - draw / 2,
+        'draw': draw,
+        'away_win': 1 - expected - draw / 2,
+    }
+
+class RatingStore:
+    """Team ratings of every sport, cached in process for the duration of a run."""
+
+    def __init__(self):
+        self.ratings = {}  # (sport, team_id) -> [rating, games]
+        self.names = {}
+        self._dirty = set()
+
+    def get(self, sport, team_id):
+        """(rating, games) of a team, or None if it has never been rated."""
+        entry = self.ratings.get((sport, team_id))
+        return tuple(entry) if entry else None
+
+    def rated(self, sport, team_id):
+        entry = self.ratings.get((sport, team_id))
+        return entry is not None and entry[1] >= MIN_RATED_GAMES
+
+    def load(self, conn):
+        cur = conn.cursor()
+        cur.execute("SELECT sport, team_id, team_name, rating, games FROM team_ratings")
+        for sport, team_id, name, rating, games in cur.fetchall():
+            self.ratings[(sport, team_id)] = [rating, games]
+            self.names[(sport, team_id)] = name
+        cur.close()
+        return len(self.ratings)
+
+    def apply_result(self, sport, home_id, away_id, home_score, away_score, home_name=None, away_name=None):
+        """Updates both teams for one settled match in O(1)."""
+        config = ELO_CONFIG[sport]
+        home = self.ratings.setdefault((sport, home_id), [INITIAL_RATING, 0])
+        away = self.ratings.setdefault((sport, away_id), [INITIAL_RATING, 0])
+
+        expected = expected_score(home[0], away[0], config['home_advantage'])
+        margin = home_score - away_score
+        actual = 1.0 if margin > 0 else 0.5 if margin == 0 else 0.0
+        winner_diff = (home[0] + config['home_advantage'] - away[0]) * (1 if margin > 0 else -1)
+        delta = config['k'] * margin_multiplier(sport, margin, winner_diff) * (actual - expected)
+
+        home[0] += delta
+        away[0] -= delta
+        home[1] += 1
+        away[1] += 1
+
+        if home_name:
+            self.names[(sport, home_id)] = home_name
+        if away_name:
+            self.names[(sport, away_id)] = away_name
+        self._dirty.update([(sport, home_id), (sport, away_id)])
+
+    def apply_pending(self, conn):
+        """Batched pass over settled matches not yet rated, oldest first; returns the count."""
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT sport, fixture_id, home_id, away_id, home_score, away_score, home_team, away_team
+            FROM match_results
+            WHERE NOT elo_applied AND home_score IS NOT NULL AND away_score IS NOT NULL
+            ORDER BY match_date, fixture_id
+            FOR UPDATE
+        """)
+        rows = cur.fetchall()
+
+        for sport, _, home_id, away_id, home_score, away_score, home_name, away_name in rows:
+            if sport in ELO_CONFIG:
+                self.apply_result(sport, home_id, away_id, home_score, away_score, home_name, away_name)
+
+        self.flush(cur)
+        if rows:
+            execute_values(cur, """
+                UPDATE match_results AS m SET elo_applied = TRUE
+                FROM (VALUES %s) AS done (sport, fixture_id)
+                WHERE m.sport = done.sport AND m.fixture_id = done.fixture_id
+            """, [(row[0], row[1]) for row in rows])
+        conn.commit()
+        cur.close()
+        return len(rows)
+
+    def flush(self, cur):
+        """Upserts the ratings changed since the last flush."""
+        if not self._dirty:
+            return
+        execute_values(cur, """
+            INSERT INTO team_ratings (sport, team_id, team_name, rating, games)
+            VALUES %s
+            ON CONFLICT (sport, team_id) DO UPDATE
+            SET team_name = COALESCE(EXCLUDED.team_name, team_ratings.team_name),
+                rating = EXCLUDED.rating, games = EXCLUDED.games, updated_at = NOW()
+        """, [
+            (sport, team_id, self.names.get((sport, team_id)), *self.ratings[(sport, team_id)])
+            for sport, team_id in self._dirty
+        ])
+        self._dirty.clear()
+
+# --- Bootstrap ---
+
+def fit_ratings(home_idx, away_idx, outcome, weights, n_teams, home_advantage, prior_sd=300.0, iterations=200, damping=0.8):
+    """Static ratings maximizing the time-weighted Elo likelihood, vectorized over all matches.
+
+    `outcome` is the home score (1, 0.5, 0) and ratings get a Gaussian prior of
+    `prior_sd` points around the initial rating. Each step is a diagonal Newton step whose
+    per-team gradient and curvature are gathered with np.bincount, so it costs
+    O(matches) in NumPy and converges in a few dozen steps.
+    """
+    ratings = np.zeros(n_teams)
+    total_weight = weights.sum()
+    scale = np.log(10) / 400
+    l2 = 1 / (2 * total_weight * prior_sd ** 2)
+
+    for _ in range(iterations):
+        diff = ratings[home_idx] + home_advantage - ratings[away_idx]
+        expected = 1 / (1 + np.exp(-diff * scale))
+        residual = weights * (outcome - expected) * scale
+        curvature = weights * expected * (1 - expected) * scale ** 2
+
+        grad = (np.bincount(home_idx, residual, n_teams) - np.bincount(away_idx, residual, n_teams)) / total_weight
+        hess = (np.bincount(home_idx, curvature, n_teams) + np.bincount(away_idx, curvature, n_teams)) / total_weight
+        grad -= 2 * l2 * ratings
+        hess += 2 * l2
+
+        step = damping * grad / hess
+        ratings += step
+        if np.max(np.abs(step)) < 0.01:
+            break
+
+    return ratings + INITIAL_RATING
+
+def bootstrap(sports, half_life_days=365.0):
+    """Rebuilds team_ratings from all stored results and marks them as applied."""
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL not found.")
+        return
+
+    conn = None
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        for sport in sports:
+            start = time.perf_counter()
+            cur.execute("""
+                SELECT home_id, away_id, home_score, away_score,
+                       EXTRACT(EPOCH FROM NOW() - match_date) / 86400, home_team, away_team
+                FROM match_results
+                WHERE sport = %s AND home_score IS NOT NULL AND away_score IS NOT NULL
+            """, (sport,))
+            rows = cur.fetchall()
+            if not rows:
+                print(f"[{sport}] No stored results, skipping.")
+                continue
+
+            home_ids = np.array([r[0] for r in rows])
+            away_ids = np.array([r[1] for r in rows])
+            margin = np.array([r[2] - r[3] for r in rows], dtype=float)
+            age_days = np.array([float(r[4] or 0) for r in rows])
+
+            team_ids, idx = np.unique(np.concatenate([home_ids, away_ids]), return_inverse=True)
+            home_idx, away_idx = idx[:len(rows)], idx[len(rows):]
+            outcome = np.where(margin > 0, 1.0, np.where(margin == 0, 0.5, 0.0))
+            weights = 0.5 ** (age_days / half_life_days)
+
+            ratings = fit_ratings(home_idx, away_idx, outcome, weights, len(team_ids), ELO_CONFIG[sport]['home_advantage'])
+            games = np.bincount(home_idx, minlength=len(team_ids)) + np.bincount(away_idx, minlength=len(team_ids))
+
+            names = {}
+            for r in rows:
+                names[r[0]] = r[5]
+                names[r[1]] = r[6]
+
+            execute_values(cur, """
+                INSERT INTO team_ratings (sport, team_id, team_name, rating, games)
+                VALUES %s
+                ON CONFLICT (sport, team_id) DO UPDATE
+                SET team_name = EXCLUDED.team_name, rating = EXCLUDED.rating,
+                    games = EXCLUDED.games, updated_at = NOW()
+            """, [(sport, int(t), names.get(t), float(r), int(g)) for t, r, g in zip(team_ids, ratings, games)])
+            cur.execute("UPDATE match_results SET elo_applied = TRUE WHERE sport = %s", (sport,))
+            conn.commit()
+
+            print(f"[{sport}] Rated {len(team_ids)} teams from {len(rows)} matches "
+                  f"in {time.perf_counter() - start:.2f}s.")
+
+        cur.close()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Rating error: {error}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+def update():
+    """Applies every settled match not yet rated."""
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL not found.")
+        return
+
+    conn = None
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        store = RatingStore()
+        store.load(conn)
+        count = store.apply_pending(conn)
+        print(f"Applied {count} results to team ratings.")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Rating error: {error}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the Elo ratings of teams.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    boot = subparsers.add_parser("bootstrap", help="rebuild all ratings from stored results")
+    boot.add_argument("--sport", action="append", choices=list(ELO_CONFIG),
+                      help="sport to rebuild (repeatable, default: all)")
+    boot.add_argument("--half-life-days", type=float, default=365.0,
+                      help="age at which a result counts half as much")
+    subparsers.add_parser("update", help="apply settled matches not yet rated")
+    args = parser.parse_args()
+
+    if args.command == "bootstrap":
+        bootstrap(args.sport or list(ELO_CONFIG), args.half_life_days)
+    else:
+        update()
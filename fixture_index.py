@@ -0,0 +1,111 @@
+import os
+import re
+import json
+import unicodedata
+
+import live
+
+# Kickoffs are indexed in buckets of this many seconds; probing the neighbouring buckets
+# too finds every fixture within KICKOFF_TOLERANCE, which must not exceed a bucket
+BUCKET_SECONDS = 2 * 3600
+# Largest kickoff difference accepted between a provider event and our fixture
+KICKOFF_TOLERANCE = 90 * 60
+
+# Tokens that only say "this is a club" and differ between providers
+STOP_TOKENS = {'fc', 'cf', 'sc', 'afc', 'ac', 'fk', 'sk', 'bc', 'club', 'the', 'de', 'cd', 'ca', 'sv', 'if'}
+
+# JSON file of {alias: canonical name}, e.g. {"Man Utd": "Manchester United"}
+ALIASES_PATH = os.environ.get("TEAM_ALIASES", "team_aliases.json")
+
+def normalize_name(name):
+    """Lowercase ASCII tokens without punctuation or club suffixes: 'Atlético de Madrid' -> 'atletico madrid'."""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode().lower()
+    # Abbreviations: 'F.C.' -> 'fc'
+    text = text.replace('.', '')
+    tokens = [token for token in re.split(r'[^a-z0-9]+', text) if token and token not in STOP_TOKENS]
+    return ' '.join(tokens)
+
+def load_aliases(path=ALIASES_PATH):
+    """Normalized alias -> normalized canonical name, from the aliases file if there is one."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        raw = json.load(f)
+    return {normalize_name(alias): normalize_name(canonical) for alias, canonical in raw.items()}
+
+class FixtureIndex:
+    """Hash index of our fixtures by normalized team names and kickoff bucket.
+
+    A provider event is resolved with a handful of dict lookups (three buckets, both
+    team orders, then single-team keys), never by comparing it to every fixture.
+    """
+
+    def __init__(self, aliases=None):
+        self.aliases = load_aliases() if aliases is None else aliases
+        self.pairs = {}   # (sport, home, away, bucket) -> [(fixture_id, kickoff)]
+        self.teams = {}   # (sport, team, bucket) -> [(fixture_id, kickoff, is_home)]
+
+    def canonical(self, name):
+        key = normalize_name(name)
+        return self.aliases.get(key, key)
+
+    def add(self, sport, fixture_id, home, away, kickoff):
+        home, away = self.canonical(home), self.canonical(away)
+        bucket = int(kickoff // BUCKET_SECONDS)
+        self.pairs.setdefault((sport, home, away, bucket), []).append((fixture_id, kickoff))
+        self.teams.setdefault((sport, home, bucket), []).append((fixture_id, kickoff, True))
+        self.teams.setdefault((sport, away, bucket), []).append((fixture_id, kickoff, False))
+
+    def add_games(self, sport, games):
+        for game in games:
+            fixture_id = game['fixture']['id'] if sport == 'Football' else game.get('id')
+            kickoff = live.kickoff_time(sport, game)
+            if fixture_id and kickoff is not None:
+                self.add(sport, fixture_id, game['teams']['home']['name'], game['teams']['away']['name'], kickoff)
+        return self
+
+    def _closest(self, candidates, kickoff):
+        best = None
+        for fixture_id, fixture_kickoff, reversed_order in candidates:
+            gap = abs(fixture_kickoff - kickoff)
+            if gap <= KICKOFF_TOLERANCE and (best is None or gap < best[1]):
+                best = ((fixture_id, reversed_order), gap)
+        return best[0] if best else None
+
+    def _by_team(self, sport, team, buckets, kickoff, as_home):
+        """{fixture_id: reversed} of fixtures where the team plays, the event listing it as home or not."""
+        return {
+            fixture_id: is_home != as_home
+            for b in buckets
+            for fixture_id, fixture_kickoff, is_home in self.teams.get((sport, team, b), ())
+            if abs(fixture_kickoff - kickoff) <= KICKOFF_TOLERANCE
+        }
+
+    def match(self, sport, home, away, kickoff):
+        """(fixture_id, reversed) for a provider event, or None.
+
+        `reversed` is True when the event lists our away team as its home team, so its
+        Home/Away selections belong to the other side of our fixture.
+        """
+        home, away = self.canonical(home), self.canonical(away)
+        bucket = int(kickoff // BUCKET_SECONDS)
+        buckets = (bucket - 1, bucket, bucket + 1)
+
+        # Both teams, in either order (some feeds list neutral-venue games reversed)
+        candidates = []
+        for b in buckets:
+            candidates.extend((f, k, False) for f, k in self.pairs.get((sport, home, away, b), ()))
+            candidates.extend((f, k, True) for f, k in self.pairs.get((sport, away, home, b), ()))
+        found = self._closest(candidates, kickoff)
+        if found is not None:
+            return found
+
+        # One team recognised: accept only if both names point to the same single fixture
+        # in the same orientation, or only one of them is known at that time
+        by_home = self._by_team(sport, home, buckets, kickoff, True)
+        by_away = self._by_team(sport, away, buckets, kickoff, False)
+        if by_home and by_away:
+            common = [(f, r) for f, r in by_home.items() if by_away.get(f) == r]
+            return common[0] if len(common) == 1 else None
+        single = by_home or by_away
+        return next(iter(single.items())) if len(single) == 1 else None
@@ -0,0 +1,329 @@
+import os
+import math
+import time
+import argparse
+from functools import lru_cache
+import numpy as np
+import psycopg2
+from psycopg2.extras import Json, execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# Score matrices cover 0..MAX_GOALS goals per side
+MAX_GOALS = 10
+# Rates are rounded to this many decimals before the matrix cache lookup
+RATE_DECIMALS = 2
+
+DEFAULT_GOAL_PARAMS = {'mu': 0.1, 'home_advantage': 0.25, 'rho': -0.05}
+
+_GOALS = np.arange(MAX_GOALS + 1)
+_LOG_FACTORIAL = np.array([math.lgamma(k + 1) for k in _GOALS])
+# Total goals and home margin of every matrix cell, for np.bincount
+_TOTALS = np.add.outer(_GOALS, _GOALS).ravel()
+_MARGINS = (np.subtract.outer(_GOALS, _GOALS) + MAX_GOALS).ravel()
+
+# --- Score matrix ---
+
+def poisson_pmf(rate):
+    return np.exp(_GOALS * np.log(rate) - rate - _LOG_FACTORIAL)
+
+@lru_cache(maxsize=4096)
+def _score_matrix(home_rate, away_rate, rho):
+    home = poisson_pmf(home_rate)
+    away = poisson_pmf(away_rate)
+    matrix = np.outer(home, away)
+
+    # Dixon-Coles correction of the low-score cells
+    matrix[0, 0] *= 1 - home_rate * away_rate * rho
+    matrix[0, 1] *= 1 + home_rate * rho
+    matrix[1, 0] *= 1 + away_rate * rho
+    matrix[1, 1] *= 1 - rho
+
+    matrix = np.maximum(matrix, 0)
+    matrix /= matrix.sum()
+    matrix.setflags(write=False)
+    return matrix
+
+def score_matrix(home_rate, away_rate, rho=0.0):
+    """P(home goals = i, away goals = j), shared between fixtures with the same rounded rates."""
+    return _score_matrix(round(home_rate, RATE_DECIMALS), round(away_rate, RATE_DECIMALS), round(rho, 3))
+
+def cache_info():
+    return _score_matrix.cache_info()
+
+# --- Markets ---
+
+def match_odds(matrix):
+    return {
+        'home_win': float(np.tril(matrix, -1).sum()),
+        'draw': float(np.trace(matrix)),
+        'away_win': float(np.triu(matrix, 1).sum()),
+    }
+
+def total_goals_distribution(matrix):
+    return np.bincount(_TOTALS, matrix.ravel(), 2 * MAX_GOALS + 1)
+
+def margin_distribution(matrix):
+    """P(home goals - away goals = k) at index k + MAX_GOALS."""
+    return np.bincount(_MARGINS, matrix.ravel(), 2 * MAX_GOALS + 1)
+
+def both_teams_score(matrix):
+    return float(matrix[1:, 1:].sum())
+
+def _settle(outcome_dist, values, line):
+    """Win / push / lose probabilities of a bet that wins when value + line > 0."""
+    adjusted = values + line
+    return (
+        float(outcome_dist[adjusted > 0].sum()),
+        float(outcome_dist[adjusted == 0].sum()),
+        float(outcome_dist[adjusted < 0].sum()),
+    )
+
+def split_line(line):
+    """Quarter lines (e.g. -0.75) are half stake on each neighbouring half line."""
+    if abs(line * 4) % 2 == 1:
+        return [line - 0.25, line + 0.25]
+    return [line]
+
+def expected_return(outcome_dist, values, line, odd):
+    """Expected profit per unit staked, averaging the halves of quarter lines."""
+    lines = split_line(line)
+    total = 0.0
+    for part in lines:
+        win, _, lose = _settle(outcome_dist, values, part)
+        total += win * (odd - 1) - lose
+    return total / len(lines)
+
+def selection_probability(matrix, bet_name, value, odd):
+    """Model probability of a bookmaker selection, or None for unsupported markets.
+
+    Selections that can push (integer and quarter lines) return the win probability
+    of the binary bet with the same expected return, so they compare directly with 1/odd.
+    """
+    try:
+        if bet_name == 'Match Winner':
+            probs = match_odds(matrix)
+            return {'Home': probs['home_win'], 'Draw': probs['draw'], 'Away': probs['away_win']}.get(value)
+
+        if bet_name == 'Both Teams Score':
+            btts = both_teams_score(matrix)
+            return {'Yes': btts, 'No': 1 - btts}.get(value)
+
+        if bet_name == 'Goals Over/Under':
+            side, line = value.split()
+            line = float(line)
+            totals = np.arange(2 * MAX_GOALS + 1)
+            if side == 'Over':
+                ev = expected_return(total_goals_distribution(matrix), totals, -line, odd)
+            elif side == 'Under':
+                ev = expected_return(total_goals_distribution(matrix), -totals, line, odd)
+            else:
+                return None
+            return (ev + 1) / odd
+
+        if bet_name == 'Asian Handicap':
+            side, line = value.split()
+            line = float(line)
+            margins = np.arange(-MAX_GOALS, MAX_GOALS + 1)
+            if side == 'Home':
+                ev = expected_return(margin_distribution(matrix), margins, line, odd)
+            elif side == 'Away':
+                ev = expected_return(margin_distribution(matrix), -margins, line, odd)
+            else:
+                return None
+            return (ev + 1) / odd
+    except ValueError:
+        return None
+
+    return None
+
+def selection_label(bet_name, value, home_team, away_team):
+    """Prediction text stored in bets_analysis for a selection."""
+    if bet_name == 'Goals Over/Under':
+        return f"{value} Goals"
+    if bet_name == 'Both Teams Score':
+        return f"Both Teams Score: {value}"
+    if bet_name == 'Asian Handicap':
+        side, line = value.split()
+        team = home_team if side == 'Home' else away_team
+        return f"Asian Handicap {team} {line}"
+    return f"{bet_name}: {value}"
+
+# --- Rates ---
+
+class GoalRatings:
+    """Attack/defence ratings and league constants, cached in process for a run."""
+
+    def __init__(self):
+        self.params = {}   # sport -> {'mu', 'home_advantage', 'rho'}
+        self.teams = {}    # (sport, team_id) -> (attack, defence)
+
+    def load(self, conn):
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT DISTINCT ON (sport) sport, params FROM model_parameters
+            WHERE model = 'goals' AND league_id IS NULL
+            ORDER BY sport, version DESC
+        """)
+        for sport, params in cur.fetchall():
+            self.params[sport] = {**DEFAULT_GOAL_PARAMS, **params}
+        cur.execute("SELECT sport, team_id, attack, defence FROM team_ratings WHERE attack IS NOT NULL")
+        for sport, team_id, attack, defence in cur.fetchall():
+            self.teams[(sport, team_id)] = (attack, defence)
+        cur.close()
+        return len(self.teams)
+
+    def rates(self, sport, home_id, away_id):
+        """Expected goals (home, away, rho) of a fixture, or None if a team is unrated."""
+        params = self.params.get(sport)
+        home = self.teams.get((sport, home_id))
+        away = self.teams.get((sport, away_id))
+        if params is None or home is None or away is None:
+            return None
+        home_rate = math.exp(params['mu'] + params['home_advantage'] + home[0] + away[1])
+        away_rate = math.exp(params['mu'] + away[0] + home[1])
+        return home_rate, away_rate, params['rho']
+
+# --- Fitting ---
+
+def fit_rates(home_idx, away_idx, home_goals, away_goals, weights, n_teams, prior_sd=0.5, iterations=200):
+    """Time-weighted Poisson (Maher) fit of attack/defence ratings, vectorized per step.
+
+    log(home rate) = mu + home_advantage + attack[home] + defence[away], and the away
+    rate mirrors it without home advantage. Attack, defence and the league constants
+    are updated in turn with diagonal Newton steps gathered with np.bincount.
+    """
+    attack = np.zeros(n_teams)
+    defence = np.zeros(n_teams)
+    total_weight = weights.sum()
+    mu = np.log(max(np.average(away_goals, weights=weights), 0.1))
+    home_adv = np.log(max(np.average(home_goals, weights=weights), 0.1)) - mu
+    l2 = 1 / (2 * total_weight * prior_sd ** 2)
+
+    def residuals():
+        home_rate = np.exp(mu + home_adv + attack[home_idx] + defence[away_idx])
+        away_rate = np.exp(mu + attack[away_idx] + defence[home_idx])
+        return (weights * (home_goals - home_rate), weights * (away_goals - away_rate),
+                weights * home_rate, weights * away_rate)
+
+    def team_step(ratings, own_home, own_away):
+        # own_home / own_away: index of the rated team in the home and away goal terms
+        home_res, away_res, home_curv, away_curv = residuals()
+        grad = np.bincount(own_home, home_res, n_teams) + np.bincount(own_away, away_res, n_teams)
+        hess = np.bincount(own_home, home_curv, n_teams) + np.bincount(own_away, away_curv, n_teams)
+        return (grad / total_weight - 2 * l2 * ratings) / (hess / total_weight + 2 * l2)
+
+    for _ in range(iterations):
+        step_att = team_step(attack, home_idx, away_idx)
+        attack += step_att
+        step_def = team_step(defence, away_idx, home_idx)
+        defence += step_def
+
+        home_res, away_res, home_curv, away_curv = residuals()
+        home_adv += home_res.sum() / home_curv.sum()
+        home_res, away_res, home_curv, away_curv = residuals()
+        mu += (home_res.sum() + away_res.sum()) / (home_curv.sum() + away_curv.sum())
+
+        if max(np.max(np.abs(step_att)), np.max(np.abs(step_def))) < 1e-4:
+            break
+
+    # Ratings are relative to the average team
+    mu += attack.mean() + defence.mean()
+    return attack - attack.mean(), defence - defence.mean(), float(mu), float(home_adv)
+
+def fit_rho(home_rate, away_rate, home_goals, away_goals, weights):
+    """Dixon-Coles low-score correlation by a vectorized grid search."""
+    grid = np.linspace(-0.2, 0.2, 81)[:, None]
+    tau = np.ones((len(grid), len(home_goals)))
+    cells = [
+        ((home_goals == 0) & (away_goals == 0), 1 - home_rate * away_rate * grid),
+        ((home_goals == 0) & (away_goals == 1), 1 + home_rate * grid),
+        ((home_goals == 1) & (away_goals == 0), 1 + away_rate * grid),
+        ((home_goals == 1) & (away_goals == 1), 1 - grid + 0 * home_rate),
+    ]
+    for mask, value in cells:
+        tau = np.where(mask, value, tau)
+    loglik = (weights * np.log(np.maximum(tau, 1e-9))).sum(axis=1)
+    return float(grid[np.argmax(loglik), 0])
+
+def fit(sport='Football', half_life_days=365.0):
+    """Fits and stores attack/defence ratings and the league constants of a sport."""
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL not found.")
+        return
+
+    conn = None
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+        start = time.perf_counter()
+        cur.execute("""
+            SELECT home_id, away_id, home_score, away_score,
+                   EXTRACT(EPOCH FROM NOW() - match_date) / 86400, home_team, away_team
+            FROM match_results
+            WHERE sport = %s AND home_score IS NOT NULL AND away_score IS NOT NULL
+        """, (sport,))
+        rows = cur.fetchall()
+        if not rows:
+            print(f"[{sport}] No stored results, skipping.")
+            return
+
+        home_ids = np.array([r[0] for r in rows])
+        away_ids = np.array([r[1] for r in rows])
+        home_goals = np.array([r[2] for r in rows], dtype=float)
+        away_goals = np.array([r[3] for r in rows], dtype=float)
+        weights = 0.5 ** (np.array([float(r[4] or 0) for r in rows]) / half_life_days)
+
+        team_ids, idx = np.unique(np.concatenate([home_ids, away_ids]), return_inverse=True)
+        home_idx, away_idx = idx[:len(rows)], idx[len(rows):]
+
+        attack, defence, mu, home_adv = fit_rates(home_idx, away_idx, home_goals, away_goals, weights, len(team_ids))
+        home_rate = np.exp(mu + home_adv + attack[home_idx] + defence[away_idx])
+        away_rate = np.exp(mu + attack[away_idx] + defence[home_idx])
+        rho = fit_rho(home_rate, away_rate, home_goals, away_goals, weights)
+
+        names = {}
+        for r in rows:
+            names[r[0]] = r[5]
+            names[r[1]] = r[6]
+
+        # New teams get the initial Elo rating; existing ratings are left alone
+        execute_values(cur, """
+            INSERT INTO team_ratings (sport, team_id, team_name, rating, games, attack, defence)
+            VALUES %s
+            ON CONFLICT (sport, team_id) DO UPDATE
+            SET attack = EXCLUDED.attack, defence = EXCLUDED.defence, updated_at = NOW()
+        """, [(sport, int(t), names.get(t), 1500.0, 0, float(a), float(d))
+              for t, a, d in zip(team_ids, attack, defence)])
+
+        params = {'mu': round(mu, 6), 'home_advantage': round(home_adv, 6), 'rho': rho}
+        cur.execute("""
+            SELECT COALESCE(MAX(version), 0) + 1 FROM model_parameters
+            WHERE model = 'goals' AND sport = %s AND league_id IS NULL
+        """, (sport,))
+        version = cur.fetchone()[0]
+        cur.execute("""
+            INSERT INTO model_parameters (model, sport, league_id, version, params, n_matches)
+            VALUES ('goals', %s, NULL, %s, %s, %s)
+        """, (sport, version, Json(params), len(rows)))
+        conn.commit()
+        cur.close()
+
+        print(f"[{sport}] Goal model v{version}: {len(team_ids)} teams, {len(rows)} matches, "
+              f"{params} in {time.perf_counter() - start:.2f}s.")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Goal model error: {error}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the football goal model from stored results.")
+    parser.add_argument("--half-life-days", type=float, default=365.0,
+                        help="age at which a result counts half as much")
+    args = parser.parse_args()
+
+    fit('Football', args.half_life_days)
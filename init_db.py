@@ -1,10 +1,6 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
+import db
 
-load_dotenv()
-
-DATABASE_URL = os.environ.get("DATABASE_URL")
+DATABASE_URL = db.DATABASE_URL
 
 def init_db():
     if not DATABASE_URL:
@@ -12,21 +8,17 @@ def init_db():
         return
 
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        
         # Read the SQL file
         with open('sql/create_table.sql', 'r') as f:
             sql_commands = f.read()
 
         print("Executing SQL commands...")
-        cur.execute(sql_commands)
-        conn.commit()
+        with db.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql_commands)
+            cur.close()
         
         print("Table 'bets_analysis' created successfully!")
-        
-        cur.close()
-        conn.close()
     except Exception as e:
         print(f"Error initializing database: {e}")
 
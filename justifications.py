@@ -0,0 +1,125 @@
+DEFAULT_LANGUAGE = 'pt'
+# Reasons shown per bet, before the probability
+MAX_REASONS = 2
+
+# Short code of each reason the engine records, in display order
+REASON_CODES = {
+    'home_form': 'hf',
+    'away_form': 'af',
+    'expected_goals': 'xg',
+    'expected_points': 'xp',
+    'goal_diff': 'gd',
+}
+PROBABILITY_CODE = 'p'
+
+# Templates per language and sport; positional fields are the reason's numbers.
+# A code with a '+' variant uses it when its first number is positive.
+TEMPLATES = {
+    'pt': {
+        'Football': {
+            'hf': "{home} tem {0:.0f}% de aproveitamento em casa",
+            'af': "{away} tem {0:.0f}% fora de casa",
+            'xg': "Gols esperados: {home} {0:.2f} x {1:.2f} {away}",
+            'gd+': "Saldo de gols favorável: +{0:.1f}",
+            'gd': "Saldo de gols: {0:.1f}",
+        },
+        'Basketball': {
+            'xp': "Placar médio simulado: {home} {0:.1f} x {1:.1f} {away}",
+            'hf': "{home} tem {0:.0f}% de aproveitamento em casa",
+            'af': "{away} tem {0:.0f}% fora de casa",
+        },
+        'fallback': "Análise baseada em estatísticas recentes",
+        'p': "Probabilidade calculada: {0:.1%}",
+    },
+    'en': {
+        'Football': {
+            'hf': "{home} has a {0:.0f}% home record",
+            'af': "{away} has a {0:.0f}% away record",
+            'xg': "Expected goals: {home} {0:.2f} x {1:.2f} {away}",
+            'gd+': "Favourable goal difference: +{0:.1f}",
+            'gd': "Goal difference: {0:.1f}",
+        },
+        'Basketball': {
+            'xp': "Simulated average score: {home} {0:.1f} x {1:.1f} {away}",
+            'hf': "{home} has a {0:.0f}% home record",
+            'af': "{away} has a {0:.0f}% away record",
+        },
+        'fallback': "Analysis based on recent statistics",
+        'p': "Calculated probability: {0:.1%}",
+    },
+}
+
+def compile_templates(templates=TEMPLATES):
+    """(language, sport) -> {code: bound str.format}, plus the shared fallback and probability."""
+    compiled = {}
+    for language, sports in templates.items():
+        shared = {code: sports[code].format for code in ('fallback', PROBABILITY_CODE)}
+        for sport, codes in sports.items():
+            if isinstance(codes, dict):
+                compiled[(language, sport)] = dict(shared, **{code: text.format for code, text in codes.items()})
+        compiled[(language, None)] = shared
+    return compiled
+
+COMPILED = compile_templates()
+
+def encode(reasons, probability):
+    """Compact reason string stored with a bet, e.g. 'hf:62;gd:3;p:0.6142'.
+
+    `reasons` maps reason names of REASON_CODES to a number or a tuple of numbers.
+    """
+    parts = []
+    for name, code in REASON_CODES.items():
+        if name in reasons:
+            values = reasons[name] if isinstance(reasons[name], (tuple, list)) else (reasons[name],)
+            parts.append(code + ':' + '/'.join(f"{float(value):g}" for value in values))
+    parts.append(f"{PROBABILITY_CODE}:{float(probability):.4f}")
+    return ';'.join(parts)
+
+def decode(codes):
+    """[(code, (numbers...))] of an encoded reason string, in stored order."""
+    decoded = []
+    for part in (codes or '').split(';'):
+        code, _, values = part.partition(':')
+        if code and values:
+            decoded.append((code, tuple(float(value) for value in values.split('/'))))
+    return decoded
+
+def render(sport, match_name, codes, language=DEFAULT_LANGUAGE):
+    """Explanation text of one bet, or None when it has no reason codes (older bets)."""
+    if not codes or not isinstance(codes, str):
+        return None
+    templates = COMPILED.get((language, sport)) or COMPILED[(language, None)]
+    home, _, away = (match_name or '').partition(' vs ')
+
+    reasons, probability = [], None
+    for code, values in decode(codes):
+        if code == PROBABILITY_CODE:
+            probability = values[0]
+            continue
+        template = templates.get(code + '+') if values[0] > 0 else None
+        template = template or templates.get(code)
+        if template is not None and len(reasons) < MAX_REASONS:
+            reasons.append(template(*values, home=home, away=away))
+
+    if not reasons:
+        reasons.append(templates['fallback']())
+    text = ". ".join(reasons)
+    if probability is not None:
+        text += ". " + templates[PROBABILITY_CODE](probability)
+    return text
+
+def render_rows(rows, language=DEFAULT_LANGUAGE):
+    """Fills 'ai_justification' of a batch of bet dicts from their reason codes.
+
+    Rows without codes keep their stored text; identical reasons are rendered once.
+    """
+    rendered = {}
+    for row in rows:
+        codes = row.get('justification_codes')
+        if not codes:
+            continue
+        key = (row.get('sport'), row.get('match_name'), codes)
+        if key not in rendered:
+            rendered[key] = render(key[0], key[1], codes, language)
+        row['ai_justification'] = rendered[key]
+    return rows
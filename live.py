@@ -0,0 +1,260 @@
+import math
+import time
+import asyncio
+import datetime
+
+# Poll interval (seconds) by time to kickoff: the first row whose bound is not exceeded
+POLL_SCHEDULE = [
+    (15 * 60, 60),
+    (60 * 60, 180),
+    (3 * 3600, 600),
+    (None, 1800),
+]
+MIN_INTERVAL = 30
+# How strongly recent odds movement shortens the interval: a 5% move halves it
+VOLATILITY_GAIN = 20.0
+# Weight of the latest move in the volatility average
+VOLATILITY_ALPHA = 0.3
+
+DEFAULT_WINDOW_HOURS = 6.0
+DEFAULT_QUOTA_PER_HOUR = 300
+FIXTURE_REFRESH_SECONDS = 900
+
+FINISHED_OR_LIVE = {'1H', 'HT', '2H', 'ET', 'BT', 'P', 'LIVE', 'INT', 'Q1', 'Q2', 'Q3', 'Q4', 'OT',
+                    'FT', 'AET', 'PEN', 'AOT', 'PST', 'CANC', 'ABD', 'AWD', 'WO'}
+
+def kickoff_time(sport, game):
+    """Kickoff as a UTC timestamp, or None if the game has no parseable date."""
+    raw = game['fixture']['date'] if sport == 'Football' else game.get('date')
+    try:
+        kickoff = datetime.datetime.fromisoformat(raw.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if kickoff.tzinfo is None:
+        kickoff = kickoff.replace(tzinfo=datetime.timezone.utc)
+    return kickoff.timestamp()
+
+def game_status(sport, game):
+    status = game['fixture'].get('status') if sport == 'Football' else game.get('status')
+    return (status or {}).get('short')
+
+def base_interval(seconds_to_kickoff):
+    for bound, interval in POLL_SCHEDULE:
+        if bound is None or seconds_to_kickoff <= bound:
+            return interval
+
+def poll_interval(seconds_to_kickoff, volatility, stretch=1.0):
+    """Seconds until the next odds poll of a fixture.
+
+    Shorter near kickoff and when the odds have been moving; `stretch` (>= 1) spreads
+    polls out when the fixtures together would exceed the quota budget.
+    """
+    interval = base_interval(seconds_to_kickoff) / (1 + VOLATILITY_GAIN * volatility) * stretch
+    # Never sleep past kickoff, the last poll before it matters most
+    interval = min(interval, max(seconds_to_kickoff, MIN_INTERVAL))
+    return max(MIN_INTERVAL, interval)
+
+def odds_move(previous, current):
+    """Largest absolute log change of any odd present in both market snapshots."""
+    move = 0.0
+    for bet_name, selections in current.items():
+        before = previous.get(bet_name, {})
+        for selection, odd in selections.items():
+            old = before.get(selection)
+            if old and odd and old > 0 and odd > 0:
+                move = max(move, abs(math.log(odd / old)))
+    return move
+
+class TokenBucket:
+    """Async rate limiter: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, per_hour, clock=time.monotonic):
+        self.rate = per_hour / 3600.0
+        self.capacity = max(1.0, per_hour / 12.0)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class FixtureState:
+    __slots__ = ('sport', 'fixture_id', 'game', 'kickoff', 'markets', 'volatility', 'interval', 'polls')
+
+    def __init__(self, sport, fixture_id, game, kickoff):
+        self.sport = sport
+        self.fixture_id = fixture_id
+        self.game = game
+        self.kickoff = kickoff
+        self.markets = None
+        self.volatility = 0.0
+        self.interval = base_interval(kickoff - time.time())
+        self.polls = 0
+
+class LiveMonitor:
+    """Tracks the fixtures kicking off within a window and re-prices them as their odds move.
+
+    The engine plugs in its own blocking functions, which run in worker threads:
+      fetch_games(sport, config, dates) -> games
+      fetch_odds(fixture_id, config, sport) -> (winner odds, bookmaker, markets) or None
+      score(sport, game, config, odds) -> value bets
+      publish(bets) -> True once stored; called with the bets not published before
+      flush() -> called after each fixture refresh and at exit
+      flagged(sport, fixture_id) -> True to re-score even though the chosen bookmaker's
+        odds did not change (e.g. other bookmakers moved sharply)
+    """
+
+    def __init__(self, sports_config, fetch_games, fetch_odds, score, publish, flush=None, flagged=None,
+                 window_hours=DEFAULT_WINDOW_HOURS, quota_per_hour=DEFAULT_QUOTA_PER_HOUR,
+                 refresh_seconds=FIXTURE_REFRESH_SECONDS, metrics=None):
+        self.sports_config = sports_config
+        self.fetch_games = fetch_games
+        self.fetch_odds = fetch_odds
+        self.score = score
+        self.publish = publish
+        self.flush = flush
+        self.flagged = flagged
+        self.window = window_hours * 3600
+        self.quota_per_hour = quota_per_hour
+        self.refresh_seconds = refresh_seconds
+        self.metrics = metrics
+        self.buckets = {}
+        self.fixtures = {}   # (sport, fixture_id) -> FixtureState
+        self.trackers = {}   # (sport, fixture_id) -> asyncio.Task
+        self.published = set()
+
+    def _count(self, name, amount=1):
+        if self.metrics is not None:
+            self.metrics.increment(name, amount)
+
+    def stretch(self, sport):
+        """Factor by which polls of a sport must be spread out to stay within the quota."""
+        # Fixture refreshes spend part of the budget too
+        budget = self.quota_per_hour - 2 * 3600 / self.refresh_seconds
+        demand = sum(3600 / state.interval for state in self.fixtures.values() if state.sport == sport)
+        if budget <= 0:
+            return float('inf')
+        return max(1.0, demand / budget)
+
+    async def refresh_fixtures(self):
+        """Starts tracking games entering the window and stops those that left it."""
+        now = time.time()
+        today = datetime.datetime.utcnow()
+        dates = sorted({today.strftime("%Y-%m-%d"),
+                        (today + datetime.timedelta(seconds=self.window)).strftime("%Y-%m-%d")})
+        wanted = {}
+        for sport, config in self.sports_config.items():
+            for _ in dates:
+                await self.buckets[sport].acquire()
+            games = await asyncio.to_thread(self.fetch_games, sport, config, dates)
+            for game in games:
+                fixture_id = game['fixture']['id'] if sport == 'Football' else game.get('id')
+                kickoff = kickoff_time(sport, game)
+                if not fixture_id or kickoff is None or game_status(sport, game) in FINISHED_OR_LIVE:
+                    continue
+                if now < kickoff <= now + self.window:
+                    wanted[(sport, fixture_id)] = (game, kickoff)
+
+        for key, (game, kickoff) in wanted.items():
+            if key in self.fixtures:
+                self.fixtures[key].game = game
+                self.fixtures[key].kickoff = kickoff
+            else:
+                self.fixtures[key] = FixtureState(key[0], key[1], game, kickoff)
+                self.trackers[key] = asyncio.create_task(self.track(key))
+        for key in list(self.fixtures):
+            if key not in wanted:
+                self.stop_tracking(key)
+        print(f"[live] Tracking {len(self.fixtures)} fixtures kicking off in the next {self.window / 3600:.1f}h.")
+
+    def stop_tracking(self, key):
+        self.fixtures.pop(key, None)
+        task = self.trackers.pop(key, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    async def poll(self, state):
+        """Fetches a fixture's odds; re-scores it only when they changed."""
+        config = self.sports_config[state.sport]
+        await self.buckets[state.sport].acquire()
+        odds_res = await asyncio.to_thread(self.fetch_odds, state.fixture_id, config, state.sport)
+        state.polls += 1
+        self._count('live_polls')
+        if not odds_res:
+            return
+
+        markets = odds_res[2]
+        if state.markets is not None:
+            if markets == state.markets and not (self.flagged and self.flagged(state.sport, state.fixture_id)):
+                self._count('live_unchanged')
+                state.volatility *= 1 - VOLATILITY_ALPHA
+                return
+            move = odds_move(state.markets, markets)
+            state.volatility = VOLATILITY_ALPHA * move + (1 - VOLATILITY_ALPHA) * state.volatility
+        state.markets = markets
+
+        self._count('live_rescored')
+        bets = await asyncio.to_thread(self.score, state.sport, state.game, config, odds_res)
+        fresh = [bet for bet in bets if (bet['match_name'], bet['main_prediction']) not in self.published]
+        if not fresh:
+            return
+        stored = False
+        try:
+            stored = await asyncio.to_thread(self.publish, fresh)
+        finally:
+            if not stored:
+                # Bets that could not be stored are offered again: the next poll
+                # re-scores the fixture even if its odds did not move
+                state.markets = None
+        if stored:
+            self.published.update((bet['match_name'], bet['main_prediction']) for bet in fresh)
+            self._count('live_value_bets', len(fresh))
+
+    async def track(self, key):
+        state = self.fixtures[key]
+        while key in self.fixtures:
+            try:
+                await self.poll(state)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[live] Error polling {state.sport} {state.fixture_id}: {e}")
+
+            to_kickoff = state.kickoff - time.time()
+            if to_kickoff <= 0:
+                # The models price games before kickoff only
+                self.stop_tracking(key)
+                return
+            state.interval = poll_interval(to_kickoff, state.volatility)
+            await asyncio.sleep(poll_interval(to_kickoff, state.volatility, self.stretch(state.sport)))
+
+    async def run(self, duration=None):
+        """Refreshes fixtures every refresh_seconds until `duration` seconds have passed (forever if None)."""
+        self.buckets = {sport: TokenBucket(self.quota_per_hour) for sport in self.sports_config}
+        started = time.monotonic()
+        try:
+            while duration is None or time.monotonic() - started < duration:
+                try:
+                    await self.refresh_fixtures()
+                except Exception as e:
+                    print(f"[live] Error refreshing fixtures: {e}")
+                if self.flush is not None:
+                    await asyncio.to_thread(self.flush)
+                wait = self.refresh_seconds
+                if duration is not None:
+                    wait = min(wait, duration - (time.monotonic() - started))
+                await asyncio.sleep(max(0, wait))
+        finally:
+            for key in list(self.fixtures):
+                self.stop_tracking(key)
+            if self.flush is not None:
+                self.flush()
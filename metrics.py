@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the HTTP latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROM_PREFIX = "betting_engine"
+
+def new_run_id():
+    """Run id based on the UTC start time, e.g. 20240101T080000."""
+    return datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+
+class RunMetrics:
+    """Thread-safe counters, timers and histograms collected during one engine run."""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or new_run_id()
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.http = {}               # (sport, endpoint) -> histogram dict
+        self.quota_remaining = {}    # sport -> requests left for the day
+        self.fixtures_processed = {} # sport -> count
+        self.fixtures_skipped = {}   # (sport, reason) -> count
+        self.stage_seconds = {}      # stage -> accumulated wall time
+        self.values = {}             # free-form numbers added to the report
+
+    def observe_http(self, sport, endpoint, seconds, status=None):
+        """Records the latency of one API call."""
+        with self._lock:
+            hist = self.http.setdefault((sport, endpoint), {
+                'count': 0,
+                'sum': 0.0,
+                'max': 0.0,
+                'errors': 0,
+                'buckets': [0] * len(LATENCY_BUCKETS),
+            })
+            hist['count'] += 1
+            hist['sum'] += seconds
+            hist['max'] = max(hist['max'], seconds)
+            if status is None or status >= 400:
+                hist['errors'] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    hist['buckets'][i] += 1
+                    break
+
+    def set_quota(self, sport, remaining):
+        with self._lock:
+            self.quota_remaining[sport] = remaining
+
+    def fixture_processed(self, sport):
+        with self._lock:
+            self.fixtures_processed[sport] = self.fixtures_processed.get(sport, 0) + 1
+
+    def fixture_skipped(self, sport, reason, count=1):
+        with self._lock:
+            key = (sport, reason)
+            self.fixtures_skipped[key] = self.fixtures_skipped.get(key, 0) + count
+
+    def add_time(self, stage, seconds):
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def set_value(self, name, value):
+        with self._lock:
+            self.values[name] = value
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name):
+        """Accumulates the wall time of the enclosed block under `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def report(self):
+        """Machine-readable summary of the run."""
+        with self._lock:
+            http = {}
+            for (sport, endpoint), hist in sorted(self.http.items()):
+                http.setdefault(sport, {})[endpoint] = {
+                    'count': hist['count'],
+                    'errors': hist['errors'],
+                    'sum_seconds': round(hist['sum'], 4),
+                    'avg_seconds': round(hist['sum'] / hist['count'], 4) if hist['count'] else 0.0,
+                    'max_seconds': round(hist['max'], 4),
+                    'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS], hist['buckets'])),
+                }
+
+            skipped = {}
+            for (sport, reason), count in sorted(self.fixtures_skipped.items()):
+                skipped.setdefault(sport, {})[reason] = count
+
+            return {
+                'run_id': self.run_id,
+                'started_at': datetime.datetime.utcfromtimestamp(self.started_at).isoformat() + "Z",
+                'duration_seconds': round(time.time() - self.started_at, 3),
+                'http': http,
+                'quota_remaining': dict(self.quota_remaining),
+                'fixtures_processed': dict(self.fixtures_processed),
+                'fixtures_skipped': skipped,
+                'stage_seconds': {k: round(v, 4) for k, v in sorted(self.stage_seconds.items())},
+                'values': dict(self.values),
+            }
+
+    def prometheus(self):
+        """Renders the run in the Prometheus text exposition format."""
+        report = self.report()
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROM_PREFIX}_{name} {kind}")
+
+        metric("http_request_duration_seconds", "histogram", "API-Sports request latency.")
+        with self._lock:
+            for (sport, endpoint), hist in sorted(self.http.items()):
+                labels = f'sport="{sport}",endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, hist['buckets']):
+                    cumulative += count
+                    lines.append(f'{PROM_PREFIX}_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{PROM_PREFIX}_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist["count"]}')
+                lines.append(f'{PROM_PREFIX}_http_request_duration_seconds_sum{{{labels}}} {hist["sum"]:.6f}')
+                lines.append(f'{PROM_PREFIX}_http_request_duration_seconds_count{{{labels}}} {hist["count"]}')
+
+        metric("http_request_errors_total", "counter", "API-Sports requests that failed.")
+        for sport, endpoints in report['http'].items():
+            for endpoint, hist in endpoints.items():
+                lines.append(f'{PROM_PREFIX}_http_request_errors_total{{sport="{sport}",endpoint="{endpoint}"}} {hist["errors"]}')
+
+        metric("quota_remaining", "gauge", "API-Sports daily requests remaining.")
+        for sport, remaining in sorted(report['quota_remaining'].items()):
+            lines.append(f'{PROM_PREFIX}_quota_remaining{{sport="{sport}"}} {remaining}')
+
+        metric("fixtures_processed_total", "counter", "Fixtures analyzed with odds.")
+        for sport, count in sorted(report['fixtures_processed'].items()):
+            lines.append(f'{PROM_PREFIX}_fixtures_processed_total{{sport="{sport}"}} {count}')
+
+        metric("fixtures_skipped_total", "counter", "Fixtures skipped, by reason.")
+        for sport, reasons in report['fixtures_skipped'].items():
+            for reason, count in reasons.items():
+                lines.append(f'{PROM_PREFIX}_fixtures_skipped_total{{sport="{sport}",reason="{reason}"}} {count}')
+
+        metric("stage_seconds", "gauge", "Wall time spent per engine stage.")
+        for stage, seconds in report['stage_seconds'].items():
+            lines.append(f'{PROM_PREFIX}_stage_seconds{{stage="{stage}"}} {seconds}')
+
+        for name, value in sorted(report['values'].items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metric(name, "gauge", f"Run value '{name}'.")
+                lines.append(f'{PROM_PREFIX}_{name} {value}')
+
+        metric("run_duration_seconds", "gauge", "Total wall time of the last run.")
+        lines.append(f'{PROM_PREFIX}_run_duration_seconds {report["duration_seconds"]}')
+        metric("last_run_timestamp_seconds", "gauge", "Unix time the last run finished.")
+        lines.append(f'{PROM_PREFIX}_last_run_timestamp_seconds {int(time.time())}')
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, report_dir):
+        """Writes run-<id>.json and the engine.prom textfile; returns both paths."""
+        os.makedirs(report_dir, exist_ok=True)
+        json_path = os.path.join(report_dir, f"run-{self.run_id}.json")
+        prom_path = os.path.join(report_dir, "engine.prom")
+
+        with open(json_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+        # Write then rename so the node_exporter textfile collector never reads a partial file
+        tmp_path = prom_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, prom_path)
+
+        return json_path, prom_path
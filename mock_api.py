@@ -0,0 +1,185 @@
+import os
+import json
+import random
+import argparse
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Offline stand-in for the API-Sports endpoints the engine uses. Point the engine at it with
+#   FOOTBALL_API_URL=http://127.0.0.1:8099/football BASKETBALL_API_URL=http://127.0.0.1:8099/basketball
+# It also serves a second odds source for odds_providers, with differently spelled names:
+#   ODDS_PROVIDERS=feed ODDS_FEED_URL=http://127.0.0.1:8099/feed
+
+DEFAULT_PORT = int(os.environ.get("MOCK_API_PORT", "8099"))
+DEFAULT_GAMES = 6
+# Minutes between the kickoffs of consecutive mock games
+KICKOFF_SPACING = 20
+DAILY_QUOTA = 7500
+
+class MockBook:
+    """Fixtures kicking off shortly after startup, with odds that drift on every request."""
+
+    def __init__(self, games=DEFAULT_GAMES, spacing=KICKOFF_SPACING, volatility=0.02, seed=7):
+        self.rng = random.Random(seed)
+        self.volatility = volatility
+        self.lock = threading.Lock()
+        self.remaining = DAILY_QUOTA
+        now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+        self.games = {'football': {}, 'basketball': {}}
+        for sport, base_id in (('football', 100000), ('basketball', 200000)):
+            for i in range(games):
+                fixture_id = base_id + i
+                self.games[sport][fixture_id] = {
+                    'kickoff': now + datetime.timedelta(minutes=spacing * (i + 1)),
+                    'home': (base_id // 100 + 2 * i, f"Home {sport.title()} {i + 1}"),
+                    'away': (base_id // 100 + 2 * i + 1, f"Away {sport.title()} {i + 1}"),
+                    'markets': self.opening_markets(sport),
+                }
+
+    def opening_markets(self, sport):
+        home = self.rng.uniform(1.6, 3.2)
+        if sport == 'football':
+            return {
+                'Match Winner': {'Home': home, 'Draw': self.rng.uniform(3.0, 3.6), 'Away': self.rng.uniform(2.2, 4.5)},
+                'Goals Over/Under': {'Over 2.5': self.rng.uniform(1.7, 2.3), 'Under 2.5': self.rng.uniform(1.6, 2.2)},
+                'Both Teams Score': {'Yes': self.rng.uniform(1.6, 2.1), 'No': self.rng.uniform(1.7, 2.3)},
+            }
+        return {
+            'Home/Away': {'Home': home, 'Away': self.rng.uniform(1.5, 3.0)},
+            'Over/Under': {'Over 220.5': 1.9, 'Under 220.5': 1.9},
+        }
+
+    def take_request(self):
+        with self.lock:
+            self.remaining = max(0, self.remaining - 1)
+            return self.remaining
+
+    def fixtures(self, sport, day):
+        response = []
+        for fixture_id, game in self.games[sport].items():
+            if day and game['kickoff'].date().isoformat() != day:
+                continue
+            date = game['kickoff'].isoformat()
+            teams = {
+                'home': {'id': game['home'][0], 'name': game['home'][1]},
+                'away': {'id': game['away'][0], 'name': game['away'][1]},
+            }
+            league = {'id': 39 if sport == 'football' else 12, 'name': "Mock League"}
+            if sport == 'football':
+                response.append({
+                    'fixture': {'id': fixture_id, 'date': date, 'status': {'short': 'NS'}},
+                    'league': league, 'teams': teams, 'goals': {'home': None, 'away': None},
+                })
+            else:
+                response.append({
+                    'id': fixture_id, 'date': date, 'status': {'short': 'NS'},
+                    'league': league, 'teams': teams, 'scores': {'home': {'total': None}, 'away': {'total': None}},
+                })
+        return response
+
+    def odds(self, sport, fixture_id):
+        game = self.games[sport].get(fixture_id)
+        if game is None:
+            return []
+        with self.lock:
+            # Odds move more often and further as kickoff approaches
+            to_kickoff = (game['kickoff'] - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            scale = self.volatility * (1 + 2 * max(0.0, 1 - to_kickoff / 3600))
+            for selections in game['markets'].values():
+                for selection in selections:
+                    if self.rng.random() < 0.5:
+                        selections[selection] = max(1.01, selections[selection] * (1 + self.rng.gauss(0, scale)))
+            bets = [
+                {'name': name, 'values': [{'value': sel, 'odd': f"{odd:.2f}"} for sel, odd in selections.items()]}
+                for name, selections in game['markets'].items()
+            ]
+        return [{'bookmakers': [{'id': 8, 'name': 'Bet365', 'bets': bets}]}]
+
+    def feed(self, sport):
+        """The same games as another bookmaker lists them: other spellings, kickoff a few minutes off."""
+        events = []
+        with self.lock:
+            for game in self.games.get(sport, {}).values():
+                events.append({
+                    'sport': sport.title(),
+                    'home': f"{game['home'][1].upper()} FC",
+                    'away': game['away'][1].replace('Away', 'Äway'),
+                    'kickoff': (game['kickoff'] + datetime.timedelta(minutes=5)).isoformat(),
+                    'bookmaker': 'Pinnacle',
+                    'markets': {
+                        name: {sel: round(odd * self.rng.uniform(0.97, 1.05), 2) for sel, odd in selections.items()}
+                        for name, selections in game['markets'].items()
+                    },
+                })
+        return events
+
+class MockHandler(BaseHTTPRequestHandler):
+    book = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+        sport, endpoint = parts[0], '/'.join(parts[1:])
+
+        if sport == 'feed':
+            body = json.dumps(self.book.feed(params.get('sport', '').lower())).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if sport not in ('football', 'basketball'):
+            response = None
+        elif endpoint in ('fixtures', 'games'):
+            response = self.book.fixtures(sport, params.get('date'))
+        elif endpoint == 'odds':
+            fixture_id = params.get('fixture') or params.get('game') or '0'
+            response = self.book.odds(sport, int(fixture_id)) if fixture_id.isdigit() else []
+        else:
+            response = []
+
+        if response is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = json.dumps({'response': response, 'results': len(response)}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('x-ratelimit-requests-remaining', str(self.book.take_request()))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start(port=DEFAULT_PORT, **book_options):
+    """Starts the mock in a background thread and returns the server."""
+    MockHandler.book = MockBook(**book_options)
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the API-Sports endpoints used by the engine.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="games per sport")
+    parser.add_argument("--spacing", type=int, default=KICKOFF_SPACING, help="minutes between kickoffs")
+    parser.add_argument("--volatility", type=float, default=0.02, help="relative size of each odds move")
+    args = parser.parse_args()
+
+    MockHandler.book = MockBook(args.games, args.spacing, args.volatility)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), MockHandler)
+    print(f"Mock API on http://127.0.0.1:{args.port}/football and /basketball")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
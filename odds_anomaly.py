@@ -0,0 +1,139 @@
+import time
+import threading
+import numpy as np
+
+# Weight of the newest move in the moving variance
+ALPHA = 0.2
+# A move is sharp when it is this many standard deviations of the series' usual moves...
+STEAM_Z = 3.0
+# ...and at least this large in log-odds (about 3%)
+STEAM_MIN_MOVE = 0.03
+# Observations of a series before its moves are judged
+MIN_OBSERVATIONS = 3
+# A price this far (log-odds) from the bookmakers' median is an outlier
+OUTLIER_MIN_DEVIATION = 0.04
+MIN_BOOKMAKERS = 3
+# Series not updated for this long are dropped, so memory follows the tracked fixtures
+SERIES_TTL = 24 * 3600
+SWEEP_SECONDS = 600
+
+class OddsMovementDetector:
+    """Rolling statistics for every (sport, fixture, bookmaker, market, selection) price series.
+
+    Each series is one row of a few preallocated arrays: EW variance of its log
+    moves, last log price, count and last update time. A snapshot
+    updates its rows with vectorized arithmetic, so a polling cycle over thousands of
+    series costs one dict lookup per price plus a handful of array operations.
+    """
+
+    def __init__(self, capacity=4096, clock=time.time):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.rows = {}   # series key -> row
+        self.free = []
+        self.size = 0
+        self.move_var = np.zeros(capacity)
+        self.last = np.zeros(capacity)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.updated = np.zeros(capacity)
+        self.next_sweep = clock() + SWEEP_SECONDS
+
+    def _grow(self):
+        capacity = len(self.last) * 2
+        for name in ('move_var', 'last', 'count', 'updated'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _row(self, key):
+        row = self.rows.get(key)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                if self.size == len(self.last):
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self.rows[key] = row
+            self.count[row] = 0
+            self.move_var[row] = 0.0
+        return row
+
+    def sweep(self, now):
+        """Frees the rows of series that stopped updating."""
+        stale = [key for key, row in self.rows.items() if now - self.updated[row] > SERIES_TTL]
+        for key in stale:
+            self.free.append(self.rows.pop(key))
+        self.next_sweep = now + SWEEP_SECONDS
+
+    def observe(self, sport, fixture_id, books):
+        """Updates the series of one fixture snapshot ({bookmaker: {market: {selection: odd}}}).
+
+        Returns the signals it raises: dicts with kind 'steam' (sharp move of one
+        bookmaker's price) or 'outlier' (price far from the other bookmakers'), the
+        bookmaker, market, selection, odd and the size of the move or deviation.
+        """
+        keys, prices = [], []
+        for bookmaker, markets in books.items():
+            for market, selections in markets.items():
+                for selection, odd in selections.items():
+                    if odd and odd > 1:
+                        keys.append((bookmaker, market, selection))
+                        prices.append(odd)
+        if not keys:
+            return []
+
+        log_odds = np.log(np.array(prices, dtype=float))
+        now = self.clock()
+        with self.lock:
+            if now >= self.next_sweep:
+                self.sweep(now)
+            rows = np.array([self._row((sport, fixture_id) + key) for key in keys])
+
+            seen = self.count[rows] > 0
+            moves = np.where(seen, log_odds - self.last[rows], 0.0)
+            sd = np.sqrt(self.move_var[rows])
+            steam = (
+                (self.count[rows] >= MIN_OBSERVATIONS)
+                & (np.abs(moves) >= STEAM_MIN_MOVE)
+                & (np.abs(moves) >= STEAM_Z * sd)
+            )
+
+            self.move_var[rows] = np.where(seen, (1 - ALPHA) * (self.move_var[rows] + ALPHA * moves ** 2), 0.0)
+            self.last[rows] = log_odds
+            self.count[rows] += 1
+            self.updated[rows] = now
+
+        signals = [
+            {'kind': 'steam', 'bookmaker': keys[i][0], 'market': keys[i][1], 'selection': keys[i][2],
+             'odd': prices[i], 'size': round(float(moves[i]), 4)}
+            for i in np.flatnonzero(steam)
+        ]
+        signals.extend(self.outliers(keys, prices, log_odds))
+        return signals
+
+    def outliers(self, keys, prices, log_odds):
+        """Prices far from the median price of all bookmakers quoting the same selection."""
+        groups = {}
+        for i, (_, market, selection) in enumerate(keys):
+            groups.setdefault((market, selection), []).append(i)
+
+        signals = []
+        for indices in groups.values():
+            if len(indices) < MIN_BOOKMAKERS:
+                continue
+            group = log_odds[indices]
+            consensus = np.median(group)
+            deviation = group - consensus
+            for i, dev in zip(indices, deviation):
+                if abs(dev) >= OUTLIER_MIN_DEVIATION:
+                    signals.append({
+                        'kind': 'outlier', 'bookmaker': keys[i][0], 'market': keys[i][1], 'selection': keys[i][2],
+                        'odd': prices[i], 'size': round(float(dev), 4),
+                    })
+        return signals
+
+    def series_count(self):
+        return len(self.rows)
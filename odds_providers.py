@@ -0,0 +1,173 @@
+import os
+import glob
+import json
+import time
+import datetime
+
+import requests
+
+# Comma-separated extra odds sources, besides API-Sports: "files", "feed"
+ODDS_PROVIDERS = os.environ.get("ODDS_PROVIDERS", "")
+ODDS_DROP_DIR = os.environ.get("ODDS_DROP_DIR", "odds_drops")
+ODDS_FEED_URL = os.environ.get("ODDS_FEED_URL")
+# Seconds a provider's events are reused before fetching them again
+PROVIDER_TTL = 60
+
+def parse_kickoff(value):
+    """UTC timestamp of an ISO date string or epoch number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    kickoff = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if kickoff.tzinfo is None:
+        kickoff = kickoff.replace(tzinfo=datetime.timezone.utc)
+    return kickoff.timestamp()
+
+def normalize_event(raw, source):
+    """A provider event in the engine's shape, or None if it is incomplete.
+
+    Providers send {sport, home, away, kickoff, bookmaker, markets: {bet name: {selection: odd}}}.
+    """
+    try:
+        markets = {
+            str(bet_name): {str(selection): float(odd) for selection, odd in selections.items() if float(odd) > 1}
+            for bet_name, selections in raw['markets'].items()
+        }
+        return {
+            'sport': raw['sport'],
+            'home': raw['home'],
+            'away': raw['away'],
+            'kickoff': parse_kickoff(raw['kickoff']),
+            'bookmaker': raw.get('bookmaker') or source,
+            'markets': {name: selections for name, selections in markets.items() if selections},
+        }
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+class OddsProvider:
+    """Source of odds events not keyed by our fixture ids; subclasses implement fetch_raw."""
+
+    name = 'provider'
+
+    def __init__(self, ttl=PROVIDER_TTL):
+        self.ttl = ttl
+        self.cache = {}  # sport -> (fetched_at, events)
+
+    def fetch_raw(self, sport):
+        raise NotImplementedError
+
+    def events(self, sport):
+        """Normalized events of one sport, cached for `ttl` seconds."""
+        cached = self.cache.get(sport)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        events = []
+        for raw in self.fetch_raw(sport):
+            event = normalize_event(raw, self.name)
+            if event is not None and event['sport'] == sport:
+                events.append(event)
+        self.cache[sport] = (time.monotonic(), events)
+        return events
+
+class FileDropProvider(OddsProvider):
+    """Events from JSON files (a list of events each) dropped into a directory."""
+
+    name = 'files'
+
+    def __init__(self, directory=ODDS_DROP_DIR, ttl=PROVIDER_TTL):
+        super().__init__(ttl)
+        self.directory = directory
+        self.files = {}  # path -> (mtime, raw events)
+
+    def fetch_raw(self, sport):
+        raw = []
+        paths = sorted(glob.glob(os.path.join(self.directory, '*.json')))
+        for path in paths:
+            mtime = os.path.getmtime(path)
+            cached = self.files.get(path)
+            if cached is None or cached[0] != mtime:
+                try:
+                    with open(path) as f:
+                        cached = (mtime, json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"Skipping odds file {path}: {e}")
+                    continue
+                self.files[path] = cached
+            raw.extend(cached[1])
+        # Forget files that were removed
+        for path in set(self.files) - set(paths):
+            del self.files[path]
+        return raw
+
+class HttpFeedProvider(OddsProvider):
+    """Events from an HTTP endpoint returning a JSON list for ?sport=<sport>."""
+
+    name = 'feed'
+
+    def __init__(self, url=ODDS_FEED_URL, ttl=PROVIDER_TTL):
+        super().__init__(ttl)
+        self.url = url
+
+    def fetch_raw(self, sport):
+        response = requests.get(self.url, params={'sport': sport}, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+PROVIDER_TYPES = {
+    'files': FileDropProvider,
+    'feed': HttpFeedProvider,
+}
+
+def configured_providers(names=ODDS_PROVIDERS):
+    providers = []
+    for name in filter(None, (n.strip() for n in names.split(','))):
+        if name not in PROVIDER_TYPES:
+            print(f"Unknown odds provider '{name}', ignoring it.")
+            continue
+        if name == 'feed' and not ODDS_FEED_URL:
+            print("Odds provider 'feed' needs ODDS_FEED_URL, ignoring it.")
+            continue
+        providers.append(PROVIDER_TYPES[name]())
+    return providers
+
+def reverse_markets(markets):
+    """Markets of an event listed with the teams swapped, seen from our fixture's side.
+
+    The Home and Away sides trade places. A handicap line is quoted from its own side
+    ("Away +1.5" is the away team at +1.5, see settlement.unit_return), so the line
+    moves with the side unchanged: the event's "Home -1.5" is our "Away -1.5".
+    """
+    swap = {'Home': 'Away', 'Away': 'Home'}
+    reversed_markets = {}
+    for bet_name, selections in markets.items():
+        reversed_markets[bet_name] = {}
+        for selection, odd in selections.items():
+            side, _, line = selection.partition(' ')
+            if side in swap:
+                selection = swap[side] + (' ' + line if line else '')
+            reversed_markets[bet_name][selection] = odd
+    return reversed_markets
+
+def resolve_events(providers, sport, index):
+    """{fixture_id: {bookmaker: markets}} from every provider's events matched through `index`.
+
+    Events listing the teams the other way round have their sides swapped. Also
+    returns how many events could not be matched.
+    """
+    odds = {}
+    unmatched = 0
+    for provider in providers:
+        try:
+            events = provider.events(sport)
+        except Exception as e:
+            print(f"[{sport}] Odds provider '{provider.name}' failed: {e}")
+            continue
+        for event in events:
+            found = index.match(sport, event['home'], event['away'], event['kickoff'])
+            if found is None:
+                unmatched += 1
+                continue
+            fixture_id, reversed_order = found
+            markets = reverse_markets(event['markets']) if reversed_order else event['markets']
+            books = odds.setdefault(fixture_id, {})
+            books.setdefault(event['bookmaker'], {}).update(markets)
+    return odds, unmatched
@@ -0,0 +1,71 @@
+import streamlit as st
+import pandas as pd
+import datetime
+from dotenv import load_dotenv
+import rollups
+
+# Load environment variables
+load_dotenv()
+
+# Page Config
+st.set_page_config(page_title="Betting AI - Histórico", page_icon="📈", layout="wide")
+
+# Data Fetching
+@st.cache_data(ttl=600) # Rollups only change when bets are settled
+def get_history(start, end, sports, group_by):
+    return pd.DataFrame(rollups.history(start, end, sports, group_by))
+
+# Sidebar Filters
+st.sidebar.header("Filtros")
+today = datetime.date.today()
+date_range = st.sidebar.date_input("Período", (today - datetime.timedelta(days=90), today), max_value=today)
+sport_filter = st.sidebar.multiselect("Esporte", ["Football", "Basketball"], default=["Football", "Basketball"])
+
+# Main Content
+st.title("📈 Histórico de Desempenho")
+st.markdown("Resultado das apostas já liquidadas: ROI, taxa de acerto e calibração do modelo.")
+
+def show_history(start, end, sports):
+    by_day = get_history(start, end, sports, 'day')
+    if by_day.empty:
+        st.warning("Nenhuma aposta liquidada no período.")
+        return
+
+    # Metrics
+    bets = int(by_day['bets'].sum())
+    by_sport = get_history(start, end, sports, 'sport')
+    total_return = (by_sport['roi'].fillna(0) + 1).mul(by_sport['bets']).sum()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Apostas Liquidadas", bets)
+    col2.metric("ROI (stake fixa)", f"{total_return / bets - 1:+.1%}")
+    # Same hit rate as the tables: pushes are neither wins nor losses
+    decided = int(by_day['bets'].sum() - by_day['pushes'].sum())
+    col3.metric("Taxa de Acerto", f"{by_day['wins'].sum() / decided:.1%}" if decided else "-")
+
+    st.subheader("Lucro acumulado (unidades)")
+    by_day['lucro'] = (by_day['roi'].fillna(0) * by_day['bets']).cumsum()
+    st.line_chart(by_day.set_index('day')[['lucro']])
+
+    st.subheader("Por esporte")
+    st.dataframe(by_sport.set_index('sport')[['bets', 'hit_rate', 'roi', 'staked_roi']], use_container_width=True)
+
+    st.subheader("Por liga")
+    by_league = get_history(start, end, sports, 'league')
+    by_league = by_league.sort_values('bets', ascending=False).head(20)
+    st.bar_chart(by_league.set_index('league')[['roi']])
+    st.dataframe(by_league.set_index(['sport', 'league'])[['bets', 'hit_rate', 'roi', 'staked_roi']], use_container_width=True)
+
+    st.subheader("Calibração por faixa de confiança")
+    by_confidence = get_history(start, end, sports, 'confidence')
+    by_confidence['faixa'] = by_confidence['confidence_bucket'].map(lambda b: f"{b}-{b + rollups.CONFIDENCE_BUCKET}%")
+    by_confidence = by_confidence.set_index('faixa')
+    st.line_chart(by_confidence[['predicted', 'observed']])
+    st.dataframe(by_confidence[['bets', 'predicted', 'observed', 'roi']], use_container_width=True)
+
+try:
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        show_history(date_range[0], date_range[1], tuple(sport_filter))
+    else:
+        st.info("Selecione a data inicial e a final.")
+except Exception as e:
+    st.error(f"Erro ao carregar histórico: {e}")
@@ -0,0 +1,136 @@
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+import functools
+import tracemalloc
+
+class FunctionTimer:
+    """Accumulates call count, wall time and CPU time per instrumented function."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+
+    def record(self, name, wall, cpu):
+        with self._lock:
+            entry = self.timings.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'max_wall_seconds': 0.0})
+            entry['calls'] += 1
+            entry['wall_seconds'] += wall
+            entry['cpu_seconds'] += cpu
+            entry['max_wall_seconds'] = max(entry['max_wall_seconds'], wall)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            wall_start = time.perf_counter()
+            # thread_time is per thread, so CPU stays correct inside the sport workers
+            cpu_start = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+        return timed
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {
+                    'calls': t['calls'],
+                    'wall_seconds': round(t['wall_seconds'], 4),
+                    'cpu_seconds': round(t['cpu_seconds'], 4),
+                    'avg_wall_seconds': round(t['wall_seconds'] / t['calls'], 4) if t['calls'] else 0.0,
+                    'max_wall_seconds': round(t['max_wall_seconds'], 4),
+                }
+                for name, t in sorted(self.timings.items())
+            }
+
+class RunProfiler:
+    """cProfile of the main and worker threads, per-function timers and optional tracemalloc."""
+
+    def __init__(self, run_id, output_dir, memory=False, top=40):
+        self.run_id = run_id
+        self.output_dir = output_dir
+        self.memory = memory
+        self.top = top
+        self.timer = FunctionTimer()
+        self._main_profile = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+
+    def instrument(self, namespace, names):
+        """Replaces the named functions in `namespace` (a module's globals) with timed wrappers."""
+        for name in names:
+            namespace[name] = self.timer.wrap(name, namespace[name])
+
+    def _start_thread_profile(self, frame, event, arg):
+        # Called once in each new thread; enabling the profile replaces this hook
+        profile = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        if self.memory:
+            tracemalloc.start(25)
+        threading.setprofile(self._start_thread_profile)
+        self._main_profile.enable()
+
+    def stop(self):
+        """Stops profiling and writes the artifacts; returns their paths."""
+        self._main_profile.disable()
+        threading.setprofile(None)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{self.run_id}")
+        paths = []
+
+        stats = None
+        for profile in [self._main_profile] + self._thread_profiles:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                continue  # Thread that never ran profiled code
+
+        if stats is not None:
+            stats.dump_stats(base + ".pstats")
+            paths.append(base + ".pstats")
+
+            text = io.StringIO()
+            stats.stream = text
+            stats.sort_stats('cumulative').print_stats(self.top)
+            with open(base + ".txt", 'w') as f:
+                f.write(text.getvalue())
+            paths.append(base + ".txt")
+
+        summary = {'run_id': self.run_id, 'functions': self.timer.summary()}
+        if self.memory:
+            summary['memory'] = self._memory_summary()
+            tracemalloc.stop()
+
+        with open(base + "-functions.json", 'w') as f:
+            json.dump(summary, f, indent=2)
+        paths.append(base + "-functions.json")
+
+        return paths
+
+    def _memory_summary(self):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        return {
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top_allocations': [
+                {'location': str(stat.traceback[0]), 'size_bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:self.top]
+            ],
+        }
@@ -0,0 +1,152 @@
+import argparse
+import datetime
+
+from psycopg2.extras import execute_values
+
+import db
+from settlement import unit_return
+
+# Width of the confidence buckets, in percentage points
+CONFIDENCE_BUCKET = 10
+
+ROLLUP_COLUMNS = ['bets', 'wins', 'pushes', 'returns', 'stake_sum', 'stake_returns', 'probability_sum']
+
+def confidence_bucket(confidence_level):
+    return int(confidence_level) // CONFIDENCE_BUCKET * CONFIDENCE_BUCKET
+
+def bet_status(value):
+    if value is None:
+        return 'void'
+    if value > 1:
+        return 'won'
+    if value == 1:
+        return 'push'
+    return 'lost'
+
+def settle_bets():
+    """Settles pending bets whose result is stored and adds them to bet_rollups.
+
+    Rows are locked while settled, so every bet is counted in the rollups exactly once.
+    A pick stored on several days (same fixture, market and selection) counts once,
+    on the day it was first found. Returns the number of bets settled.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT b.id, b.created_at::date, b.sport, b.league, b.fixture_id, b.market, b.selection,
+                   b.confidence_level, b.odds_value, b.model_probability, b.stake_fraction,
+                   r.home_score, r.away_score
+            FROM bets_analysis b
+            JOIN match_results r ON r.sport = b.sport AND r.fixture_id = b.fixture_id
+            WHERE b.status = 'pending' AND b.market IS NOT NULL
+              AND r.home_score IS NOT NULL AND r.away_score IS NOT NULL
+            ORDER BY b.created_at, b.id
+            FOR UPDATE OF b SKIP LOCKED
+        """)
+        rows = cur.fetchall()
+        if not rows:
+            cur.close()
+            return 0
+
+        updates = []
+        totals = {}
+        counted = set()
+        for (bet_id, day, sport, league, fixture_id, market, selection, confidence, odd, probability, stake,
+             home_score, away_score) in rows:
+            value = unit_return(market, selection, float(odd), home_score, away_score)
+            updates.append((bet_id, bet_status(value), value))
+
+            pick = (sport, fixture_id, market, selection)
+            if value is None or pick in counted:
+                continue
+            counted.add(pick)
+
+            key = (day, sport, league or '', confidence_bucket(confidence))
+            total = totals.setdefault(key, dict.fromkeys(ROLLUP_COLUMNS, 0))
+            total['bets'] += 1
+            total['wins'] += value > 1
+            total['pushes'] += value == 1
+            total['returns'] += value
+            total['stake_sum'] += stake or 0.0
+            total['stake_returns'] += (stake or 0.0) * value
+            total['probability_sum'] += probability if probability is not None else confidence / 100
+
+        execute_values(cur, """
+            UPDATE bets_analysis AS b SET status = v.status, unit_return = v.unit_return, settled_at = NOW()
+            FROM (VALUES %s) AS v (id, status, unit_return)
+            WHERE b.id = v.id
+        """, updates, template="(%s, %s, %s::double precision)")
+
+        if totals:
+            execute_values(cur, f"""
+                INSERT INTO bet_rollups (day, sport, league, confidence_bucket, {', '.join(ROLLUP_COLUMNS)})
+                VALUES %s
+                ON CONFLICT (day, sport, league, confidence_bucket) DO UPDATE SET
+                {', '.join(f'{col} = bet_rollups.{col} + EXCLUDED.{col}' for col in ROLLUP_COLUMNS)},
+                updated_at = NOW()
+            """, [key + tuple(total[col] for col in ROLLUP_COLUMNS) for key, total in totals.items()])
+        cur.close()
+    return len(updates)
+
+# --- Reads ---
+
+GROUPINGS = {
+    'day': 'day',
+    'sport': 'sport',
+    'league': 'sport, league',
+    'confidence': 'confidence_bucket',
+}
+
+def history(start, end, sports=None, group_by='day'):
+    """Aggregated performance between two days, grouped by GROUPINGS[group_by].
+
+    Each row has bets, wins, pushes, hit_rate (wins over bets not pushed), roi (flat
+    stakes), staked_roi (Kelly stakes), predicted and observed win rates.
+    """
+    keys = GROUPINGS[group_by]
+    where = ["day BETWEEN %s AND %s"]
+    args = [start, end]
+    if sports:
+        where.append("sport = ANY(%s)")
+        args.append(list(sports))
+
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT {keys},
+                   SUM(bets) AS bets,
+                   SUM(wins) AS wins,
+                   SUM(pushes) AS pushes,
+                   SUM(wins)::float / NULLIF(SUM(bets) - SUM(pushes), 0) AS hit_rate,
+                   SUM(returns) / NULLIF(SUM(bets), 0) - 1 AS roi,
+                   SUM(stake_returns) / NULLIF(SUM(stake_sum), 0) - 1 AS staked_roi,
+                   SUM(probability_sum) / NULLIF(SUM(bets), 0) AS predicted,
+                   SUM(wins)::float / NULLIF(SUM(bets), 0) AS observed
+            FROM bet_rollups
+            WHERE {' AND '.join(where)}
+            GROUP BY {keys}
+            ORDER BY {keys}
+        """, args)
+        columns = [col.name for col in cur.description]
+        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+        cur.close()
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Settle stored bets and print their rolled-up performance.")
+    parser.add_argument("command", choices=["settle", "show"])
+    parser.add_argument("--days", type=int, default=30, help="show: days of history")
+    parser.add_argument("--by", choices=list(GROUPINGS), default="sport")
+    args = parser.parse_args()
+
+    if not db.DATABASE_URL:
+        print("Error: DATABASE_URL not found.")
+    elif args.command == "settle":
+        try:
+            print(f"Settled {settle_bets()} bets.")
+        except Exception as e:
+            print(f"Settlement error: {e}")
+    else:
+        end = datetime.date.today()
+        for row in history(end - datetime.timedelta(days=args.days), end, group_by=args.by):
+            print(row)
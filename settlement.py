@@ -0,0 +1,50 @@
+from goal_model import split_line
+
+def _line_return(adjusted, odd):
+    """Gross return per unit of a half/whole line bet that wins when adjusted > 0."""
+    if adjusted > 0:
+        return odd
+    if adjusted == 0:
+        return 1.0
+    return 0.0
+
+def unit_return(market, selection, odd, home_score, away_score):
+    """Gross return per unit staked on a settled selection: odd if won, 1 on a push, 0 if lost.
+
+    Quarter lines average their two halves. Returns None for markets the engine
+    does not price.
+    """
+    margin = home_score - away_score
+    total = home_score + away_score
+
+    if market in ('Match Winner', 'Home/Away'):
+        won = {'Home': margin > 0, 'Draw': margin == 0, 'Away': margin < 0}.get(selection)
+        return None if won is None else (odd if won else 0.0)
+
+    if market == 'Both Teams Score':
+        both = home_score > 0 and away_score > 0
+        won = {'Yes': both, 'No': not both}.get(selection)
+        return None if won is None else (odd if won else 0.0)
+
+    try:
+        side, line = selection.split()
+        line = float(line)
+    except ValueError:
+        return None
+
+    if market in ('Goals Over/Under', 'Over/Under'):
+        if side == 'Over':
+            values = [total - part for part in split_line(line)]
+        elif side == 'Under':
+            values = [part - total for part in split_line(line)]
+        else:
+            return None
+    elif market == 'Asian Handicap':
+        if side not in ('Home', 'Away'):
+            return None
+        signed = margin if side == 'Home' else -margin
+        values = [signed + part for part in split_line(line)]
+    else:
+        return None
+
+    return sum(_line_return(value, odd) for value in values) / len(values)
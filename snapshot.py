@@ -0,0 +1,110 @@
+import os
+import datetime
+
+try:
+    import pyarrow as pa
+except ImportError:  # Snapshots are optional; readers fall back to SQL
+    pa = None
+
+# The dashboard reads snapshots from its own disk, so they only help when the engine
+# writes them where the dashboard runs (the daemon on the dashboard host, or a shared
+# volume mounted as SNAPSHOT_DIR on both). The scheduled GitHub Actions run writes
+# them on a throwaway runner: the dashboard never sees those and reads Postgres.
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+LATEST_NAME = "bets-latest.arrow"
+
+# Columns the dashboard reads, in its display order
+SNAPSHOT_COLUMNS = [
+    'match_name', 'match_time', 'league', 'sport', 'main_prediction', 'secondary_prediction',
+    'confidence_level', 'odds_value', 'stake_fraction', 'ai_justification', 'justification_codes', 'created_at',
+]
+
+def available():
+    return pa is not None
+
+def _schema():
+    return pa.schema([
+        ('match_name', pa.string()),
+        ('match_time', pa.string()),
+        ('league', pa.string()),
+        ('sport', pa.string()),
+        ('main_prediction', pa.string()),
+        ('secondary_prediction', pa.string()),
+        ('confidence_level', pa.int32()),
+        ('odds_value', pa.float64()),
+        ('stake_fraction', pa.float64()),
+        ('ai_justification', pa.string()),
+        ('justification_codes', pa.string()),
+        ('created_at', pa.timestamp('us')),
+    ])
+
+def latest_path(snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, LATEST_NAME)
+
+def _read(path):
+    """Memory-maps an Arrow IPC file; the returned table references the mapped pages."""
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+def snapshot_date(table):
+    metadata = table.schema.metadata or {}
+    return metadata.get(b'date', b'').decode()
+
+def write_snapshot(bets, run_id, snapshot_dir=SNAPSHOT_DIR):
+    """Writes this run's bets as an Arrow file and refreshes the day's latest snapshot.
+
+    The latest snapshot keeps today's bets from earlier runs, deduplicated on
+    (match_name, main_prediction) like save_to_db, so it matches the rows in the DB.
+    Returns the path of the latest snapshot, or None if pyarrow is not installed.
+    """
+    if pa is None:
+        return None
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    today = datetime.date.today().isoformat()
+    created_at = datetime.datetime.now()
+    rows = [{**{col: bet.get(col) for col in SNAPSHOT_COLUMNS}, 'created_at': created_at} for bet in bets]
+
+    schema = _schema().with_metadata({'date': today, 'run_id': run_id})
+    run_table = pa.Table.from_pylist(rows, schema=schema)
+    _write(run_table, os.path.join(snapshot_dir, f"bets-{run_id}.arrow"))
+
+    latest = latest_path(snapshot_dir)
+    if os.path.exists(latest):
+        previous = _read(latest)
+        if snapshot_date(previous) == today:
+            if 'justification_codes' not in previous.schema.names:
+                # Written before reason codes existed: those bets keep their text
+                previous = previous.append_column('justification_codes', pa.nulls(len(previous), pa.string()))
+                previous = previous.select(schema.names)
+            seen = {(row['match_name'], row['main_prediction']) for row in previous.to_pylist()}
+            fresh = [row for row in rows if (row['match_name'], row['main_prediction']) not in seen]
+            run_table = pa.concat_tables([
+                previous.cast(schema),
+                pa.Table.from_pylist(fresh, schema=schema),
+            ])
+
+    _write(run_table, latest)
+    return latest
+
+def _write(table, path):
+    # Write then rename so readers never map a partial file
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+def load_today(snapshot_dir=SNAPSHOT_DIR):
+    """Today's bets as a DataFrame sorted like the dashboard query, or None if there is no fresh snapshot."""
+    if pa is None:
+        return None
+
+    path = latest_path(snapshot_dir)
+    if not os.path.exists(path):
+        return None
+
+    table = _read(path)
+    if snapshot_date(table) != datetime.date.today().isoformat():
+        return None
+    return table.to_pandas().sort_values('confidence_level', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,187 @@
+import time
+import argparse
+import numpy as np
+import db
+
+DATABASE_URL = db.DATABASE_URL
+
+# Share of the full Kelly stake actually bet
+KELLY_FRACTION = 0.25
+# Hard caps per bet and for the whole day, as fractions of the bankroll
+MAX_STAKE = 0.05
+MAX_DAILY_EXPOSURE = 0.25
+
+DEFAULT_PATHS = 10000
+DEFAULT_ROUNDS = 100
+DEFAULT_SEED = 2024
+# A path is ruined once its bankroll falls below this fraction of the start
+RUIN_LEVEL = 0.5
+
+def bet_probability(bet):
+    """Model probability of a bet; rows read back from the DB only have the confidence level."""
+    if bet.get('model_probability') is not None:
+        return float(bet['model_probability'])
+    return bet['confidence_level'] / 100
+
+def bet_market(bet):
+    """Market of a bet; older rows without one are winner bets when the prediction says so."""
+    if bet.get('market'):
+        return bet['market']
+    return 'Match Winner' if bet['main_prediction'].startswith('Win ') else bet['main_prediction']
+
+def kelly_fraction(probability, odd):
+    """Full Kelly stake for a binary bet at decimal odds, never negative."""
+    if odd <= 1:
+        return 0.0
+    return max(0.0, (probability * odd - 1) / (odd - 1))
+
+def stake_bets(bets, fraction=KELLY_FRACTION, max_stake=MAX_STAKE, max_exposure=MAX_DAILY_EXPOSURE):
+    """Fractional-Kelly stakes for a day's bets; also stored as bet['stake_fraction'].
+
+    Picks on the same match_name are correlated, so their combined stake is scaled
+    down to the largest single stake among them: the match as a whole never gets more
+    exposure than its best pick alone would. The day's total is then capped at
+    `max_exposure`.
+    """
+    stakes = [
+        min(max_stake, fraction * kelly_fraction(bet_probability(bet), float(bet['odds_value'])))
+        for bet in bets
+    ]
+
+    groups = {}
+    for i, bet in enumerate(bets):
+        groups.setdefault(bet['match_name'], []).append(i)
+    for indices in groups.values():
+        total = sum(stakes[i] for i in indices)
+        cap = max(stakes[i] for i in indices)
+        if total > cap > 0:
+            for i in indices:
+                stakes[i] *= cap / total
+
+    total = sum(stakes)
+    if total > max_exposure:
+        stakes = [stake * max_exposure / total for stake in stakes]
+
+    for bet, stake in zip(bets, stakes):
+        bet['stake_fraction'] = round(stake, 5)
+    return stakes
+
+def bet_line(bet):
+    """(market, line) shared by the complementary selections of one line.
+
+    Over/Under 2.5 share ('Goals Over/Under', 2.5); Away +1.5 is the other side of
+    Home -1.5, so handicaps are keyed from the home side. Selections without a line
+    (1X2, moneyline, both teams score) share their market's key.
+    """
+    market = bet_market(bet)
+    try:
+        side, line = (bet.get('selection') or '').split()
+        line = float(line)
+    except ValueError:
+        return market, None
+    return market, -line if side == 'Away' else line
+
+def outcome_intervals(bets):
+    """Match index, interval start and width on that match's uniform draw for each bet.
+
+    Every match gets one uniform draw per round. Complementary selections of the same
+    line are mutually exclusive, so they get consecutive intervals; other lines and
+    markets of the match (nested totals, several handicaps) start at 0 and therefore
+    win together as often as possible, the conservative choice for drawdown and ruin.
+    Intervals wrap around 1 instead of being clipped, so every bet keeps its own
+    probability even when its line's probabilities add up to more than 1.
+    """
+    match_index = {}
+    offsets = {}
+    matches, lows, widths = [], [], []
+    for bet in bets:
+        match = match_index.setdefault(bet['match_name'], len(match_index))
+        key = (match,) + bet_line(bet)
+        probability = min(1.0, bet_probability(bet))
+        low = offsets.get(key, 0.0)
+        offsets[key] = (low + probability) % 1.0
+        matches.append(match)
+        lows.append(low)
+        widths.append(probability)
+    return np.array(matches), np.array(lows), np.array(widths), len(match_index)
+
+def round_wins(draws, lows, widths):
+    """Which bets win, given each bet's match draw (the last axis holds the bets)."""
+    return (draws - lows) % 1.0 < widths
+
+def simulate_bankroll(bets, stakes, n_paths=DEFAULT_PATHS, n_rounds=DEFAULT_ROUNDS, seed=DEFAULT_SEED, ruin_level=RUIN_LEVEL):
+    """Replays the portfolio for n_rounds on n_paths bankrolls at once.
+
+    Stakes are fractions of the current bankroll, outcomes are drawn from the model
+    probabilities. Returns final bankroll, drawdown and ruin statistics.
+    """
+    if not bets:
+        return None
+
+    rng = np.random.default_rng(seed)
+    matches, lows, widths, n_matches = outcome_intervals(bets)
+    stakes = np.asarray(stakes, dtype=float)
+    odds = np.array([float(bet['odds_value']) for bet in bets])
+    stake_total = stakes.sum()
+    win_payout = stakes * odds
+
+    bankroll = np.ones(n_paths)
+    peak = np.ones(n_paths)
+    max_drawdown = np.zeros(n_paths)
+    ruined = np.zeros(n_paths, dtype=bool)
+
+    for _ in range(n_rounds):
+        draws = rng.random((n_paths, n_matches))[:, matches]
+        wins = round_wins(draws, lows, widths)
+        bankroll *= np.maximum(1 + wins @ win_payout - stake_total, 0)
+        peak = np.maximum(peak, bankroll)
+        max_drawdown = np.maximum(max_drawdown, 1 - bankroll / peak)
+        ruined |= bankroll < ruin_level
+
+    return {
+        'paths': n_paths,
+        'rounds': n_rounds,
+        'bets': len(bets),
+        'stake_per_round': round(float(stake_total), 5),
+        'expected_roi_per_round': round(float(np.sum(stakes * widths * odds) - stake_total), 5),
+        'final_bankroll_mean': round(float(bankroll.mean()), 4),
+        'final_bankroll_median': round(float(np.median(bankroll)), 4),
+        'final_bankroll_p5': round(float(np.percentile(bankroll, 5)), 4),
+        'final_bankroll_p95': round(float(np.percentile(bankroll, 95)), 4),
+        'probability_of_loss': round(float(np.mean(bankroll < 1)), 4),
+        'max_drawdown_mean': round(float(max_drawdown.mean()), 4),
+        'max_drawdown_p95': round(float(np.percentile(max_drawdown, 95)), 4),
+        'risk_of_ruin': round(float(ruined.mean()), 4),
+    }
+
+def load_today_bets():
+    return db.todays_bets()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kelly stakes and bankroll simulation for today's bets.")
+    parser.add_argument("--fraction", type=float, default=KELLY_FRACTION, help="share of full Kelly to bet")
+    parser.add_argument("--max-stake", type=float, default=MAX_STAKE, help="cap per bet as a bankroll fraction")
+    parser.add_argument("--paths", type=int, default=DEFAULT_PATHS)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    if not DATABASE_URL:
+        print("Error: DATABASE_URL not found.")
+    else:
+        try:
+            bets = load_today_bets()
+            if not bets:
+                print("Nenhuma aposta encontrada no banco ainda.")
+            else:
+                stakes = stake_bets(bets, args.fraction, args.max_stake)
+                for bet, stake in zip(bets, stakes):
+                    print(f"{stake:6.2%}  {bet['match_name']} - {bet['main_prediction']} @ {bet['odds_value']}")
+
+                start = time.perf_counter()
+                report = simulate_bankroll(bets, stakes, args.paths, args.rounds, args.seed)
+                print(f"\nSimulation ({time.perf_counter() - start:.2f}s):")
+                for key, value in report.items():
+                    print(f"  {key}: {value}")
+        except Exception as e:
+            print(f"Error simulating bankroll: {e}")
@@ -0,0 +1,37 @@
+import pytest
+
+import analysis_engine
+import elo
+import justifications
+
+GAME = {
+    'id': 501, 'date': '2026-10-19T23:00:00+00:00', 'league': {'id': 12, 'name': 'NBA'},
+    'teams': {'home': {'id': 1, 'name': 'Lakers'}, 'away': {'id': 2, 'name': 'Celtics'}},
+}
+MARKETS = {'Home/Away': {'Home': 2.6, 'Away': 1.5}}
+ODDS = {501: (MARKETS['Home/Away'], 'Bet365', MARKETS)}
+
+@pytest.fixture(autouse=True)
+def empty_models(monkeypatch):
+    monkeypatch.setattr(analysis_engine.PROFILES, 'teams', {})
+    monkeypatch.setattr(analysis_engine.RATINGS, 'ratings', {})
+
+def test_games_without_profiles_still_price_the_moneyline():
+    bets = analysis_engine.analyze_basketball_slate([GAME], {}, ODDS)
+    assert [(b['market'], b['selection']) for b in bets] == [('Home/Away', 'Home')]
+    bet = bets[0]
+    assert bet['main_prediction'] == 'Win Lakers'
+    assert 0.5 < bet['model_probability'] < 1
+    assert 'Lakers tem' in justifications.render('Basketball', bet['match_name'], bet['justification_codes'])
+
+def test_fallback_uses_elo_when_both_teams_are_rated(monkeypatch):
+    monkeypatch.setattr(analysis_engine.RATINGS, 'rated', lambda sport, team: True)
+    monkeypatch.setattr(analysis_engine.RATINGS, 'get', lambda sport, team: (1300.0 if team == 1 else 1700.0, 50))
+    bets = analysis_engine.analyze_basketball_slate([GAME], {}, ODDS)
+    probs = elo.match_probability('Basketball', 1300.0, 1700.0)
+    away = probs['away_win'] / (probs['home_win'] + probs['away_win'])
+    # The away side is rated far higher: its edge over the 1.5 price (implied 0.667) is value
+    assert [(b['market'], b['selection'], b['main_prediction']) for b in bets] == [('Home/Away', 'Away', 'Win Celtics')]
+    assert bets[0]['model_probability'] == pytest.approx(away)
+    assert away == pytest.approx(0.87, abs=0.01)
+    assert analysis_engine.METRICS.values.get('basketball_fallback_elo')
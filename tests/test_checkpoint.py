@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+
+import pytest
+
+import checkpoint
+import db
+
+class FakeTable:
+    """run_checkpoints as a dict, answering the few statements RunCheckpoint runs."""
+
+    def __init__(self):
+        self.rows = {}
+        self.result = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, args=()):
+        verb = query.split()[0]
+        if verb == 'INSERT':
+            run_id, kind, sport, key, payload = args
+            self.rows[(run_id, kind, sport, key)] = payload.adapted
+        elif verb == 'SELECT':
+            self.result = [key[1:] + (payload,) for key, payload in self.rows.items() if key[0] == args[0]]
+        elif verb == 'DELETE' and 'run_id' in query:
+            self.rows = {key: payload for key, payload in self.rows.items() if key[0] != args[0]}
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def table(monkeypatch):
+    fake = FakeTable()
+
+    @contextmanager
+    def connection():
+        yield fake
+    monkeypatch.setattr(db, 'connection', connection)
+    return fake
+
+def test_resume_reuses_the_interrupted_runs_entries(table):
+    first = checkpoint.RunCheckpoint()
+    assert first.start('run-1') == 0
+    first.put('odds', 'Football', 10, {'odds': [{'Home': 2.0}, 'Bet365', {}]})
+    first.put('bets', 'Football', 10, [])
+    checkpoint.RunCheckpoint().start('run-2')
+
+    resumed = checkpoint.RunCheckpoint()
+    assert resumed.start('run-1', resume=True) == 2
+    assert resumed.get('odds', 'Football', '10') == {'odds': [{'Home': 2.0}, 'Bet365', {}]}
+    # An analyzed fixture without bets is done, unlike one never checkpointed
+    assert resumed.get('bets', 'Football', 10) == []
+    assert resumed.get('bets', 'Football', 11) is None
+
+def test_a_fresh_start_discards_the_runs_entries(table):
+    first = checkpoint.RunCheckpoint()
+    first.start('run-1')
+    first.put('bets', 'Football', 10, [])
+    assert checkpoint.RunCheckpoint().start('run-1') == 0
+    assert checkpoint.RunCheckpoint().start('run-1', resume=True) == 0
+
+def test_nothing_is_stored_before_start(table):
+    checkpoint.RunCheckpoint().put('bets', 'Football', 10, [])
+    assert table.rows == {}
@@ -0,0 +1,87 @@
+import time
+import threading
+
+import psycopg2.pool
+import pytest
+
+import db
+
+class FakeConnection:
+    closed = 0
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+class StrictPool:
+    """Raises when exhausted, like psycopg2's ThreadedConnectionPool."""
+
+    def __init__(self, size):
+        self.size = size
+        self.used = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def getconn(self):
+        with self.lock:
+            if self.used >= self.size:
+                raise psycopg2.pool.PoolError("connection pool exhausted")
+            self.used += 1
+            self.peak = max(self.peak, self.used)
+        return FakeConnection()
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.used -= 1
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = StrictPool(db.POOL_SIZE)
+    monkeypatch.setattr(db, '_pool', fake)
+    return fake
+
+def test_more_callers_than_connections_wait_their_turn(pool):
+    errors = []
+
+    def borrow():
+        try:
+            with db.connection():
+                time.sleep(0.02)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=borrow) for _ in range(db.POOL_SIZE * 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert pool.peak == db.POOL_SIZE
+    assert pool.used == 0
+
+def test_checkout_times_out_when_every_connection_stays_busy(pool, monkeypatch):
+    monkeypatch.setattr(db, 'POOL_TIMEOUT', 0.05)
+    release = threading.Event()
+    holding = threading.Barrier(db.POOL_SIZE + 1)
+
+    def hold():
+        with db.connection():
+            holding.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(db.POOL_SIZE)]
+    for thread in threads:
+        thread.start()
+    holding.wait()
+    try:
+        with pytest.raises(psycopg2.pool.PoolError):
+            with db.connection():
+                pass
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+    with db.connection():
+        pass
@@ -0,0 +1,57 @@
+import fixture_index
+import odds_providers
+
+KICKOFF = 1760000000.0
+
+def make_index():
+    index = fixture_index.FixtureIndex(aliases={})
+    index.add('Football', 1, 'Arsenal', 'Chelsea', KICKOFF)
+    index.add('Football', 2, 'Atlético de Madrid', 'Real Betis', KICKOFF + 3 * 3600)
+    return index
+
+def test_normalize_name_drops_accents_and_club_tokens():
+    assert fixture_index.normalize_name('Atlético de Madrid') == 'atletico madrid'
+    assert fixture_index.normalize_name('Chelsea F.C.') == 'chelsea'
+
+def test_match_in_listed_order():
+    assert make_index().match('Football', 'Arsenal FC', 'Chelsea', KICKOFF + 600) == (1, False)
+
+def test_match_with_teams_reversed():
+    assert make_index().match('Football', 'Chelsea FC', 'Arsenal', KICKOFF) == (1, True)
+
+def test_single_known_team_keeps_its_orientation():
+    index = make_index()
+    assert index.match('Football', 'Arsenal', 'Unknown United', KICKOFF) == (1, False)
+    assert index.match('Football', 'Unknown United', 'Arsenal', KICKOFF) == (1, True)
+    assert index.match('Football', 'Real Betis', 'Someone', KICKOFF + 3 * 3600) == (2, True)
+
+def test_kickoff_outside_tolerance_does_not_match():
+    index = make_index()
+    assert index.match('Football', 'Arsenal', 'Chelsea', KICKOFF + fixture_index.KICKOFF_TOLERANCE + 60) is None
+    assert index.match('Basketball', 'Arsenal', 'Chelsea', KICKOFF) is None
+
+class StaticProvider(odds_providers.OddsProvider):
+    name = 'static'
+
+    def __init__(self, events):
+        super().__init__()
+        self.raw = events
+
+    def fetch_raw(self, sport):
+        return self.raw
+
+def test_reversed_event_prices_land_on_our_sides():
+    provider = StaticProvider([{
+        'sport': 'Football', 'home': 'Chelsea FC', 'away': 'Arsenal', 'kickoff': KICKOFF, 'bookmaker': 'Book',
+        'markets': {
+            'Match Winner': {'Home': 1.5, 'Draw': 4.0, 'Away': 6.0},
+            'Asian Handicap': {'Home -1.5': 2.4, 'Away +1.5': 1.6},
+            'Goals Over/Under': {'Over 2.5': 1.8},
+        },
+    }])
+    odds, unmatched = odds_providers.resolve_events([provider], 'Football', make_index())
+    assert unmatched == 0
+    markets = odds[1]['Book']
+    assert markets['Match Winner'] == {'Home': 6.0, 'Draw': 4.0, 'Away': 1.5}
+    assert markets['Asian Handicap'] == {'Away -1.5': 2.4, 'Home +1.5': 1.6}
+    assert markets['Goals Over/Under'] == {'Over 2.5': 1.8}
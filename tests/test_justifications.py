@@ -0,0 +1,32 @@
+import justifications
+
+def test_round_trip():
+    codes = justifications.encode({'home_form': 62, 'goal_diff': 3}, 0.61423)
+    assert codes == 'hf:62;gd:3;p:0.6142'
+    assert justifications.decode(codes) == [('hf', (62.0,)), ('gd', (3.0,)), ('p', (0.6142,))]
+    assert justifications.render('Football', 'Flamengo vs Palmeiras', codes) == (
+        "Flamengo tem 62% de aproveitamento em casa. Saldo de gols favorável: +3.0. "
+        "Probabilidade calculada: 61.4%"
+    )
+
+def test_tuple_reasons_and_language():
+    codes = justifications.encode({'expected_goals': (1.6, 0.9)}, 0.5)
+    assert justifications.render('Football', 'Flamengo vs Palmeiras', codes, 'en') == (
+        "Expected goals: Flamengo 1.60 x 0.90 Palmeiras. Calculated probability: 50.0%"
+    )
+
+def test_negative_values_use_the_plain_template():
+    codes = justifications.encode({'goal_diff': -2}, 0.55)
+    assert justifications.render('Football', 'A vs B', codes).startswith("Saldo de gols: -2.0")
+
+def test_legacy_rows_keep_their_stored_text():
+    assert justifications.render('Football', 'A vs B', None) is None
+    rows = [
+        {'sport': 'Football', 'match_name': 'A vs B', 'justification_codes': None, 'ai_justification': 'Texto antigo'},
+        {'sport': 'Basketball', 'match_name': 'C vs D', 'justification_codes': 'p:0.7', 'ai_justification': None},
+    ]
+    justifications.render_rows(rows)
+    assert rows[0]['ai_justification'] == 'Texto antigo'
+    assert rows[1]['ai_justification'] == (
+        "Análise baseada em estatísticas recentes. Probabilidade calculada: 70.0%"
+    )
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+import live
+
+BET = {'match_name': 'A vs B', 'main_prediction': 'Win A'}
+ODDS = ({'Home': 2.0}, 'Bet365', {'Match Winner': {'Home': 2.0}})
+
+class Bucket:
+    async def acquire(self):
+        pass
+
+def monitor(publish):
+    monitor = live.LiveMonitor(
+        {'Football': {}}, None, lambda *args: ODDS, lambda *args: [dict(BET)], publish,
+    )
+    monitor.buckets = {'Football': Bucket()}
+    return monitor
+
+def state():
+    return live.FixtureState('Football', 1, {}, 2e9)
+
+def test_bets_are_offered_again_until_stored():
+    outcomes = [False, True, True]
+    calls = []
+
+    def publish(bets):
+        calls.append(len(bets))
+        return outcomes[len(calls) - 1]
+
+    mon, fixture = monitor(publish), state()
+    for _ in range(3):
+        asyncio.run(mon.poll(fixture))
+    # Unchanged odds after the failed save are scored again; once stored, never again
+    assert calls == [1, 1]
+    assert mon.published == {('A vs B', 'Win A')}
+
+def test_publish_errors_leave_the_bets_unpublished():
+    def publish(bets):
+        raise ConnectionError("connection refused")
+
+    mon, fixture = monitor(publish), state()
+    with pytest.raises(ConnectionError):
+        asyncio.run(mon.poll(fixture))
+    assert mon.published == set()
+    assert fixture.markets is None
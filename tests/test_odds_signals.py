@@ -0,0 +1,60 @@
+import analysis_engine
+import odds_anomaly
+
+def books(stale_home):
+    return {
+        'Bet365': {'Match Winner': {'Home': 2.0, 'Draw': 3.4, 'Away': 3.8}},
+        'Betway': {'Match Winner': {'Home': 2.0, 'Draw': 3.4, 'Away': 3.8}},
+        'Unibet': {'Match Winner': {'Home': 2.02, 'Draw': 3.4, 'Away': 3.8}},
+        'Stale': {'Match Winner': {'Home': stale_home, 'Draw': 3.4, 'Away': 3.8}},
+    }
+
+class FakeResponse:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'response': [{'bookmakers': [
+            {'name': name, 'bets': [
+                {'name': bet_name, 'values': [{'value': value, 'odd': str(odd)} for value, odd in selections.items()]}
+                for bet_name, selections in markets.items()
+            ]}
+            for name, markets in self.snapshot.items()
+        ]}]}
+
+def test_detector_flags_the_outlier_price():
+    signals = odds_anomaly.OddsMovementDetector().observe('Football', 1, books(2.3))
+    assert [(s['kind'], s['bookmaker'], s['selection'], s['odd']) for s in signals] == [
+        ('outlier', 'Stale', 'Home', 2.3),
+    ]
+
+def test_flagged_prices_do_not_replace_the_chosen_bookmakers(monkeypatch):
+    monkeypatch.setattr(analysis_engine, 'api_get', lambda *args: FakeResponse(books(2.3)))
+    monkeypatch.setattr(analysis_engine, 'DETECTOR', odds_anomaly.OddsMovementDetector())
+    monkeypatch.setattr(analysis_engine, 'ODDS_SIGNALS', {})
+
+    real_odds, bookmaker, markets = analysis_engine.get_real_odds(10, {}, 'Football')
+    assert (bookmaker, real_odds['Home'], markets['Match Winner']['Home']) == ('Bet365', 2.0, 2.0)
+    assert analysis_engine.has_odds_signals('Football', 10)
+
+def test_signals_tag_and_rank_their_bets(monkeypatch):
+    signal = {'kind': 'outlier', 'bookmaker': 'Stale', 'market': 'Match Winner', 'selection': 'Home', 'odd': 2.3, 'size': 0.13}
+    monkeypatch.setattr(analysis_engine, 'ODDS_SIGNALS', {('Football', 10): [signal]})
+    bets = [
+        {'fixture_id': 10, 'market': 'Goals Over/Under', 'selection': 'Over 2.5', 'odds_value': 1.9},
+        {'fixture_id': 10, 'market': 'Match Winner', 'selection': 'Home', 'odds_value': 2.0},
+    ]
+    tagged = analysis_engine.tag_odds_signals('Football', bets)
+    assert [bet['selection'] for bet in tagged] == ['Home', 'Over 2.5']
+    assert tagged[0]['odds_signals'] == [signal]
+    assert tagged[0]['odds_value'] == 2.0
+    assert 'odds_signals' not in tagged[1]
+
+def test_detector_grows_past_its_capacity():
+    detector = odds_anomaly.OddsMovementDetector(capacity=2)
+    detector.observe('Football', 1, books(2.0))
+    assert detector.series_count() == 12
+    assert len(detector.last) >= 12
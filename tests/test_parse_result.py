@@ -0,0 +1,26 @@
+import analysis_engine
+
+def football_game(status, goals, fulltime):
+    return {
+        'fixture': {'id': 7, 'date': '2026-10-18T19:00:00+00:00', 'status': {'short': status}},
+        'league': {'id': 39, 'name': 'Premier League'},
+        'teams': {'home': {'id': 1, 'name': 'Arsenal'}, 'away': {'id': 2, 'name': 'Chelsea'}},
+        'goals': goals,
+        'score': {'fulltime': fulltime, 'extratime': {'home': 1, 'away': 0}},
+    }
+
+def test_extra_time_games_store_the_90_minute_score():
+    row = analysis_engine.parse_result('Football', football_game('AET', {'home': 2, 'away': 1}, {'home': 1, 'away': 1}))
+    assert row[-2:] == (1, 1)
+
+def test_regular_games_fall_back_to_goals():
+    game = football_game('FT', {'home': 3, 'away': 0}, None)
+    assert analysis_engine.parse_result('Football', game)[-2:] == (3, 0)
+
+def test_extra_time_game_without_a_full_time_score_is_not_stored():
+    game = football_game('PEN', {'home': 1, 'away': 1}, {'home': None, 'away': None})
+    assert analysis_engine.parse_result('Football', game) is None
+
+def test_unfinished_games_are_not_stored():
+    game = football_game('NS', {'home': None, 'away': None}, {'home': None, 'away': None})
+    assert analysis_engine.parse_result('Football', game) is None
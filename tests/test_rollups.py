@@ -0,0 +1,69 @@
+import datetime
+from contextlib import contextmanager
+
+import pytest
+
+import db
+import rollups
+
+DAY1 = datetime.date(2026, 10, 18)
+DAY2 = datetime.date(2026, 10, 19)
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, query, args=None):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def settle(monkeypatch):
+    writes = {}
+
+    def run(rows):
+        @contextmanager
+        def connection():
+            yield type('Conn', (), {'cursor': lambda self: FakeCursor(rows)})()
+
+        def execute_values(cur, query, values, template=None):
+            writes['rollups' if 'bet_rollups' in query else 'updates'] = values
+
+        monkeypatch.setattr(db, 'connection', connection)
+        monkeypatch.setattr(rollups, 'execute_values', execute_values)
+        return rollups.settle_bets(), writes
+    return run
+
+def row(bet_id, day, selection, odd, confidence=60, home_score=2, away_score=1):
+    return (bet_id, day, 'Football', 'Serie A', 10, 'Goals Over/Under', selection,
+            confidence, odd, confidence / 100, 0.02, home_score, away_score)
+
+def test_a_pick_stored_on_several_days_counts_once_on_its_first_day(settle):
+    settled, writes = settle([
+        row(1, DAY1, 'Over 2.5', 2.0),
+        row(2, DAY2, 'Over 2.5', 1.9, confidence=70),
+        row(3, DAY2, 'Under 3.5', 1.8),
+    ])
+    assert settled == 3
+    # Every stored row gets its status, settled at its own odds
+    assert writes['updates'] == [(1, 'won', 2.0), (2, 'won', 1.9), (3, 'won', 1.8)]
+
+    rollup = {key[0]: dict(zip(rollups.ROLLUP_COLUMNS, key[4:])) for key in writes['rollups']}
+    assert sorted(rollup) == [DAY1, DAY2]
+    assert (rollup[DAY1]['bets'], rollup[DAY1]['returns']) == (1, 2.0)
+    assert (rollup[DAY2]['bets'], rollup[DAY2]['returns']) == (1, 1.8)
+
+def test_pushes_and_unpriced_markets(settle):
+    settled, writes = settle([
+        row(1, DAY1, 'Over 3', 2.0),
+        row(2, DAY1, 'Over 3 corners', 2.0),
+    ])
+    assert settled == 2
+    assert writes['updates'] == [(1, 'push', 1.0), (2, 'void', None)]
+    (key,) = writes['rollups']
+    assert dict(zip(rollups.ROLLUP_COLUMNS, key[4:]))['pushes'] == 1
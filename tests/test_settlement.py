@@ -0,0 +1,33 @@
+import pytest
+
+from settlement import unit_return
+
+@pytest.mark.parametrize('selection, home_score, away_score, expected', [
+    ('Over 2.25', 2, 0, 0.5),      # push on 2, loss on 2.5
+    ('Over 2.25', 2, 1, 2.0),
+    ('Under 2.25', 1, 1, 1.5),     # push on 2, win on 2.5
+    ('Over 2.75', 2, 1, 1.5),      # win on 2.5, push on 3
+    ('Under 2.75', 2, 1, 0.5),
+    ('Over 2.5', 1, 1, 0.0),
+])
+def test_total_quarter_lines(selection, home_score, away_score, expected):
+    assert unit_return('Goals Over/Under', selection, 2.0, home_score, away_score) == pytest.approx(expected)
+
+@pytest.mark.parametrize('selection, home_score, away_score, expected', [
+    ('Home -0.75', 1, 0, 1.5),     # win on -0.5, push on -1
+    ('Home -0.75', 2, 0, 2.0),
+    ('Home -0.75', 1, 1, 0.0),
+    ('Away +0.75', 1, 0, 0.5),     # loss on +0.5, push on +1
+    ('Away +0.25', 1, 1, 1.5),     # push on 0, win on +0.5
+    ('Home -0.25', 1, 1, 0.5),
+    ('Home -1', 1, 0, 1.0),
+])
+def test_handicap_quarter_lines(selection, home_score, away_score, expected):
+    assert unit_return('Asian Handicap', selection, 2.0, home_score, away_score) == pytest.approx(expected)
+
+def test_winner_and_unpriced_markets():
+    assert unit_return('Match Winner', 'Draw', 3.2, 1, 1) == 3.2
+    assert unit_return('Home/Away', 'Away', 1.8, 101, 99) == 0.0
+    assert unit_return('Both Teams Score', 'Yes', 1.9, 1, 1) == 1.9
+    assert unit_return('Corners', 'Over 9.5', 1.9, 1, 1) is None
+    assert unit_return('Asian Handicap', 'Draw -0.5', 1.9, 1, 1) is None
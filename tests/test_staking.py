@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import staking
+
+def bet(market, selection, probability, odd=2.0, match='Arsenal vs Chelsea'):
+    return {
+        'match_name': match, 'main_prediction': selection, 'market': market, 'selection': selection,
+        'model_probability': probability, 'odds_value': odd,
+    }
+
+def win_rates(bets, n=200000, seed=1):
+    matches, lows, widths, n_matches = staking.outcome_intervals(bets)
+    draws = np.random.default_rng(seed).random((n, n_matches))[:, matches]
+    return staking.round_wins(draws, lows, widths).mean(axis=0)
+
+def test_nested_totals_keep_their_probabilities():
+    bets = [bet('Goals Over/Under', 'Over 2.5', 0.6), bet('Goals Over/Under', 'Over 1.5', 0.8)]
+    rates = win_rates(bets)
+    assert rates == pytest.approx([0.6, 0.8], abs=0.01)
+
+def test_several_handicap_lines_keep_their_probabilities():
+    bets = [
+        bet('Asian Handicap', 'Home -0.5', 0.55),
+        bet('Asian Handicap', 'Home -1.5', 0.35),
+        bet('Asian Handicap', 'Away +0.25', 0.5),
+    ]
+    assert win_rates(bets) == pytest.approx([0.55, 0.35, 0.5], abs=0.01)
+
+def test_complementary_selections_never_win_together():
+    bets = [
+        bet('Goals Over/Under', 'Over 2.5', 0.55),
+        bet('Goals Over/Under', 'Under 2.5', 0.45),
+        bet('Asian Handicap', 'Home -1', 0.4),
+        bet('Asian Handicap', 'Away +1', 0.6),
+    ]
+    matches, lows, widths, n_matches = staking.outcome_intervals(bets)
+    draws = np.random.default_rng(2).random((50000, n_matches))[:, matches]
+    wins = staking.round_wins(draws, lows, widths)
+    assert not (wins[:, 0] & wins[:, 1]).any()
+    assert not (wins[:, 2] & wins[:, 3]).any()
+
+def test_incoherent_line_wraps_instead_of_clipping():
+    bets = [bet('Match Winner', 'Home', 0.7), bet('Match Winner', 'Away', 0.5)]
+    assert win_rates(bets) == pytest.approx([0.7, 0.5], abs=0.01)
+
+def test_bet_line_keys_handicaps_from_the_home_side():
+    assert staking.bet_line(bet('Asian Handicap', 'Away +1.5', 0.5)) == ('Asian Handicap', -1.5)
+    assert staking.bet_line(bet('Asian Handicap', 'Home -1.5', 0.5)) == ('Asian Handicap', -1.5)
+    assert staking.bet_line(bet('Match Winner', 'Draw', 0.3)) == ('Match Winner', None)
+
+def test_stakes_respect_match_and_daily_caps():
+    bets = [bet('Match Winner', 'Home', 0.7, 2.0, f"Team {i} vs Other {i}") for i in range(20)]
+    bets.append(bet('Goals Over/Under', 'Over 2.5', 0.7, 2.0, 'Team 0 vs Other 0'))
+    stakes = staking.stake_bets(bets)
+    assert max(stakes) <= staking.MAX_STAKE
+    assert sum(stakes) == pytest.approx(staking.MAX_DAILY_EXPOSURE)
+    # Two picks on one match together stake what one pick on another match does
+    assert stakes[0] + stakes[-1] == pytest.approx(stakes[1])
+
+def test_simulated_roi_matches_the_expected_value():
+    bets = [bet('Match Winner', 'Home', 0.6, 2.0)]
+    report = staking.simulate_bankroll(bets, [0.02], n_paths=2000, n_rounds=50)
+    assert report['expected_roi_per_round'] == pytest.approx(0.02 * (0.6 * 2 - 1))
+    assert report['final_bankroll_mean'] > 1
+
+def test_stored_rows_group_like_in_process_bets():
+    import db
+    in_process = [bet('Goals Over/Under', 'Over 2.5', 0.6), bet('Goals Over/Under', 'Under 2.5', 0.4)]
+    stored = [
+        {col: b.get(col) for col in db.TODAY_COLUMNS}
+        for b in [dict(b, main_prediction=f"{b['selection']} Goals") for b in in_process]
+    ]
+    for got, expected in zip(staking.outcome_intervals(stored), staking.outcome_intervals(in_process)):
+        assert got == pytest.approx(expected)
@@ -0,0 +1,139 @@
+import os
+import time
+import uuid
+
+import pytest
+
+import db
+import update_db
+import work_queue
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+needs_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+def football(fixture_id):
+    return {'fixture': {'id': fixture_id}}
+
+def test_fixture_items():
+    assert work_queue.fixture_items('Football', [football(7), football(3)]) == [
+        ('Football', '7', [football(7)]), ('Football', '3', [football(3)]),
+    ]
+    games = [{'id': i} for i in (5, 1, 4, 2, 3)]
+    items = work_queue.fixture_items('Basketball', games, slate_batch=2)
+    assert [(key, [g['id'] for g in batch]) for _, key, batch in items] == [
+        ('batch-0', [1, 2]), ('batch-1', [3, 4]), ('batch-2', [5]),
+    ]
+
+@pytest.fixture
+def run_id(monkeypatch):
+    monkeypatch.setattr(db, 'DATABASE_URL', TEST_DATABASE_URL)
+    db.close_pool()
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(update_db.CREATE_TABLES['work_queue'])
+        cur.close()
+    run_id = f"test-{uuid.uuid4().hex}"
+    yield run_id
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM work_runs WHERE run_id = %s", (run_id,))
+        cur.close()
+    db.close_pool()
+
+def enqueue(run_id, *fixture_ids):
+    return work_queue.enqueue(run_id, work_queue.fixture_items('Football', [football(i) for i in fixture_ids]))
+
+@needs_db
+def test_enqueue_is_idempotent(run_id):
+    assert enqueue(run_id, 1, 2) == 2
+    assert enqueue(run_id, 1, 2, 3) == 1
+    assert work_queue.progress(run_id) == {'pending': 3}
+
+@needs_db
+def test_claims_are_exclusive_while_leased(run_id):
+    enqueue(run_id, 1)
+    item_id, sport, games = work_queue.claim(run_id, 'a')
+    assert (sport, games) == ('Football', [football(1)])
+    assert work_queue.claim(run_id, 'b') is None
+    assert work_queue.complete(item_id, 'a')
+    assert work_queue.progress(run_id) == {'done': 1}
+
+@needs_db
+def test_expired_lease_moves_to_another_worker(run_id):
+    enqueue(run_id, 1)
+    item_id = work_queue.claim(run_id, 'a', lease_seconds=-1)[0]
+    assert work_queue.claim(run_id, 'b')[0] == item_id
+    # The first worker lost the lease and cannot complete or fail the item any more
+    assert not work_queue.complete(item_id, 'a')
+    work_queue.fail(item_id, 'a', 'late')
+    assert work_queue.progress(run_id) == {'running': 1}
+    assert work_queue.complete(item_id, 'b')
+
+@needs_db
+def test_failed_items_are_retried_until_out_of_attempts(run_id):
+    enqueue(run_id, 1)
+    for attempt in range(work_queue.MAX_ATTEMPTS):
+        item_id = work_queue.claim(run_id, 'a')[0]
+        work_queue.fail(item_id, 'a', f"error {attempt}")
+    assert work_queue.claim(run_id, 'a') is None
+    assert work_queue.progress(run_id) == {'failed': 1}
+    assert work_queue.outstanding(run_id) == 0
+
+@needs_db
+def test_finalize_waits_for_outstanding_items_and_runs_once(run_id):
+    enqueue(run_id, 1, 2)
+    first = work_queue.claim(run_id, 'a')[0]
+    work_queue.complete(first, 'a')
+    assert not work_queue.claim_finalize(run_id)
+    # An expired lease with attempts left is still outstanding
+    second = work_queue.claim(run_id, 'a', lease_seconds=-1)[0]
+    assert work_queue.outstanding(run_id) == 1
+    assert not work_queue.claim_finalize(run_id)
+    work_queue.complete(second, 'a')
+    assert work_queue.claim_finalize(run_id)
+    assert not work_queue.claim_finalize(run_id)
+
+@needs_db
+def test_reopen_requeues_failed_items_and_allows_finalizing_again(run_id):
+    enqueue(run_id, 1, 2)
+    for _ in range(work_queue.MAX_ATTEMPTS):
+        work_queue.fail(work_queue.claim(run_id, 'a')[0], 'a', 'odds request failed')
+    work_queue.complete(work_queue.claim(run_id, 'a')[0], 'a')
+    assert work_queue.claim_finalize(run_id)
+
+    assert enqueue(run_id, 1, 2) == 0
+    assert work_queue.reopen(run_id) == 1
+    assert work_queue.progress(run_id) == {'pending': 1, 'done': 1}
+    item_id = work_queue.claim(run_id, 'b')[0]
+    assert not work_queue.claim_finalize(run_id)
+    work_queue.complete(item_id, 'b')
+    assert work_queue.claim_finalize(run_id)
+
+@needs_db
+def test_lease_expired_on_the_last_attempt_fails_the_item(run_id):
+    enqueue(run_id, 1)
+    for _ in range(work_queue.MAX_ATTEMPTS - 1):
+        work_queue.fail(work_queue.claim(run_id, 'a')[0], 'a', 'error')
+    # The worker dies holding the last attempt
+    work_queue.claim(run_id, 'a', lease_seconds=-1)
+    assert work_queue.claim(run_id, 'b') is None
+    assert work_queue.progress(run_id) == {'failed': 1}
+
+@needs_db
+def test_renew_extends_only_a_held_lease(run_id):
+    enqueue(run_id, 1)
+    item_id = work_queue.claim(run_id, 'a', lease_seconds=-1)[0]
+    assert work_queue.renew(item_id, 'a')
+    assert work_queue.claim(run_id, 'b') is None
+    assert not work_queue.renew(item_id, 'b')
+
+def test_keep_leased_renews_until_the_block_ends(monkeypatch):
+    renewals = []
+    monkeypatch.setattr(work_queue, 'renew', lambda item_id, worker, lease_seconds: renewals.append(item_id) or True)
+    with work_queue.keep_leased(7, 'a', lease_seconds=0.03):
+        time.sleep(0.1)
+    count = len(renewals)
+    time.sleep(0.05)
+    assert count >= 2
+    assert len(renewals) == count
+    assert set(renewals) == {7}
@@ -0,0 +1,62 @@
+import pytest
+
+import analysis_engine
+import db
+import work_queue
+
+def game(fixture_id):
+    return {
+        'fixture': {'id': fixture_id, 'date': '2026-10-19T20:00:00+00:00'},
+        'league': {'name': 'Serie A'},
+        'teams': {'home': {'name': 'A'}, 'away': {'name': 'B'}},
+    }
+
+class FakeQueue:
+    def __init__(self, items):
+        self.items = list(items)
+        self.completed = []
+        self.failed = []
+
+    def claim(self, run_id, worker):
+        return self.items.pop(0) if self.items else None
+
+    def complete(self, item_id, worker):
+        self.completed.append(item_id)
+        return True
+
+    def fail(self, item_id, worker, error):
+        self.failed.append(item_id)
+
+@pytest.fixture
+def queue(monkeypatch):
+    fake = FakeQueue([(1, 'Football', [game(10)]), (2, 'Football', [game(11)])])
+    monkeypatch.setattr(work_queue, 'claim', fake.claim)
+    monkeypatch.setattr(work_queue, 'complete', fake.complete)
+    monkeypatch.setattr(work_queue, 'fail', fake.fail)
+    monkeypatch.setattr(work_queue, 'outstanding', lambda run_id: 0)
+    monkeypatch.setattr(work_queue, 'progress', lambda run_id: {})
+    monkeypatch.setattr(work_queue, 'claim_finalize', lambda run_id: False)
+    monkeypatch.setattr(analysis_engine, 'analyze_games', lambda sport, config, games: [{'match_name': 'A vs B'}])
+    return fake
+
+def test_items_are_completed_once_their_bets_are_saved(queue, monkeypatch):
+    monkeypatch.setattr(db, 'save_bets', lambda bets: len(bets))
+    analysis_engine.run_worker('run')
+    assert queue.completed == [1, 2]
+    assert queue.failed == []
+
+def test_failed_save_returns_the_item_to_the_queue(queue, monkeypatch):
+    def broken(bets):
+        raise RuntimeError('column "market" does not exist')
+    monkeypatch.setattr(db, 'save_bets', broken)
+    analysis_engine.run_worker('run')
+    assert queue.completed == []
+    assert queue.failed == [1, 2]
+
+def test_items_with_failed_odds_stay_open(queue, monkeypatch):
+    monkeypatch.setattr(db, 'save_bets', lambda bets: len(bets))
+    monkeypatch.setattr(analysis_engine, 'ODDS_FAILED', {('Football', 11)})
+    analysis_engine.run_worker('run')
+    # The bets found are stored, but the item goes back to the queue
+    assert queue.completed == [1]
+    assert queue.failed == [2]
@@ -1,34 +1,159 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
+import sys
+import db
 
-load_dotenv()
+DATABASE_URL = db.DATABASE_URL
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
+# Schema added after bets_analysis; each statement is safe to run repeatedly
+CREATE_TABLES = {
+    'match_results': """
+    CREATE TABLE IF NOT EXISTS match_results (
+        sport VARCHAR(50) NOT NULL,
+        fixture_id INTEGER NOT NULL,
+        league_id INTEGER,
+        league VARCHAR(255),
+        match_date TIMESTAMPTZ,
+        home_id INTEGER NOT NULL,
+        home_team VARCHAR(255),
+        away_id INTEGER NOT NULL,
+        away_team VARCHAR(255),
+        home_score INTEGER,
+        away_score INTEGER,
+        PRIMARY KEY (sport, fixture_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_match_results_sport_date ON match_results (sport, match_date);
+    """,
+    'model_parameters': """
+    CREATE TABLE IF NOT EXISTS model_parameters (
+        id SERIAL PRIMARY KEY,
+        sport VARCHAR(50) NOT NULL,
+        league_id INTEGER,
+        version INTEGER NOT NULL,
+        params JSONB NOT NULL,
+        n_matches INTEGER,
+        log_loss DOUBLE PRECISION,
+        baseline_log_loss DOUBLE PRECISION,
+        created_at TIMESTAMPTZ DEFAULT NOW()
+    );
+    CREATE INDEX IF NOT EXISTS idx_model_parameters_lookup ON model_parameters (sport, league_id, version DESC);
+    """,
+    'team_ratings': """
+    CREATE TABLE IF NOT EXISTS team_ratings (
+        sport VARCHAR(50) NOT NULL,
+        team_id INTEGER NOT NULL,
+        team_name VARCHAR(255),
+        rating DOUBLE PRECISION NOT NULL,
+        games INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (sport, team_id)
+    );
+    ALTER TABLE match_results ADD COLUMN IF NOT EXISTS elo_applied BOOLEAN NOT NULL DEFAULT FALSE;
+    CREATE INDEX IF NOT EXISTS idx_match_results_elo_pending ON match_results (match_date) WHERE NOT elo_applied;
+    """,
+    'goal_model': """
+    ALTER TABLE team_ratings ADD COLUMN IF NOT EXISTS attack DOUBLE PRECISION;
+    ALTER TABLE team_ratings ADD COLUMN IF NOT EXISTS defence DOUBLE PRECISION;
+    ALTER TABLE model_parameters ADD COLUMN IF NOT EXISTS model VARCHAR(20) NOT NULL DEFAULT 'strength';
+    """,
+    'staking': """
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS model_probability DOUBLE PRECISION;
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS stake_fraction DOUBLE PRECISION;
+    """,
+    'api': """
+    CREATE INDEX IF NOT EXISTS idx_bets_analysis_created ON bets_analysis (created_at);
+    CREATE INDEX IF NOT EXISTS idx_bets_analysis_keyset ON bets_analysis (confidence_level DESC, id DESC);
+    """,
+    'work_queue': """
+    CREATE TABLE IF NOT EXISTS work_runs (
+        run_id VARCHAR(64) PRIMARY KEY,
+        created_at TIMESTAMPTZ DEFAULT NOW(),
+        finalized_at TIMESTAMPTZ
+    );
+    CREATE TABLE IF NOT EXISTS work_items (
+        id BIGSERIAL PRIMARY KEY,
+        run_id VARCHAR(64) NOT NULL REFERENCES work_runs (run_id) ON DELETE CASCADE,
+        sport VARCHAR(50) NOT NULL,
+        item_key VARCHAR(64) NOT NULL,
+        payload JSONB NOT NULL,
+        status VARCHAR(10) NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker VARCHAR(255),
+        leased_until TIMESTAMPTZ,
+        error TEXT,
+        created_at TIMESTAMPTZ DEFAULT NOW(),
+        finished_at TIMESTAMPTZ,
+        UNIQUE (run_id, sport, item_key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_work_items_claim ON work_items (run_id, id) WHERE status IN ('pending', 'running');
+    """,
+    'rollups': """
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS fixture_id BIGINT;
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS market VARCHAR(50);
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS selection VARCHAR(50);
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS unit_return DOUBLE PRECISION;
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS settled_at TIMESTAMPTZ;
+    CREATE INDEX IF NOT EXISTS idx_bets_analysis_unsettled ON bets_analysis (sport, fixture_id) WHERE status = 'pending';
+    CREATE TABLE IF NOT EXISTS bet_rollups (
+        day DATE NOT NULL,
+        sport VARCHAR(50) NOT NULL,
+        league VARCHAR(255) NOT NULL,
+        confidence_bucket INTEGER NOT NULL,
+        bets INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        pushes INTEGER NOT NULL DEFAULT 0,
+        returns DOUBLE PRECISION NOT NULL DEFAULT 0,
+        stake_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        stake_returns DOUBLE PRECISION NOT NULL DEFAULT 0,
+        probability_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        updated_at TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (day, sport, league, confidence_bucket)
+    );
+    """,
+    'checkpoints': """
+    CREATE TABLE IF NOT EXISTS run_checkpoints (
+        run_id VARCHAR(64) NOT NULL,
+        kind VARCHAR(10) NOT NULL,
+        sport VARCHAR(50) NOT NULL,
+        item_key VARCHAR(64) NOT NULL,
+        payload JSONB NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (run_id, kind, sport, item_key)
+    );
+    """,
+    'justifications': """
+    ALTER TABLE bets_analysis ADD COLUMN IF NOT EXISTS justification_codes VARCHAR(255);
+    """,
+}
 
 def update_db():
+    """Applies the schema changes; returns False if they could not all be applied."""
     if not DATABASE_URL:
         print("Error: DATABASE_URL not found.")
-        return
+        return False
 
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        
-        # Check if column exists
-        cur.execute("SELECT column_name FROM information_schema.columns WHERE table_name='bets_analysis' AND column_name='sport'")
-        if cur.fetchone():
-            print("Column 'sport' already exists.")
-        else:
-            print("Adding 'sport' column to bets_analysis...")
-            cur.execute("ALTER TABLE bets_analysis ADD COLUMN sport VARCHAR(50) DEFAULT 'Football'")
-            conn.commit()
-            print("Column added successfully!")
-        
-        cur.close()
-        conn.close()
+        with db.connection() as conn:
+            cur = conn.cursor()
+            
+            # Check if column exists
+            if db.column_exists(cur, 'bets_analysis', 'sport'):
+                print("Column 'sport' already exists.")
+            else:
+                print("Adding 'sport' column to bets_analysis...")
+                cur.execute("ALTER TABLE bets_analysis ADD COLUMN sport VARCHAR(50) DEFAULT 'Football'")
+                conn.commit()
+                print("Column added successfully!")
+
+            for name, statement in CREATE_TABLES.items():
+                cur.execute(statement)
+                conn.commit()
+                print(f"Schema '{name}' is up to date.")
+            
+            cur.close()
+        return True
     except Exception as e:
         print(f"Error updating database: {e}")
+        return False
 
 if __name__ == "__main__":
-    update_db()
+    # A failed migration must fail the workflow: the engine writes the new columns
+    sys.exit(0 if update_db() else 1)
@@ -1,11 +1,8 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
 from prettytable import PrettyTable
+import db
+import justifications
 
-load_dotenv()
-
-DATABASE_URL = os.environ.get("DATABASE_URL")
+DATABASE_URL = db.DATABASE_URL
 
 def view_bets():
     """Displays today's betting opportunities from the database."""
@@ -14,20 +11,8 @@ def view_bets():
         return
 
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        
         # Fetch bets created today
-        query = """
-        SELECT sport, match_name, main_prediction, odds_value, confidence_level, ai_justification
-        FROM bets_analysis
-        WHERE created_at::date = CURRENT_DATE
-        ORDER BY confidence_level DESC, sport
-        LIMIT 20
-        """
-        
-        cur.execute(query)
-        rows = cur.fetchall()
+        rows = justifications.render_rows(db.todays_bets(limit=20))
         
         if not rows:
             print("Nenhuma aposta encontrada no banco ainda.")
@@ -39,15 +24,16 @@ def view_bets():
         print(f"\n--- TOP 20 APOSTAS DO DIA ---\n")
         
         for row in rows:
-            sport, match, pred, odd, conf, just = row
+            sport, match, pred, odd, conf, just = (
+                row['sport'], row['match_name'], row['main_prediction'],
+                row['odds_value'], row['confidence_level'], row['ai_justification']
+            )
             # Truncate justification for display
+            just = just or ''
             just_short = (just[:30] + '..') if len(just) > 30 else just
             t.add_row([sport, match, pred, odd, f"{conf}%", just_short])
 
         print(t)
-        
-        cur.close()
-        conn.close()
     except Exception as e:
         print(f"Error fetching bets: {e}")
 
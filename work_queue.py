@@ -0,0 +1,192 @@
+import os
+import socket
+import threading
+from contextlib import contextmanager
+
+from psycopg2.extras import Json, execute_values
+
+import db
+
+# Seconds a claimed item stays leased; a worker that dies holding it loses it after this.
+# A live worker renews the lease every third of it (see keep_leased)
+LEASE_SECONDS = int(os.environ.get("QUEUE_LEASE_SECONDS", "300"))
+# Claims of an item before it is given up as failed
+MAX_ATTEMPTS = 3
+# Basketball games are simulated in batches, so they are queued per league batch
+SLATE_BATCH = 25
+
+# Items some worker may still process: pending, leased, or expired with attempts left
+OUTSTANDING = """
+    run_id = %s AND (
+        status = 'pending'
+        OR (status = 'running' AND (leased_until >= NOW() OR attempts < %s))
+    )
+"""
+
+def worker_name():
+    return os.environ.get("WORKER_NAME") or f"{socket.gethostname()}-{os.getpid()}"
+
+def enqueue(run_id, items):
+    """Registers a run and queues its (sport, key, games) items; re-enqueueing is a no-op.
+
+    Returns the number of items newly queued.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO work_runs (run_id) VALUES (%s) ON CONFLICT (run_id) DO NOTHING", (run_id,))
+        rows = execute_values(cur, """
+            INSERT INTO work_items (run_id, sport, item_key, payload)
+            VALUES %s
+            ON CONFLICT (run_id, sport, item_key) DO NOTHING
+            RETURNING id
+        """, [(run_id, sport, key, Json(games)) for sport, key, games in items], fetch=True)
+        cur.close()
+    return len(rows)
+
+def claim(run_id, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """Leases the oldest available item of a run: (id, sport, games) or None.
+
+    Available means pending, or running with an expired lease. SKIP LOCKED lets any
+    number of workers claim concurrently without waiting on each other's rows. Items
+    whose lease expired on their last attempt are marked failed first.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE work_items
+            SET status = 'failed', leased_until = NULL,
+                error = COALESCE(error, 'lease expired on the last attempt')
+            WHERE run_id = %s AND status = 'running' AND leased_until < NOW() AND attempts >= %s
+        """, (run_id, max_attempts))
+        cur.execute("""
+            UPDATE work_items
+            SET status = 'running', worker = %s, attempts = attempts + 1,
+                leased_until = NOW() + %s * INTERVAL '1 second'
+            WHERE id = (
+                SELECT id FROM work_items
+                WHERE run_id = %s AND attempts < %s
+                  AND (status = 'pending' OR (status = 'running' AND leased_until < NOW()))
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, sport, payload
+        """, (worker, lease_seconds, run_id, max_attempts))
+        row = cur.fetchone()
+        cur.close()
+    return row
+
+def renew(item_id, worker, lease_seconds=LEASE_SECONDS):
+    """Extends the lease of an item still held; False if it was lost to another worker."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE work_items SET leased_until = NOW() + %s * INTERVAL '1 second'
+            WHERE id = %s AND worker = %s AND status = 'running'
+        """, (lease_seconds, item_id, worker))
+        renewed = cur.rowcount == 1
+        cur.close()
+    return renewed
+
+@contextmanager
+def keep_leased(item_id, worker, lease_seconds=LEASE_SECONDS):
+    """Renews the item's lease in the background while the block runs, so slow items are not taken over."""
+    stop = threading.Event()
+
+    def renew_until_stopped():
+        while not stop.wait(lease_seconds / 3):
+            try:
+                if not renew(item_id, worker, lease_seconds):
+                    return
+            except Exception as e:
+                print(f"Lease renewal of item {item_id} failed: {e}")
+
+    thread = threading.Thread(target=renew_until_stopped, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def complete(item_id, worker):
+    """Marks an item done; False if its lease was lost to another worker meanwhile."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE work_items SET status = 'done', finished_at = NOW(), error = NULL
+            WHERE id = %s AND worker = %s AND status = 'running'
+        """, (item_id, worker))
+        done = cur.rowcount == 1
+        cur.close()
+    return done
+
+def fail(item_id, worker, error, max_attempts=MAX_ATTEMPTS):
+    """Releases an item after an error: back to pending, or failed once out of attempts."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE work_items
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                leased_until = NULL, error = %s
+            WHERE id = %s AND worker = %s AND status = 'running'
+        """, (max_attempts, str(error)[:1000], item_id, worker))
+        cur.close()
+
+def reopen(run_id):
+    """Puts a run's failed items back to pending with fresh attempts and clears its finalization.
+
+    Returns the number of items reopened.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE work_items
+            SET status = 'pending', attempts = 0, worker = NULL, leased_until = NULL
+            WHERE run_id = %s AND status = 'failed'
+        """, (run_id,))
+        reopened = cur.rowcount
+        cur.execute("UPDATE work_runs SET finalized_at = NULL WHERE run_id = %s", (run_id,))
+        cur.close()
+    return reopened
+
+def progress(run_id):
+    """Item counts of a run by status."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT status, COUNT(*) FROM work_items WHERE run_id = %s GROUP BY status", (run_id,))
+        counts = dict(cur.fetchall())
+        cur.close()
+    return counts
+
+def outstanding(run_id, max_attempts=MAX_ATTEMPTS):
+    """Number of items of a run that are not settled yet."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM work_items WHERE {OUTSTANDING}", (run_id, max_attempts))
+        count = cur.fetchone()[0]
+        cur.close()
+    return count
+
+def claim_finalize(run_id, max_attempts=MAX_ATTEMPTS):
+    """True for exactly one caller, once no item of the run is outstanding."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            UPDATE work_runs SET finalized_at = NOW()
+            WHERE run_id = %s AND finalized_at IS NULL
+              AND NOT EXISTS (SELECT 1 FROM work_items WHERE {OUTSTANDING})
+        """, (run_id, run_id, max_attempts))
+        claimed = cur.rowcount == 1
+        cur.close()
+    return claimed
+
+def fixture_items(sport, games, slate_batch=SLATE_BATCH):
+    """Splits a sport's games into queue items: one per football fixture, basketball in batches."""
+    if sport == 'Basketball':
+        games = sorted(games, key=lambda game: game.get('id') or 0)
+        return [
+            (sport, f"batch-{start // slate_batch}", games[start:start + slate_batch])
+            for start in range(0, len(games), slate_batch)
+        ]
+    return [(sport, str(game['fixture']['id']), [game]) for game in games]